@@ -0,0 +1,234 @@
+"""Ligne de commande sans interface graphique, pour les scripts et tâches planifiées.
+
+N'importe jamais Qt ; les modules base de données et services ne sont importés
+que par la sous-commande qui en a besoin (`--help` reste instantané).
+
+    python -m app.cli migrate
+    python -m app.cli reset --yes
+    python -m app.cli rollup
+    python -m app.cli import export_compta.csv
+    python -m app.cli export portefeuille.xlsx
+    python -m app.cli summary --by month --project PRJ-2025-001
+    python -m app.cli projects --status "En cours"
+    python -m app.cli search "migration erp"
+
+Sorties en texte séparé par des tabulations (montants en euros, point
+décimal) ; la progression et les erreurs vont sur stderr. Code de retour
+0 si succès, 1 en cas d'erreur, 2 pour une commande mal formée.
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+
+def _err(*parts) -> None:
+    print(*parts, file=sys.stderr)
+
+def _print_progress(rows: int, fraction) -> None:
+    pct = f" ({fraction:.0%})" if fraction is not None else ""
+    print(f"\r{rows} ligne(s){pct}", end="", file=sys.stderr, flush=True)
+
+def _euros(cents: int) -> str:
+    return f"{cents / 100:.2f}"
+
+def _init_db() -> None:
+    from app.db.repo import init_db
+    init_db()
+
+
+# --- Schéma ---
+def cmd_migrate(args) -> int:
+    from app.db.migrations import HEAD, upgrade
+
+    version = upgrade(target=args.target or HEAD,
+                      progress=None if args.quiet else lambda n, desc: _err(f"migration {n} : {desc}"))
+    print(f"schéma v{version}")
+    return 0
+
+def cmd_reset(args) -> int:
+    if not args.yes:
+        if not sys.stdin.isatty():
+            _err("Erreur : réinitialisation refusée sans --yes (entrée non interactive)")
+            return 1
+        _err("⚠️  ATTENTION : Suppression et recréation de toutes les tables !")
+        if input("Es-tu sûr ? (o/n) : ").strip().lower() != "o":
+            _err("❌ Opération annulée.")
+            return 1
+    from app.db.migrations import reset
+
+    version = reset()
+    if args.seed:
+        from app.db.repo import seed_demo_if_empty
+        seed_demo_if_empty()
+    print(f"schéma v{version}")
+    return 0
+
+def cmd_seed(args) -> int:
+    from app.db.repo import seed_demo_if_empty
+
+    _init_db()
+    seed_demo_if_empty()
+    return 0
+
+def cmd_rollup(args) -> int:
+    from app.db.repo import rebuild_monthly_rollup, rebuild_project_totals
+
+    _init_db()
+    print(f"monthly_rollup\t{rebuild_monthly_rollup()}")
+    rebuild_project_totals()
+    print("project_totals\tok")
+    return 0
+
+
+# --- Import / export ---
+def cmd_import(args) -> int:
+    from app.services.budget_import import import_budget_lines, BATCH_SIZE
+
+    _init_db()
+    report = import_budget_lines(args.path, progress=None if args.quiet else _print_progress,
+                                 batch_size=args.batch_size or BATCH_SIZE, sheet=args.sheet)
+    if not args.quiet:
+        _err()
+    for line, message in report.errors:
+        _err(f"ligne {line} : {message}")
+    print(f"inserted\t{report.inserted}")
+    print(f"skipped\t{report.skipped}")
+    return 1 if args.strict and report.skipped else 0
+
+def cmd_export(args) -> int:
+    from app.services.export import export_portfolio
+
+    _init_db()
+    report = export_portfolio(args.path, args.format, args.dataset,
+                              progress=None if args.quiet else _print_progress)
+    if not args.quiet:
+        _err()
+    for name, rows in report.rows.items():
+        print(f"{name}\t{rows}")
+    return 0
+
+
+# --- Consultation ---
+def cmd_summary(args) -> int:
+    from app.services.budget_summary import portfolio_totals, project_totals, monthly_breakdown, yearly_breakdown
+
+    _init_db()
+    project_id = None
+    if args.project:
+        from app.db.repo import find_project_id
+        project_id = find_project_id(args.project)
+        if project_id is None:
+            _err(f"Erreur : projet inconnu : {args.project}")
+            return 1
+    if args.by:
+        rows = (monthly_breakdown if args.by == "month" else yearly_breakdown)(project_id)
+        print("period\tcapex\topex\ttotal\tlines")
+        for r in rows:
+            t = r.totals
+            print(f"{r.period or ''}\t{_euros(t.capex_cents)}\t{_euros(t.opex_cents)}\t{_euros(t.total_cents)}\t{t.count}")
+        return 0
+    t = portfolio_totals() if project_id is None else project_totals([project_id]).get(project_id)
+    if t is None:
+        from app.services.budget_summary import BudgetTotals
+        t = BudgetTotals()
+    print(f"capex\t{_euros(t.capex_cents)}")
+    print(f"opex\t{_euros(t.opex_cents)}")
+    print(f"total\t{_euros(t.total_cents)}")
+    print(f"lines\t{t.count}")
+    return 0
+
+def cmd_projects(args) -> int:
+    from app.db.repo import query_projects, ProjectFilter, ProjectOrder, Page
+
+    _init_db()
+    flt = ProjectFilter(text=args.text, status=args.status, owner=args.owner, theme=args.theme)
+    order = ProjectOrder(key=args.sort, descending=args.desc)
+    rows = query_projects(flt, order, Page(limit=args.limit))
+    print("id\tcode\tname\towner\tstart_date\tend_date")
+    for r in rows:
+        print("\t".join("" if v is None else str(v)
+                        for v in (r.id, r.code, r.name, r.owner, r.start_date, r.end_date)))
+    return 0
+
+def cmd_search(args) -> int:
+    from app.db.repo import search
+
+    _init_db()
+    for hit in search(args.query, limit=args.limit):
+        print(f"{hit['project_id']}\t{hit['code']}\t{hit['name']}\t{hit['snippet'] or ''}")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Gestion budgétaire — commandes")
+    sub = parser.add_subparsers(dest="command", required=True, metavar="commande")
+
+    p = sub.add_parser("migrate", help="met le schéma à jour")
+    p.add_argument("--target", type=int, help="version cible (dernière par défaut)")
+    p.add_argument("-q", "--quiet", action="store_true")
+    p.set_defaults(func=cmd_migrate)
+
+    p = sub.add_parser("reset", help="supprime et recrée toutes les tables")
+    p.add_argument("-y", "--yes", action="store_true", help="sans confirmation (obligatoire hors terminal)")
+    p.add_argument("--seed", action="store_true", help="ajoute le jeu de démonstration")
+    p.set_defaults(func=cmd_reset)
+
+    p = sub.add_parser("seed", help="ajoute le jeu de démonstration si la base est vide")
+    p.set_defaults(func=cmd_seed)
+
+    p = sub.add_parser("rollup", help="recalcule les agrégats mensuels (tableau de bord) et les totaux des projets")
+    p.set_defaults(func=cmd_rollup)
+
+    p = sub.add_parser("import", help="importe des lignes budgétaires (CSV, XLSX)")
+    p.add_argument("path")
+    p.add_argument("--sheet", help="feuille XLSX (active par défaut)")
+    p.add_argument("--batch-size", type=int)
+    p.add_argument("--strict", action="store_true", help="code de retour 1 si des lignes sont ignorées")
+    p.add_argument("-q", "--quiet", action="store_true", help="sans affichage de progression")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="exporte le portefeuille (CSV, XLSX, Parquet)")
+    p.add_argument("path", help="fichier .xlsx, ou dossier pour csv / parquet")
+    p.add_argument("--format", help="csv, xlsx ou parquet (déduit de l'extension par défaut)")
+    p.add_argument("--dataset", action="append",
+                   help="projects, budget_lines, investments ou news (répétable ; tous par défaut)")
+    p.add_argument("-q", "--quiet", action="store_true", help="sans affichage de progression")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("summary", help="totaux CAPEX / OPEX")
+    p.add_argument("--project", metavar="CODE", help="un seul projet (portefeuille par défaut)")
+    p.add_argument("--by", choices=("month", "year"), help="ventilation par période de value_date")
+    p.set_defaults(func=cmd_summary)
+
+    p = sub.add_parser("projects", help="liste les projets")
+    p.add_argument("--text", help="sous-chaîne du code ou du nom")
+    p.add_argument("--status")
+    p.add_argument("--owner")
+    p.add_argument("--theme")
+    p.add_argument("--sort", default="created_at", help="created_at, code, name, owner, status, start_date, end_date")
+    p.add_argument("--desc", action="store_true")
+    p.add_argument("--limit", type=int, default=1000)
+    p.set_defaults(func=cmd_projects)
+
+    p = sub.add_parser("search", help="recherche plein texte (projets et news)")
+    p.add_argument("query")
+    p.add_argument("--limit", type=int, default=50)
+    p.set_defaults(func=cmd_search)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        _err("\nInterrompu.")
+        return 130
+    except Exception as e:
+        # Pas de trace complète pour les erreurs attendues (fichier, format, base)
+        _err(f"Erreur : {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
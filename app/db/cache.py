@@ -0,0 +1,131 @@
+"""Cache LRU des lectures unitaires du repo (projet, lignes budgétaires, news d'un projet).
+
+Clés (région, id) : ("project", id), ("budget_lines", project_id), ("news", project_id).
+Une même clé peut porter plusieurs entrées, une par jeu d'arguments
+supplémentaires (ex. chaque page de news) ; invalider la clé les retire
+toutes. Les fonctions d'écriture du repo invalident les clés touchées
+*après* leur commit ; les écritures hors repo (import en masse, reset)
+invalident une région entière ou tout le cache.
+
+Une lecture manquée qui croise une invalidation n'est pas mise en cache :
+elle a pu lire l'état d'avant l'écriture. La taille est bornée par
+DB_CACHE_ENTRIES (0 désactive le cache).
+"""
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Set, Tuple
+
+Key = Tuple[str, Hashable]
+# (région, id, arguments supplémentaires)
+EntryKey = Tuple[str, Hashable, Hashable]
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("DB_CACHE_ENTRIES", "512"))
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[EntryKey, Any]" = OrderedDict()
+        self._entries: Dict[Key, Set[EntryKey]] = {}  # clé -> ses entrées (invalidation)
+        self._lock = threading.Lock()
+        self._invalidations = 0  # compteur global, cf. get_or_load()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    def get_or_load(self, key: Key, load: Callable[[], Any], variant: Hashable = ()) -> Any:
+        region = key[0]
+        entry = (key[0], key[1], variant)
+        with self._lock:
+            value = self._data.get(entry, _MISSING)
+            if value is not _MISSING:
+                self._data.move_to_end(entry)
+                self._hits[region] = self._hits.get(region, 0) + 1
+                return value
+            self._misses[region] = self._misses.get(region, 0) + 1
+            seen = self._invalidations
+        value = load()
+        with self._lock:
+            if self.max_entries > 0 and seen == self._invalidations:
+                self._data[entry] = value
+                self._data.move_to_end(entry)
+                self._entries.setdefault(key, set()).add(entry)
+                while len(self._data) > self.max_entries:
+                    self._forget(self._data.popitem(last=False)[0])
+        return value
+
+    def _forget(self, entry: EntryKey) -> None:
+        key = entry[:2]
+        entries = self._entries.get(key)
+        if entries is not None:
+            entries.discard(entry)
+            if not entries:
+                del self._entries[key]
+
+    def invalidate(self, *keys: Key) -> None:
+        with self._lock:
+            self._invalidations += 1
+            for key in keys:
+                for entry in self._entries.pop(key, ()):
+                    self._data.pop(entry, None)
+
+    def invalidate_region(self, region: str) -> None:
+        with self._lock:
+            self._invalidations += 1
+            for key in [k for k in self._entries if k[0] == region]:
+                for entry in self._entries.pop(key):
+                    self._data.pop(entry, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += 1
+            self._data.clear()
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """{région: {hits, misses, entries}}."""
+        with self._lock:
+            regions = set(self._hits) | set(self._misses) | {k[0] for k in self._data}
+            return {
+                r: {
+                    "hits": self._hits.get(r, 0),
+                    "misses": self._misses.get(r, 0),
+                    "entries": sum(1 for k in self._data if k[0] == r),
+                }
+                for r in sorted(regions)
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+
+cache = LRUCache()
+
+
+def cached(region: str):
+    """Lecture en cache, clé (région, premier argument) ; les autres arguments
+    (valeurs par défaut comprises) distinguent les entrées d'une même clé."""
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def wrapper(entity_id, *args, **kwargs):
+            bound = signature.bind(entity_id, *args, **kwargs)
+            bound.apply_defaults()
+            variant = tuple(bound.arguments.items())[1:]
+            try:
+                hash(variant)
+            except TypeError:
+                return fn(entity_id, *args, **kwargs)  # argument non hachable : pas de cache
+            value = cache.get_or_load((region, entity_id), lambda: fn(entity_id, *args, **kwargs), variant)
+            # Copie de la liste : l'appelant peut la trier / la modifier sans toucher au cache
+            return list(value) if isinstance(value, list) else value
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
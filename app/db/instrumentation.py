@@ -0,0 +1,239 @@
+"""Instrumentation des requêtes SQL (optionnelle).
+
+Activée par DB_INSTRUMENT=1 (ou à chaud via enable()) : les événements
+before/after_cursor_execute du moteur mesurent chaque requête, et la
+fonction appelante (premier cadre app.* hors couche SQLAlchemy) est notée.
+Les statistiques sont agrégées par (requête, appelant) depuis le lancement.
+
+Sous SQLite, la connexion DBAPI utilise InstrumentedConnection (posée au
+démarrage par models.py) : ses curseurs comptent aussi les lignes lues et le
+temps de fetch d'un SELECT, clos au dernier fetch. Sans elle, seul le temps
+d'exécution et le rowcount (INSERT / UPDATE / DELETE) sont connus.
+
+Une requête plus lente que DB_SLOW_QUERY_MS (100 ms par défaut) est journalisée
+(logger app.db.slow_queries) avec son EXPLAIN QUERY PLAN.
+"""
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+log = logging.getLogger("app.db.slow_queries")
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+MAX_SLOW_QUERIES = 50
+
+# IN (?, ?, ?...) -> IN (?, …) : une seule entrée quelle que soit la taille de la liste
+_IN_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+_EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+_SKIPPED_MODULES = ("app.db.instrumentation",)
+
+
+@dataclass
+class QueryStat:
+    statement: str
+    caller: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    at: datetime
+    elapsed_ms: float
+    caller: str
+    statement: str
+    rows: Optional[int]
+    plan: List[str] = field(default_factory=list)
+
+
+_lock = threading.Lock()
+_stats: Dict[Tuple[str, str], QueryStat] = {}
+_slow: Deque[SlowQuery] = deque(maxlen=MAX_SLOW_QUERIES)
+_enabled = False
+_slow_ms = SLOW_QUERY_MS
+
+
+# --- Mesure ---
+def normalize(statement: str) -> str:
+    return _IN_LIST.sub("IN (?, …)", " ".join(statement.split()))
+
+def _caller() -> str:
+    """Premier cadre de l'application (app.*) au-dessus de SQLAlchemy."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        # get_session() : le flush / commit est imputé à la fonction repo qui l'a ouverte
+        if (module.startswith("app.") and not module.startswith(_SKIPPED_MODULES)
+                and frame.f_code.co_name != "get_session"):
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+def _explain(dbapi_conn, statement: str, parameters) -> List[str]:
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # Curseur brut : ni événements SQLAlchemy, ni comptage
+        cur = sqlite3.Cursor(dbapi_conn) if isinstance(dbapi_conn, sqlite3.Connection) else dbapi_conn.cursor()
+        try:
+            cur.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [str(row[-1]) for row in cur.fetchall()]
+        finally:
+            cur.close()
+    except Exception as e:
+        return [f"(plan indisponible : {e})"]
+
+def _record(statement: str, caller: str, elapsed_ms: float, rows: Optional[int],
+            dbapi_conn=None, parameters=None) -> None:
+    key = (normalize(statement), caller)
+    with _lock:
+        stat = _stats.get(key)
+        if stat is None:
+            stat = _stats[key] = QueryStat(*key)
+        stat.calls += 1
+        stat.total_ms += elapsed_ms
+        stat.max_ms = max(stat.max_ms, elapsed_ms)
+        stat.rows += rows or 0
+    if elapsed_ms >= _slow_ms:
+        plan = _explain(dbapi_conn, statement, parameters) if dbapi_conn is not None else []
+        _slow.append(SlowQuery(datetime.now(), elapsed_ms, caller, key[0], rows, plan))
+        log.warning("Requête lente (%.1f ms, %s, %s ligne(s)) : %s\n  %s",
+                    elapsed_ms, caller, "?" if rows is None else rows, key[0], "\n  ".join(plan))
+
+
+class _Pending:
+    """SELECT exécuté dont les lignes sont encore en cours de lecture."""
+    __slots__ = ("statement", "parameters", "caller", "elapsed_ms", "rows")
+
+    def __init__(self, statement, parameters, caller, elapsed_ms):
+        self.statement = statement
+        self.parameters = parameters
+        self.caller = caller
+        self.elapsed_ms = elapsed_ms
+        self.rows = 0
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    _pending: Optional[_Pending] = None
+
+    def _account(self, rows: int, started: float, done: bool) -> None:
+        pending = self._pending
+        if pending is None:
+            return
+        pending.elapsed_ms += (time.perf_counter() - started) * 1000
+        pending.rows += rows
+        if done:
+            self._finish()
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            _record(pending.statement, pending.caller, pending.elapsed_ms, pending.rows,
+                    self.connection, pending.parameters)
+
+    def fetchone(self):
+        t = time.perf_counter()
+        row = super().fetchone()
+        self._account(row is not None, t, row is None)
+        return row
+
+    def fetchmany(self, size: Optional[int] = None):
+        t = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._account(len(rows), t, not rows)
+        return rows
+
+    def fetchall(self):
+        t = time.perf_counter()
+        rows = super().fetchall()
+        self._account(len(rows), t, True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Fabrique de connexion sqlite3 (connect_args={"factory": ...})."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+# --- Événements moteur ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    caller = _caller()
+    if isinstance(cursor, InstrumentedCursor) and cursor.description is not None and not executemany:
+        # SELECT : la mesure se termine avec la lecture des lignes
+        cursor._finish()
+        cursor._pending = _Pending(statement, parameters, caller, elapsed_ms)
+        return
+    rowcount = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else None
+    if executemany:
+        _record(statement, caller, elapsed_ms, rowcount)
+    else:
+        _record(statement, caller, elapsed_ms, rowcount, getattr(cursor, "connection", None), parameters)
+
+
+# --- API ---
+def enable(engine, slow_ms: Optional[float] = None) -> None:
+    """Branche les événements sur `engine` (sans effet si déjà actif)."""
+    global _enabled, _slow_ms
+    if slow_ms is not None:
+        _slow_ms = float(slow_ms)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    _enabled = True
+
+def disable(engine) -> None:
+    global _enabled
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+    _enabled = False
+
+def is_enabled() -> bool:
+    return _enabled
+
+def slow_threshold_ms() -> float:
+    return _slow_ms
+
+def top_queries(n: int = 20, key: str = "total_ms") -> List[QueryStat]:
+    """Les n requêtes les plus coûteuses depuis le lancement (copies)."""
+    with _lock:
+        stats = [QueryStat(s.statement, s.caller, s.calls, s.total_ms, s.max_ms, s.rows) for s in _stats.values()]
+    return sorted(stats, key=lambda s: getattr(s, key), reverse=True)[:n]
+
+def slow_queries() -> List[SlowQuery]:
+    """Dernières requêtes lentes, de la plus récente à la plus ancienne."""
+    return list(reversed(_slow))
+
+def reset_stats() -> None:
+    with _lock:
+        _stats.clear()
+        _slow.clear()
@@ -0,0 +1,123 @@
+"""Magasin des images de projet : media/objects/, adressé par contenu (SHA-256).
+
+Chaque fichier choisi par l'utilisateur est recopié une seule fois, sous
+media/objects/<2 premiers caractères>/<sha256><extension> ; les projets
+stockent ce chemin relatif. Une même image jointe à plusieurs projets n'est
+donc présente qu'une fois, et les liens ne cassent plus si l'original bouge.
+
+La copie et le hachage se font en un seul passage, par blocs de CHUNK_SIZE
+(jamais le fichier entier en mémoire). Le contenu est identifié par son seul
+SHA-256 : le même fichier choisi sous deux extensions réutilise le premier
+chemin enregistré. media_objects tient un compteur de
+références par fichier (triggers sur project_images) ; collect_garbage()
+supprime les fichiers qui ne sont plus référencés.
+"""
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import engine, MediaObject
+
+MEDIA_DIR = Path("media")
+OBJECTS_DIR = MEDIA_DIR / "objects"
+CHUNK_SIZE = 1024 * 1024
+
+
+def object_path(sha256: str, suffix: str = "") -> Path:
+    return OBJECTS_DIR / sha256[:2] / f"{sha256}{suffix.lower()}"
+
+def is_managed(path: str) -> bool:
+    """Le chemin désigne-t-il déjà un fichier du magasin ?"""
+    try:
+        Path(path).resolve().relative_to(OBJECTS_DIR.resolve())
+    except ValueError:
+        return False
+    return True
+
+def _copy_hashed(source: Path) -> Tuple[str, str, int]:
+    """Recopie `source` dans un temporaire du magasin en le hachant ; renvoie (temporaire, sha256, taille)."""
+    OBJECTS_DIR.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp = tempfile.mkstemp(dir=OBJECTS_DIR, suffix=".tmp")
+    try:
+        with open(source, "rb") as src, os.fdopen(fd, "wb") as dst:
+            while True:
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                dst.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return tmp, digest.hexdigest(), size
+
+def _place(tmp: str, target: Path) -> None:
+    """Installe le temporaire en `target`, sauf si le fichier y est déjà."""
+    if target.exists():
+        os.unlink(tmp)  # contenu déjà présent : dédoublonné
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, target)
+
+def ingest(session, paths: Optional[Iterable[str]]) -> List[str]:
+    """Chemins à enregistrer pour `paths` : fichiers recopiés dans le magasin.
+
+    Les chemins déjà gérés, et ceux dont le fichier n'existe plus, sont
+    conservés tels quels. Pour un contenu déjà connu, c'est le chemin de la
+    ligne media_objects existante qui est renvoyé (quelle que soit
+    l'extension du fichier choisi) : un contenu = un fichier = une ligne.
+
+    La ligne est écrite (upsert) avant d'installer le fichier : la transaction
+    de `session` tient alors le verrou d'écriture, et collect_garbage() ne peut
+    plus supprimer ce fichier avant qu'elle ne soit validée, triggers de
+    project_images compris.
+    """
+    result = []
+    for path in paths or []:
+        if not path or is_managed(path) or not Path(path).is_file():
+            result.append(path)
+            continue
+        source = Path(path)
+        tmp, sha256, size = _copy_hashed(source)
+        try:
+            stmt = sqlite_insert(MediaObject).values(
+                sha256=sha256, path=object_path(sha256, source.suffix).as_posix(), size=size, refcount=0,
+            )
+            stored = session.execute(
+                stmt.on_conflict_do_update(index_elements=[MediaObject.sha256], set_={"size": stmt.excluded.size})
+                .returning(MediaObject.path)
+            ).scalar_one()
+            # Fichier recréé s'il manque (suppression interrompue par collect_garbage)
+            _place(tmp, Path(stored))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        result.append(stored)
+    return result
+
+def collect_garbage() -> int:
+    """Supprime les fichiers qui ne sont plus référencés ; renvoie leur nombre.
+
+    Sélection et suppression tiennent en une instruction (DELETE … RETURNING) :
+    le verrou d'écriture est pris avant de lire les refcount, et seuls les
+    fichiers des lignes effectivement supprimées sont effacés. Un ingest()
+    ou un project_images concurrent ne peut donc pas perdre son fichier.
+    Les fichiers sont effacés avant la validation, verrou tenu ; un échec de
+    celle-ci laisse au pire des lignes à refcount nul sans fichier,
+    supprimées au passage suivant ou recréées par ingest().
+    """
+    with engine.begin() as conn:
+        paths = conn.execute(
+            delete(MediaObject).where(MediaObject.refcount <= 0).returning(MediaObject.path)
+        ).scalars().all()
+        for path in paths:
+            Path(path).unlink(missing_ok=True)
+    return len(paths)
@@ -0,0 +1,228 @@
+"""Migrations de schéma versionnées.
+
+La version courante est stockée dans la table `schema_version` (une ligne).
+Au démarrage, `upgrade()` lit cette version : si elle vaut `HEAD`, c'est la
+seule requête exécutée. Sinon chaque migration en attente tourne dans sa
+propre transaction et la version est avancée juste après, de sorte qu'une
+interruption reprend à la migration suivante.
+
+Les migrations sont idempotentes (IF NOT EXISTS, vérification des colonnes),
+ce qui permet de les rejouer sur une base créée avant le versionnage.
+Les migrations lourdes sur de grosses tables découpent leur travail :
+un index par transaction, et des lots de lignes pour les recopies de données.
+"""
+import json
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column, Integer, MetaData, Table, and_, inspect, insert, null, or_, select,
+    text, type_coerce, update, String,
+)
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from .cache import cache
+from .models import (
+    Base, engine as default_engine, create_fulltext, create_media_triggers, rebuild_project_totals, TOTALS_COLUMNS,
+    Project, BudgetLine, ProjectNews, Investment, ProjectTheme, ProjectImage, MediaObject, MonthlyRollup,
+)
+from . import rollup
+
+_version_meta = MetaData()
+schema_version = Table(
+    "schema_version", _version_meta,
+    Column("version", Integer, nullable=False),
+)
+
+# Taille des lots pour les recopies de données
+BATCH_SIZE = 500
+
+
+# --- Helpers ---
+def _create_table(conn: Connection, model) -> None:
+    model.__table__.create(bind=conn, checkfirst=True)
+
+def _create_index(conn: Connection, model, name: str) -> None:
+    index = next(i for i in model.__table__.indexes if i.name == name)
+    index.create(bind=conn, checkfirst=True)
+
+def _has_column(conn: Connection, table: str, column: str) -> bool:
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+# --- Migrations (version, description, fonction) ---
+# Chaque fonction reçoit le moteur : elle gère elle-même ses transactions
+# (une seule pour les migrations courtes, une par lot ou par index sinon).
+Migration = Tuple[int, str, Callable[[Engine], None]]
+
+def _m1_initial(eng: Engine) -> None:
+    with eng.begin() as conn:
+        for model in (Project, BudgetLine, ProjectNews):
+            _create_table(conn, model)
+
+def _index_migration(model, *names: str) -> Callable[[Engine], None]:
+    def run(eng: Engine) -> None:
+        # Un index par transaction : sur une grosse table, chaque CREATE INDEX
+        # est long, et l'avancement déjà fait n'est pas perdu en cas d'arrêt
+        for name in names:
+            with eng.begin() as conn:
+                _create_index(conn, model, name)
+    return run
+
+def _m4_child_tables(eng: Engine) -> None:
+    with eng.begin() as conn:
+        for model in (Investment, ProjectTheme, ProjectImage):
+            _create_table(conn, model)
+
+def _legacy_json_present(column):
+    # JSON None est stocké 'null' quand il est passé explicitement
+    return and_(column.is_not(None), type_coerce(column, String) != "null")
+
+def _json_list(raw) -> list:
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    if isinstance(raw, dict):
+        return [raw]
+    return raw if isinstance(raw, list) else []
+
+def migrate_json_columns(eng: Engine, batch_size: int = BATCH_SIZE) -> int:
+    """Déplace investissement / themes / images (JSON) vers leurs tables, par lots.
+
+    Un lot par transaction ; les colonnes migrées sont remises à NULL, ce qui
+    rend la recopie reprenable. Retourne le nombre de projets migrés.
+    """
+    pending = or_(
+        _legacy_json_present(Project.legacy_investissement),
+        _legacy_json_present(Project.legacy_themes),
+        _legacy_json_present(Project.legacy_images),
+    )
+    migrated = 0
+    last_id = 0
+    while True:
+        with eng.begin() as conn:
+            rows = conn.execute(
+                select(Project.id, Project.legacy_investissement, Project.legacy_themes, Project.legacy_images)
+                .where(pending, Project.id > last_id)
+                .order_by(Project.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                return migrated
+            investments, themes, images = [], [], []
+            for pid, inv_raw, themes_raw, images_raw in rows:
+                for inv in filter(None, map(Investment.from_dict, _json_list(inv_raw))):
+                    investments.append({"project_id": pid, "montant": inv.montant,
+                                        "date": inv.date, "duree_mois": inv.duree_mois})
+                names = dict.fromkeys(str(t).strip() for t in _json_list(themes_raw) if str(t).strip())
+                themes.extend({"project_id": pid, "theme": t, "position": i} for i, t in enumerate(names))
+                paths = [p for p in _json_list(images_raw) if isinstance(p, str) and p]
+                images.extend({"project_id": pid, "path": p, "position": i} for i, p in enumerate(paths))
+            if investments:
+                conn.execute(insert(Investment), investments)
+            if themes:
+                conn.execute(insert(ProjectTheme), themes)
+            if images:
+                conn.execute(insert(ProjectImage), images)
+            ids = [r.id for r in rows]
+            conn.execute(
+                update(Project.__table__).where(Project.__table__.c.id.in_(ids)).values({
+                    "investissement": null(), "themes": null(), "images": null(),
+                })
+            )
+            migrated += len(rows)
+            last_id = ids[-1]
+
+def _m6_fulltext(eng: Engine) -> None:
+    if eng.dialect.name != "sqlite":
+        return
+    with eng.begin() as conn:
+        create_fulltext(conn)
+
+def _m7_project_team(eng: Engine) -> None:
+    with eng.begin() as conn:
+        if not _has_column(conn, "projects", "team"):
+            conn.execute(text("ALTER TABLE projects ADD COLUMN team JSON"))
+
+def _m9_media_store(eng: Engine) -> None:
+    with eng.begin() as conn:
+        _create_table(conn, MediaObject)
+        if eng.dialect.name == "sqlite":
+            create_media_triggers(conn)
+
+def _m10_monthly_rollup(eng: Engine) -> None:
+    with eng.begin() as conn:
+        _create_table(conn, MonthlyRollup)
+        rollup.rebuild(conn)
+
+def _m11_project_totals(eng: Engine) -> None:
+    with eng.begin() as conn:
+        for column in TOTALS_COLUMNS:
+            if not _has_column(conn, "projects", column):
+                conn.execute(text(f"ALTER TABLE projects ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+        rebuild_project_totals(conn)
+
+
+MIGRATIONS: List[Migration] = [
+    (1, "tables initiales", _m1_initial),
+    (2, "index de la liste des projets", _index_migration(
+        Project, "ix_projects_created_at_id", "ix_projects_name", "ix_projects_owner",
+        "ix_projects_status", "ix_projects_start_date", "ix_projects_end_date",
+    )),
+    (3, "index des lignes budgétaires", _index_migration(
+        BudgetLine, "ix_budget_lines_project_id", "ix_budget_lines_value_date",
+    )),
+    (4, "tables investments / project_themes / project_images", _m4_child_tables),
+    (5, "recopie des colonnes JSON", migrate_json_columns),
+    (6, "recherche plein texte", _m6_fulltext),
+    (7, "projects.team", _m7_project_team),
+    (8, "index des actualités", _index_migration(ProjectNews, "ix_project_news_project_created")),
+    (9, "magasin media/ (media_objects)", _m9_media_store),
+    (10, "agrégats mensuels (monthly_rollup)", _m10_monthly_rollup),
+    (11, "totaux budgétaires sur projects", _m11_project_totals),
+]
+
+HEAD = MIGRATIONS[-1][0]
+
+
+# --- Exécution ---
+def current_version(eng: Engine = default_engine) -> Optional[int]:
+    """Version du schéma, ou None si la base n'est pas encore versionnée."""
+    try:
+        with eng.connect() as conn:
+            return conn.execute(select(schema_version.c.version)).scalar()
+    except OperationalError:
+        return None
+
+def _set_version(eng: Engine, version: int) -> None:
+    with eng.begin() as conn:
+        conn.execute(schema_version.delete())
+        conn.execute(schema_version.insert().values(version=version))
+
+def upgrade(eng: Engine = default_engine, target: int = HEAD,
+            progress: Optional[Callable[[int, str], None]] = None) -> int:
+    """Applique les migrations en attente jusqu'à `target` ; retourne la version atteinte."""
+    version = current_version(eng)
+    if version is not None and version >= target:
+        return version
+    if version is None:
+        _version_meta.create_all(bind=eng)
+        version = 0
+    for number, description, run in MIGRATIONS:
+        if number <= version or number > target:
+            continue
+        if progress:
+            progress(number, description)
+        run(eng)
+        _set_version(eng, number)
+        version = number
+    return version
+
+def reset(eng: Engine = default_engine) -> int:
+    """Supprime toutes les tables puis reconstruit le schéma à HEAD."""
+    Base.metadata.drop_all(bind=eng)
+    _version_meta.drop_all(bind=eng)
+    cache.clear()
+    return upgrade(eng)
@@ -1,33 +1,100 @@
 import os
+import json
 from datetime import date
-from typing import Optional
+from typing import Dict, List, Optional
 
 from sqlalchemy import (
     create_engine, Column, Integer, String, Date, Text, Boolean, ForeignKey,
-    DateTime, func, UniqueConstraint, Float, JSON
+    DateTime, func, UniqueConstraint, Float, JSON, Index, event, text, bindparam
 )
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.orm import declarative_base, sessionmaker, relationship, attributes
+from sqlalchemy.pool import QueuePool, StaticPool
 from dotenv import load_dotenv
 
 load_dotenv()
 
 DB_URL = os.getenv("DB_URL", "sqlite:///./media/app.db")
 
-# Pour SQLite + threads (Qt), on force check_same_thread=False
+# --- Profil SQLite (surchargeable dans .env) ---
+# WAL : les lectures des workers ne bloquent pas l'écrivain (et inversement) ;
+# synchronous=NORMAL suffit en WAL (pas de corruption, au pire la dernière
+# transaction perdue sur coupure de courant).
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+    "cache_size": -int(os.getenv("DB_CACHE_SIZE_KB", "65536")),      # négatif = en Kio
+    "mmap_size": int(os.getenv("DB_MMAP_SIZE_MB", "256")) * 1024 * 1024,
+    "temp_store": os.getenv("DB_TEMP_STORE", "MEMORY"),
+    "busy_timeout": int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    "foreign_keys": "ON",  # requis par les ondelete="CASCADE"
+}
+
+# Instrumentation des requêtes (cf. app.db.instrumentation) et écho SQL
+DB_INSTRUMENT = os.getenv("DB_INSTRUMENT", "0").lower() in ("1", "true", "yes", "on")
+DB_ECHO = os.getenv("DB_ECHO", "0").lower() in ("1", "true", "yes", "on")
+
+IS_SQLITE = DB_URL.startswith("sqlite")
+IS_SQLITE_MEMORY = IS_SQLITE and (DB_URL in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in DB_URL)
+
+def _engine_options() -> dict:
+    opts = {}
+    if IS_SQLITE:
+        # Pour SQLite + threads (Qt), on force check_same_thread=False
+        opts["connect_args"] = {"check_same_thread": False}
+        if DB_INSTRUMENT:
+            # Curseurs qui comptent lignes lues et temps de fetch des SELECT
+            from .instrumentation import InstrumentedConnection
+            opts["connect_args"]["factory"] = InstrumentedConnection
+        if IS_SQLITE_MEMORY:
+            # Une base mémoire n'existe que dans sa connexion : on la partage
+            opts["poolclass"] = StaticPool
+        else:
+            # Une connexion par thread actif : GUI + lecteurs + écrivain du DbExecutor
+            opts["poolclass"] = QueuePool
+            opts["pool_size"] = int(os.getenv("DB_POOL_SIZE", "4"))
+            opts["max_overflow"] = int(os.getenv("DB_POOL_OVERFLOW", "4"))
+    return opts
+
 engine = create_engine(
     DB_URL,
-    echo=False,
+    echo=DB_ECHO,
     future=True,
-    connect_args={"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
+    # JSON lisible en base (accents non échappés) : indexable par FTS5
+    json_serializer=lambda obj: json.dumps(obj, ensure_ascii=False),
+    **_engine_options()
 )
 
+if DB_INSTRUMENT:
+    from .instrumentation import enable as _enable_instrumentation
+    _enable_instrumentation(engine)
+
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _apply_sqlite_pragmas(dbapi_conn, _record) -> None:
+        cur = dbapi_conn.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            if IS_SQLITE_MEMORY and name == "journal_mode":
+                continue
+            cur.execute(f"PRAGMA {name} = {value}")
+        cur.close()
+
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True, expire_on_commit=False)
 Base = declarative_base()
 
 
 class Project(Base):
     __tablename__ = "projects"
-    __table_args__ = (UniqueConstraint("code", name="uq_project_code"),)
+    __table_args__ = (
+        UniqueConstraint("code", name="uq_project_code"),  # sert aussi d'index de tri sur code
+        # Tri / filtres / pagination keyset de la liste des projets
+        # (l'id, alias du rowid, termine implicitement chaque index SQLite)
+        Index("ix_projects_created_at_id", "created_at", "id"),
+        Index("ix_projects_name", "name"),
+        Index("ix_projects_owner", "owner"),
+        Index("ix_projects_status", "status"),
+        Index("ix_projects_start_date", "start_date"),
+        Index("ix_projects_end_date", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True)
     code = Column(String(32), nullable=False)
@@ -45,21 +112,183 @@ class Project(Base):
     subvention_montant = Column(Float, nullable=True)
     amortissement = Column(Boolean, nullable=False, default=False)
 
-    investissement = Column(JSON, nullable=True)  # dict {montant, date, duree_mois}
-    themes = Column(JSON, nullable=True)          # liste de str
-    images = Column(JSON, nullable=True)          # liste de chemins
+    # Anciennes colonnes JSON : vidées par repo.migrate_json_columns(), remplacées
+    # par les tables investments / project_themes / project_images
+    legacy_investissement = Column("investissement", JSON, nullable=True)
+    legacy_themes = Column("themes", JSON, nullable=True)
+    legacy_images = Column("images", JSON, nullable=True)
+
+    team = Column(JSON, nullable=True)            # dict {rôle: effectif}
+
+    # Totaux des lignes budgétaires, tenus à jour à chaque flush (cf. _track_budget_totals)
+    capex_cents = Column(Integer, nullable=False, default=0, server_default="0")
+    opex_cents = Column(Integer, nullable=False, default=0, server_default="0")
+    budget_line_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    budget_lines = relationship("BudgetLine", back_populates="project", cascade="all, delete-orphan")
+    # passive_deletes : la suppression des enfants est laissée au ON DELETE CASCADE
+    # de SQLite (foreign_keys=ON) au lieu de les charger pour les supprimer un à un
+    budget_lines = relationship("BudgetLine", back_populates="project", cascade="all, delete-orphan",
+                                passive_deletes=True)
+    investments = relationship("Investment", cascade="all, delete-orphan", order_by="Investment.id",
+                               passive_deletes=True)
+    theme_rows = relationship("ProjectTheme", cascade="all, delete-orphan", order_by="ProjectTheme.position",
+                              passive_deletes=True)
+    image_rows = relationship("ProjectImage", cascade="all, delete-orphan", order_by="ProjectImage.position",
+                              passive_deletes=True)
+
+    # Vues « à plat » gardant l'ancienne forme (liste de dicts / de str) pour l'UI.
+    # Sur un objet détaché, les relations doivent avoir été chargées (selectinload).
+    @property
+    def investissement(self) -> list:
+        return [inv.to_dict() for inv in self.investments]
+
+    @investissement.setter
+    def investissement(self, value) -> None:
+        if isinstance(value, dict):
+            value = [value]
+        self.investments = [inv for inv in map(Investment.from_dict, value or []) if inv is not None]
+
+    @property
+    def themes(self) -> list:
+        return [t.theme for t in self.theme_rows]
+
+    @themes.setter
+    def themes(self, value) -> None:
+        self.theme_rows = [ProjectTheme(theme=t, position=i) for i, t in enumerate(theme_names(value))]
+
+    @property
+    def images(self) -> list:
+        return [img.path for img in self.image_rows]
+
+    @images.setter
+    def images(self, value) -> None:
+        self.image_rows = [ProjectImage(path=p, position=i) for i, p in enumerate(value or []) if p]
 
     def __repr__(self) -> str:
         return f"<Project id={self.id} code={self.code} name={self.name!r}>"
 
 
+def theme_names(value) -> list:
+    """Thèmes nettoyés, sans doublon, dans l'ordre de saisie."""
+    return list(dict.fromkeys(t.strip() for t in (value or []) if t and t.strip()))
+
+def ym_to_date(value) -> Optional[date]:
+    """'YYYY-MM' / 'YYYY-MM-DD' -> 1er jour du mois."""
+    if isinstance(value, date):
+        return value.replace(day=1)
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return date(int(value[:4]), int(value[5:7]), 1)
+    except ValueError:
+        return None
+
+
+class Investment(Base):
+    __tablename__ = "investments"
+    __table_args__ = (
+        Index("ix_investments_project_id", "project_id"),
+        Index("ix_investments_date", "date"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    montant = Column(Float, nullable=False)
+    date = Column(Date, nullable=False)              # mois d'achat (1er du mois)
+    duree_mois = Column(Integer, nullable=False)     # durée d'amortissement
+
+    @classmethod
+    def from_dict(cls, data: dict) -> Optional["Investment"]:
+        """{montant, date 'YYYY-MM', duree_mois} -> Investment ; None si incomplet."""
+        if not isinstance(data, dict):
+            return None
+        d = ym_to_date(data.get("date"))
+        try:
+            montant = float(data.get("montant") or 0)
+            duree = int(data.get("duree_mois") or 0)
+        except (TypeError, ValueError):
+            return None
+        if d is None or montant <= 0 or duree <= 0:
+            return None
+        return cls(montant=montant, date=d, duree_mois=duree)
+
+    def to_dict(self) -> dict:
+        return {"montant": self.montant, "date": self.date.strftime("%Y-%m"), "duree_mois": self.duree_mois}
+
+    def __repr__(self) -> str:
+        return f"<Investment id={self.id} {self.montant}€ {self.date} {self.duree_mois}m>"
+
+
+class ProjectTheme(Base):
+    __tablename__ = "project_themes"
+    __table_args__ = (
+        # « tous les projets du thème X »
+        Index("ix_project_themes_theme", "theme"),
+    )
+
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    theme = Column(String(128), primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
+
+
+class ProjectImage(Base):
+    __tablename__ = "project_images"
+    __table_args__ = (
+        Index("ix_project_images_project_id", "project_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
+    path = Column(Text, nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+
+
+class MonthlyRollup(Base):
+    """Agrégats du portefeuille par (mois, état du projet), tenus à jour par app.db.rollup.
+
+    month = 'YYYY-MM' ('' : lignes sans date de valeur / projets sans début).
+    Projets actifs au mois m = Σ projects_started jusqu'à m − Σ projects_ended avant m.
+    """
+    __tablename__ = "monthly_rollup"
+
+    month = Column(String(7), primary_key=True)
+    status = Column(String(64), primary_key=True)   # '' si état vide
+    capex_cents = Column(Integer, nullable=False, default=0)
+    opex_cents = Column(Integer, nullable=False, default=0)
+    line_count = Column(Integer, nullable=False, default=0)
+    subvention_cents = Column(Integer, nullable=False, default=0)  # au mois de début du projet
+    projects_started = Column(Integer, nullable=False, default=0)
+    projects_ended = Column(Integer, nullable=False, default=0)    # au mois de fin (actif ce mois-là)
+
+
+class MediaObject(Base):
+    """Fichier du magasin media/ (cf. app.db.media), partagé par toutes les images de même contenu.
+
+    refcount = nombre de lignes project_images qui pointent sur `path` ; tenu
+    à jour par des triggers (y compris ON DELETE CASCADE et écritures Core).
+    """
+    __tablename__ = "media_objects"
+    __table_args__ = (
+        Index("ix_media_objects_refcount", "refcount"),
+    )
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(Text, nullable=False, unique=True)   # ex. media/objects/ab/ab12….jpg
+    size = Column(Integer, nullable=False)
+    refcount = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
 class BudgetLine(Base):
     __tablename__ = "budget_lines"
+    __table_args__ = (
+        # Agrégats par projet (GROUP BY project_id) et par période
+        Index("ix_budget_lines_project_id", "project_id"),
+        Index("ix_budget_lines_value_date", "value_date"),
+    )
 
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
@@ -78,10 +307,200 @@ class BudgetLine(Base):
         sign = "-" if (self.amount_cents or 0) < 0 else ""
         return f"<BudgetLine id={self.id} {sign}{abs(self.amount_cents)}c {self.label!r}>"
 
+# --- Totaux budgétaires en cache sur projects ---
+# Après chaque flush ORM, les BudgetLine insérées, modifiées ou supprimées
+# donnent des deltas appliqués à projects.capex_cents / opex_cents /
+# budget_line_count dans la même transaction. Les écritures Core (import en
+# masse) appellent apply_project_totals() elles-mêmes.
+TOTALS_COLUMNS = ("capex_cents", "opex_cents", "budget_line_count")
+TotalsDeltas = Dict[int, List[int]]  # project_id -> [capex, opex, nombre de lignes]
+
+def add_line_to_totals(deltas: TotalsDeltas, project_id: Optional[int], amount_cents: Optional[int],
+                       is_capex: bool, sign: int = 1) -> None:
+    if project_id is None:
+        return
+    d = deltas.setdefault(project_id, [0, 0, 0])
+    d[0 if is_capex else 1] += sign * (amount_cents or 0)
+    d[2] += sign
+
+def apply_project_totals(conn, deltas: TotalsDeltas) -> None:
+    rows = [{"pid": pid, "d_capex": c, "d_opex": o, "d_count": n} for pid, (c, o, n) in deltas.items() if c or o or n]
+    if not rows:
+        return
+    t = Project.__table__
+    conn.execute(
+        t.update().where(t.c.id == bindparam("pid")).values(
+            capex_cents=t.c.capex_cents + bindparam("d_capex"),
+            opex_cents=t.c.opex_cents + bindparam("d_opex"),
+            budget_line_count=t.c.budget_line_count + bindparam("d_count"),
+            updated_at=t.c.updated_at,  # pas une modification du projet : onupdate neutralisé
+        ),
+        rows,
+    )
+
+def rebuild_project_totals(connection) -> None:
+    """Recalcule les totaux de tous les projets depuis budget_lines."""
+    connection.execute(text(
+        "UPDATE projects SET "
+        "capex_cents = (SELECT coalesce(sum(CASE WHEN b.is_capex THEN b.amount_cents ELSE 0 END), 0) "
+        "FROM budget_lines b WHERE b.project_id = projects.id), "
+        "opex_cents = (SELECT coalesce(sum(CASE WHEN b.is_capex THEN 0 ELSE b.amount_cents END), 0) "
+        "FROM budget_lines b WHERE b.project_id = projects.id), "
+        "budget_line_count = (SELECT count(*) FROM budget_lines b WHERE b.project_id = projects.id)"
+    ))
+
+def _before_change(obj, key):
+    history = attributes.get_history(obj, key)
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, key)
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_budget_totals(session, flush_context) -> None:
+    # after_flush : new / dirty / deleted et l'historique des attributs reflètent encore le flush
+    deltas: TotalsDeltas = {}
+    for obj in session.new:
+        if isinstance(obj, BudgetLine):
+            add_line_to_totals(deltas, obj.project_id, obj.amount_cents, obj.is_capex)
+    for obj in session.dirty:
+        if isinstance(obj, BudgetLine) and session.is_modified(obj):
+            add_line_to_totals(deltas, _before_change(obj, "project_id"), _before_change(obj, "amount_cents"),
+                               _before_change(obj, "is_capex"), -1)
+            add_line_to_totals(deltas, obj.project_id, obj.amount_cents, obj.is_capex)
+    for obj in session.deleted:
+        if isinstance(obj, BudgetLine):
+            add_line_to_totals(deltas, obj.project_id, obj.amount_cents, obj.is_capex, -1)
+    if not deltas:
+        return
+    apply_project_totals(session.connection(), deltas)
+    # Projets déjà chargés dans la session : valeurs alignées sans relecture
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Project) and obj.id in deltas:
+            for key, delta in zip(TOTALS_COLUMNS, deltas[obj.id]):
+                if key in obj.__dict__:
+                    attributes.set_committed_value(obj, key, obj.__dict__[key] + delta)
+
+
 class ProjectNews(Base):
     __tablename__ = "project_news"
+    __table_args__ = (
+        # Fil d'actualités d'un projet, du plus récent au plus ancien, paginé par (created_at, id)
+        Index("ix_project_news_project_created", "project_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     project_id = Column(Integer, ForeignKey("projects.id", ondelete="CASCADE"), nullable=False)
     text = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+# --- Recherche plein texte (SQLite FTS5) ---
+# projects_fts stocke sa propre copie du texte (rowid = id projet) : les thèmes
+# viennent de project_themes, et une ligne se reconstruit entièrement par
+# DELETE + INSERT ... SELECT, sans avoir à fournir les anciennes valeurs.
+# news_fts reste à contenu externe sur project_news. Des triggers tiennent les
+# deux index à jour, y compris pour les écritures Core hors ORM.
+PROJECT_FTS_COLUMNS = ("code", "name", "description", "deliverables", "themes")
+
+_PROJECT_FTS_REFRESH = (
+    "DELETE FROM projects_fts WHERE rowid = {pid}; "
+    "INSERT INTO projects_fts(rowid, code, name, description, deliverables, themes) "
+    "SELECT p.id, p.code, p.name, p.description, p.deliverables, "
+    "(SELECT group_concat(t.theme, ' ') FROM project_themes t WHERE t.project_id = p.id) "
+    "FROM projects p WHERE p.id = {pid};"
+)
+
+def _fts_ddl() -> list:
+    cols = ", ".join(PROJECT_FTS_COLUMNS)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS projects_fts USING fts5("
+        f"{cols}, tokenize='unicode61 remove_diacritics 2')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5("
+        "text, content='project_news', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        # projects
+        "CREATE TRIGGER IF NOT EXISTS projects_fts_ai AFTER INSERT ON projects BEGIN "
+        + _PROJECT_FTS_REFRESH.format(pid="new.id") + " END",
+        "CREATE TRIGGER IF NOT EXISTS projects_fts_ad AFTER DELETE ON projects BEGIN "
+        "DELETE FROM projects_fts WHERE rowid = old.id; END",
+        "CREATE TRIGGER IF NOT EXISTS projects_fts_au AFTER UPDATE OF code, name, description, deliverables "
+        "ON projects BEGIN " + _PROJECT_FTS_REFRESH.format(pid="new.id") + " END",
+        # project_themes
+        "CREATE TRIGGER IF NOT EXISTS project_themes_fts_ai AFTER INSERT ON project_themes BEGIN "
+        + _PROJECT_FTS_REFRESH.format(pid="new.project_id") + " END",
+        "CREATE TRIGGER IF NOT EXISTS project_themes_fts_ad AFTER DELETE ON project_themes BEGIN "
+        + _PROJECT_FTS_REFRESH.format(pid="old.project_id") + " END",
+        # project_news
+        "CREATE TRIGGER IF NOT EXISTS news_fts_ai AFTER INSERT ON project_news BEGIN "
+        "INSERT INTO news_fts(rowid, text) VALUES (new.id, new.text); END",
+        "CREATE TRIGGER IF NOT EXISTS news_fts_ad AFTER DELETE ON project_news BEGIN "
+        "INSERT INTO news_fts(news_fts, rowid, text) VALUES ('delete', old.id, old.text); END",
+        "CREATE TRIGGER IF NOT EXISTS news_fts_au AFTER UPDATE OF text ON project_news BEGIN "
+        "INSERT INTO news_fts(news_fts, rowid, text) VALUES ('delete', old.id, old.text); "
+        "INSERT INTO news_fts(rowid, text) VALUES (new.id, new.text); END",
+    ]
+
+def _drop_legacy_project_fts(connection) -> None:
+    """Première version : projects_fts à contenu externe sur projects.themes (JSON)."""
+    sql = connection.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'projects_fts'"
+    )).scalar()
+    if sql and "content='projects'" in sql:
+        for trigger in ("projects_fts_ai", "projects_fts_ad", "projects_fts_au"):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        connection.execute(text("DROP TABLE projects_fts"))
+
+def create_fulltext(connection) -> None:
+    """Crée les index FTS5 (et les remplit s'ils n'existaient pas encore)."""
+    _drop_legacy_project_fts(connection)
+    existing = set(connection.execute(text(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('projects_fts', 'news_fts')"
+    )).scalars())
+    for ddl in _fts_ddl():
+        connection.execute(text(ddl))
+    if "projects_fts" not in existing:
+        rebuild_project_fts(connection)
+    if "news_fts" not in existing:
+        connection.execute(text("INSERT INTO news_fts(news_fts) VALUES ('rebuild')"))
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_fts(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        create_fulltext(connection)
+        create_media_triggers(connection)
+
+def rebuild_project_fts(connection) -> None:
+    connection.execute(text("DELETE FROM projects_fts"))
+    connection.execute(text(
+        "INSERT INTO projects_fts(rowid, code, name, description, deliverables, themes) "
+        "SELECT p.id, p.code, p.name, p.description, p.deliverables, "
+        "(SELECT group_concat(t.theme, ' ') FROM project_themes t WHERE t.project_id = p.id) "
+        "FROM projects p"
+    ))
+
+# --- Compteurs de références du magasin media/ ---
+_MEDIA_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS project_images_media_ai AFTER INSERT ON project_images BEGIN "
+    "UPDATE media_objects SET refcount = refcount + 1 WHERE path = new.path; END",
+    "CREATE TRIGGER IF NOT EXISTS project_images_media_ad AFTER DELETE ON project_images BEGIN "
+    "UPDATE media_objects SET refcount = refcount - 1 WHERE path = old.path; END",
+    "CREATE TRIGGER IF NOT EXISTS project_images_media_au AFTER UPDATE OF path ON project_images BEGIN "
+    "UPDATE media_objects SET refcount = refcount - 1 WHERE path = old.path; "
+    "UPDATE media_objects SET refcount = refcount + 1 WHERE path = new.path; END",
+]
+
+def create_media_triggers(connection) -> None:
+    for ddl in _MEDIA_TRIGGERS:
+        connection.execute(text(ddl))
+    # Recalcul complet : le magasin a pu être rempli avant les triggers
+    connection.execute(text(
+        "UPDATE media_objects SET refcount = "
+        "(SELECT count(*) FROM project_images i WHERE i.path = media_objects.path)"
+    ))
+
+@event.listens_for(Base.metadata, "before_drop")
+def _drop_fts(target, connection, **kw) -> None:
+    if connection.dialect.name != "sqlite":
+        return
+    # Les triggers disparaissent avec leurs tables
+    connection.execute(text("DROP TABLE IF EXISTS projects_fts"))
+    connection.execute(text("DROP TABLE IF EXISTS news_fts"))
@@ -1,16 +1,31 @@
 from contextlib import contextmanager
-from typing import Optional, List
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional, List, NamedTuple, Tuple
 from datetime import date, datetime
 
+import json
+import re
+
+from sqlalchemy import (
+    select, insert, update, delete, func, tuple_, type_coerce, String, DateTime, and_, or_, text, bindparam,
+    literal, null, union_all,
+)
+from sqlalchemy.orm import selectinload, joinedload
+
 from .models import (
-    SessionLocal, Base, engine,
-    Project, BudgetLine, ProjectNews
+    SessionLocal, engine,
+    Project, BudgetLine, ProjectNews, ProjectTheme, ProjectImage, Investment, theme_names,
+    rebuild_project_totals as _rebuild_project_totals,
 )
+from .migrations import upgrade
+from .cache import cache, cached
+from . import media, rollup
 
 # --- Initialisation DB ---
 def init_db() -> None:
-    """Crée les tables si absentes."""
-    Base.metadata.create_all(bind=engine)
+    """Met le schéma à jour (une simple lecture de version s'il est à jour)."""
+    upgrade(engine)
 
 # --- Session ---
 @contextmanager
@@ -37,6 +52,7 @@ def create_project(code: str, name: str, owner: Optional[str] = None,
                    themes: Optional[list] = None,
                    images: Optional[list] = None, team: Optional[dict] = None) -> Project:
     with get_session() as s:
+        images = media.ingest(s, images)
         p = Project(
             code=code,
             name=name,
@@ -58,38 +74,410 @@ def create_project(code: str, name: str, owner: Optional[str] = None,
         )
         s.add(p)
         s.flush()
-        return p
+        deltas = rollup.new_deltas()
+        rollup.add_project(deltas, status, start_date, end_date, subvention, subvention_montant)
+        rollup.apply(s, deltas)
+    cache.invalidate(("project", p.id))
+    return p
+
+# Enfants nécessaires aux vues investissement / thèmes / images d'un Project détaché
+PROJECT_CHILDREN = (
+    selectinload(Project.investments),
+    selectinload(Project.theme_rows),
+    selectinload(Project.image_rows),
+)
 
 def list_projects() -> List[Project]:
     with get_session() as s:
-        return s.query(Project).order_by(Project.created_at.desc()).all()
+        return s.query(Project).options(*PROJECT_CHILDREN).order_by(Project.created_at.desc()).all()
+
+def get_projects(project_ids: List[int]) -> List[Project]:
+    """Projets complets (enfants compris) en une requête par table."""
+    if not project_ids:
+        return []
+    with get_session() as s:
+        stmt = select(Project).options(*PROJECT_CHILDREN).where(Project.id.in_(project_ids))
+        return list(s.execute(stmt).scalars())
+
+# --- Liste paginée, triée et filtrée côté SQL ---
+PROJECT_PAGE_SIZE = 200
+
+# Clés de tri exposées à l'UI (toutes indexées, cf. models.Project)
+PROJECT_SORT_KEYS = {
+    "code": Project.code,
+    "name": Project.name,
+    "owner": Project.owner,
+    "status": Project.status,
+    "start_date": Project.start_date,
+    "end_date": Project.end_date,
+    "created_at": Project.created_at,
+}
+
+# Colonnes affichées dans la liste
+PROJECT_LIST_COLUMNS = (
+    Project.id, Project.code, Project.name, Project.owner,
+    Project.start_date, Project.end_date, Project.capex_cents, Project.opex_cents,
+)
+
+# (valeur de tri brute, id) de la dernière ligne de la page précédente
+PageCursor = Tuple[Optional[str], int]
+
+
+class ProjectListRow(NamedTuple):
+    """Ligne de la liste des projets : un tuple, sans état ORM ni instrumentation."""
+    id: int
+    code: str
+    name: str
+    owner: Optional[str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    capex_cents: int
+    opex_cents: int
+    sort_key: Optional[str]
+
+
+@dataclass(frozen=True)
+class ProjectFilter:
+    text: Optional[str] = None        # sous-chaîne du code ou du nom
+    status: Optional[str] = None
+    owner: Optional[str] = None
+    date_from: Optional[date] = None  # projets actifs sur [date_from, date_to]
+    date_to: Optional[date] = None
+    theme: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ProjectOrder:
+    key: str = "created_at"
+    descending: bool = True
+
+
+@dataclass(frozen=True)
+class Page:
+    after: Optional[PageCursor] = None
+    limit: int = PROJECT_PAGE_SIZE
+
+
+def _sort_key(column):
+    # Valeur lue telle que stockée : SQLite compare des chaînes, et une date
+    # relue puis rebindée n'a pas forcément le même format (microsecondes)
+    return type_coerce(column, String)
+
+def _filter_clauses(flt: Optional[ProjectFilter]) -> list:
+    if flt is None:
+        return []
+    clauses = []
+    if flt.text:
+        pattern = f"%{flt.text.strip()}%"
+        clauses.append(or_(Project.code.like(pattern), Project.name.like(pattern)))
+    if flt.status:
+        clauses.append(Project.status == flt.status)
+    if flt.owner:
+        clauses.append(Project.owner == flt.owner)
+    if flt.date_to:
+        clauses.append(Project.start_date <= flt.date_to)
+    if flt.date_from:
+        clauses.append(or_(Project.end_date.is_(None), Project.end_date >= flt.date_from))
+    if flt.theme:
+        clauses.append(Project.id.in_(
+            select(ProjectTheme.project_id).where(ProjectTheme.theme == flt.theme)
+        ))
+    return clauses
+
+def _after_clause(column, after: PageCursor, descending: bool):
+    """Prédicat keyset « strictement après le curseur » pour l'ordre (column, id).
+
+    SQLite place les NULL en tête en ASC et en fin en DESC.
+    """
+    key = _sort_key(column)
+    value, last_id = after
+    if not column.nullable:
+        if descending:
+            return tuple_(key, Project.id) < tuple_(value, last_id)
+        return tuple_(key, Project.id) > tuple_(value, last_id)
+    if descending:
+        if value is None:
+            return and_(column.is_(None), Project.id < last_id)
+        return or_(key < value, and_(key == value, Project.id < last_id), column.is_(None))
+    if value is None:
+        return or_(and_(column.is_(None), Project.id > last_id), column.is_not(None))
+    return or_(key > value, and_(key == value, Project.id > last_id))
+
+def query_projects(flt: Optional[ProjectFilter] = None,
+                   order: Optional[ProjectOrder] = None,
+                   page: Optional[Page] = None) -> List[ProjectListRow]:
+    """Page de projets (colonnes de liste uniquement), filtrée et triée en SQL.
+
+    Pagination keyset sur (clé de tri, id) : le coût d'une page ne dépend ni
+    de sa profondeur ni de la taille de la table.
+    """
+    order = order or ProjectOrder()
+    page = page or Page()
+    if order.key not in PROJECT_SORT_KEYS:
+        raise ValueError(f"Clé de tri inconnue : {order.key}")
+    column = PROJECT_SORT_KEYS[order.key]
 
-def get_project(project_id: int) -> Optional[Project]:
+    stmt = select(*PROJECT_LIST_COLUMNS, _sort_key(column).label("sort_key"))
+    clauses = _filter_clauses(flt)
+    if page.after is not None:
+        clauses.append(_after_clause(column, page.after, order.descending))
+    if clauses:
+        stmt = stmt.where(*clauses)
+    if order.descending:
+        stmt = stmt.order_by(column.desc(), Project.id.desc())
+    else:
+        stmt = stmt.order_by(column.asc(), Project.id.asc())
+    stmt = stmt.limit(page.limit)
     with get_session() as s:
-        return s.get(Project, project_id)
+        return [ProjectListRow._make(r) for r in s.execute(stmt)]
+
+def project_rows(project_ids: List[int], flt: Optional[ProjectFilter] = None,
+                 order: Optional[ProjectOrder] = None) -> List[ProjectListRow]:
+    """Lignes de liste (même forme que query_projects) des projets `project_ids`.
+
+    Seuls ceux qui passent `flt` sont renvoyés : après une création ou une
+    modification, l'UI sait ainsi s'il faut afficher, déplacer ou masquer la ligne.
+    """
+    if not project_ids:
+        return []
+    order = order or ProjectOrder()
+    column = PROJECT_SORT_KEYS[order.key]
+    stmt = select(*PROJECT_LIST_COLUMNS, _sort_key(column).label("sort_key")).where(
+        Project.id.in_(list(project_ids)), *_filter_clauses(flt)
+    )
+    with get_session() as s:
+        return [ProjectListRow._make(r) for r in s.execute(stmt)]
+
+def list_projects_page(after: Optional[PageCursor] = None,
+                       limit: int = PROJECT_PAGE_SIZE) -> List[ProjectListRow]:
+    """Page de projets du plus récent au plus ancien."""
+    return query_projects(page=Page(after=after, limit=limit))
+
+def page_cursor(row: ProjectListRow) -> PageCursor:
+    return (row.sort_key, row.id)
+
+def count_projects(flt: Optional[ProjectFilter] = None) -> int:
+    stmt = select(func.count(Project.id))
+    clauses = _filter_clauses(flt)
+    if clauses:
+        stmt = stmt.where(*clauses)
+    with get_session() as s:
+        return s.execute(stmt).scalar_one()
+
+def list_themes() -> List[str]:
+    """Thèmes distincts (parcours de l'index sur theme)."""
+    with get_session() as s:
+        return list(s.execute(select(ProjectTheme.theme).distinct().order_by(ProjectTheme.theme)).scalars())
+
+def list_project_owners() -> List[str]:
+    """Responsables distincts (parcours de l'index sur owner)."""
+    stmt = select(Project.owner).where(Project.owner.is_not(None)).distinct().order_by(Project.owner)
+    with get_session() as s:
+        return list(s.execute(stmt).scalars())
+
+@dataclass(frozen=True)
+class ProjectRecord:
+    """Instantané en lecture seule d'un projet (enfants et totaux compris).
+
+    Partagé tel quel par le cache entre appelants et threads : rien n'y est
+    modifiable, contrairement à un Project ORM détaché.
+    """
+    id: int
+    code: str
+    name: str
+    owner: Optional[str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+    status: Optional[str]
+    description: Optional[str]
+    deliverables: Optional[str]
+    cir: bool
+    cir_montant: Optional[float]
+    subvention: bool
+    subvention_montant: Optional[float]
+    amortissement: bool
+    team: Tuple[Tuple[str, int], ...]
+    investissement: Tuple[Mapping[str, object], ...]  # vues en lecture seule : dict(inv) pour une copie
+    themes: Tuple[str, ...]
+    images: Tuple[str, ...]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    capex_cents: int
+    opex_cents: int
+    budget_line_count: int
+
+    @property
+    def total_cents(self) -> int:
+        return self.capex_cents + self.opex_cents
+
+def _record_fields(p: Project) -> dict:
+    """Champs de ProjectRecord pour un Project dont les enfants sont chargés."""
+    team = p.team or {}
+    if isinstance(team, str):
+        team = json.loads(team)
+    return dict(
+        id=p.id, code=p.code, name=p.name, owner=p.owner,
+        start_date=p.start_date, end_date=p.end_date, status=p.status,
+        description=p.description, deliverables=p.deliverables,
+        cir=bool(p.cir), cir_montant=p.cir_montant,
+        subvention=bool(p.subvention), subvention_montant=p.subvention_montant,
+        amortissement=bool(p.amortissement),
+        team=tuple(team.items()),
+        investissement=tuple(MappingProxyType(inv) for inv in p.investissement),
+        themes=tuple(p.themes), images=tuple(p.images),
+        created_at=p.created_at, updated_at=p.updated_at,
+        capex_cents=p.capex_cents, opex_cents=p.opex_cents,
+        budget_line_count=p.budget_line_count,
+    )
+
+@cached("project")
+def get_project(project_id: int) -> Optional[ProjectRecord]:
+    with get_session() as s:
+        p = s.get(Project, project_id, options=PROJECT_CHILDREN)
+        return ProjectRecord(**_record_fields(p)) if p else None
+
+def find_project_id(code: str) -> Optional[int]:
+    """Id du projet de code `code` (index unique uq_project_code)."""
+    with get_session() as s:
+        return s.execute(select(Project.id).where(Project.code == code)).scalar()
 
 def update_project(project_id: int, **fields) -> Optional[Project]:
     with get_session() as s:
-        p = s.get(Project, project_id)
+        # Enfants chargés : le Project renvoyé (détaché) reste lisible en entier
+        p = s.get(Project, project_id, options=PROJECT_CHILDREN)
         if not p: return None
+        if "images" in fields:
+            fields["images"] = media.ingest(s, fields["images"])
+        # monthly_rollup : contribution retirée avant, remise après (lignes comprises si l'état change)
+        touched = rollup.PROJECT_FIELDS & fields.keys()
+        with_lines = "status" in touched
+        deltas = rollup.project_deltas(s, project_id, -1, include_lines=with_lines) if touched else None
         for k, v in fields.items():
             if hasattr(p, k):
                 setattr(p, k, v)
         s.flush()
-        return p
+        if deltas is not None:
+            rollup.apply(s, rollup.project_deltas(s, project_id, +1, deltas, include_lines=with_lines))
+    cache.invalidate(("project", project_id), ("detail", project_id))
+    if "images" in fields:
+        media.collect_garbage()  # images retirées : fichiers peut-être orphelins
+    return p
 
 def delete_project(project_id: int) -> bool:
     with get_session() as s:
         p = s.get(Project, project_id)
         if not p: return False
+        rollup.apply(s, rollup.project_deltas(s, project_id, -1))
         s.delete(p)
-        return True
+    # ON DELETE CASCADE : lignes budgétaires et news disparaissent avec le projet
+    cache.invalidate(("project", project_id), ("budget_lines", project_id), ("news", project_id),
+                     ("detail", project_id))
+    media.collect_garbage()
+    return True
+
+# --- Opérations en masse ---
+# Une transaction et une instruction Core exécutée en executemany par table,
+# au lieu d'un get / setattr / commit par projet. Mêmes effets de bord que le
+# CRUD unitaire : monthly_rollup, cache, magasin media/ ; FTS, compteurs de
+# références et ON DELETE CASCADE sont à la charge de SQLite.
+
+# Colonnes de projects acceptées, avec leur valeur par défaut à la création
+BULK_FIELDS = {
+    "code": None, "name": None, "owner": None, "start_date": None, "end_date": None,
+    "description": None, "deliverables": None, "status": None,
+    "cir": False, "cir_montant": None, "subvention": False, "subvention_montant": None,
+    "amortissement": False, "team": None,
+}
+# Tables enfants : renseignées à la création seulement
+BULK_CHILD_FIELDS = frozenset({"investissement", "themes", "images"})
+# Valeur commune à tous les projets : pas de colonne unique (uq_project_code)
+BULK_UPDATE_FIELDS = frozenset(BULK_FIELDS) - {"code"}
+
+def _check_fields(fields, allowed) -> None:
+    unknown = set(fields) - set(allowed)
+    if unknown:
+        raise ValueError(f"Champ(s) non pris en charge en masse : {', '.join(sorted(unknown))}")
+
+def _project_keys(project_ids, *regions: str) -> list:
+    return [(region, pid) for pid in project_ids for region in regions]
+
+def bulk_create_projects(rows: Iterable[dict]) -> List[int]:
+    """Crée les projets `rows` (arguments de create_project) ; renvoie leurs ids, dans l'ordre."""
+    rows = list(rows)
+    if not rows:
+        return []
+    for row in rows:
+        _check_fields(row, BULK_FIELDS.keys() | BULK_CHILD_FIELDS)
+    records = [{k: row.get(k, default) for k, default in BULK_FIELDS.items()} for row in rows]
+    with get_session() as s:
+        conn = s.connection()
+        ids = conn.execute(
+            insert(Project.__table__).returning(Project.__table__.c.id, sort_by_parameter_order=True), records
+        ).scalars().all()
+        themes, investments, images = [], [], []
+        deltas = rollup.new_deltas()
+        for pid, row, rec in zip(ids, rows, records):
+            themes += [{"project_id": pid, "theme": t, "position": i}
+                       for i, t in enumerate(theme_names(row.get("themes")))]
+            invs = row.get("investissement")
+            for inv in map(Investment.from_dict, [invs] if isinstance(invs, dict) else invs or []):
+                if inv is not None:
+                    investments.append({"project_id": pid, "montant": inv.montant, "date": inv.date,
+                                        "duree_mois": inv.duree_mois})
+            images += [{"project_id": pid, "path": p, "position": i}
+                       for i, p in enumerate(media.ingest(s, row.get("images"))) if p]
+            rollup.add_project(deltas, rec["status"], rec["start_date"], rec["end_date"],
+                               rec["subvention"], rec["subvention_montant"])
+        for model, child_rows in ((ProjectTheme, themes), (Investment, investments), (ProjectImage, images)):
+            if child_rows:
+                conn.execute(insert(model.__table__), child_rows)
+        rollup.apply(conn, deltas)
+    cache.invalidate(*_project_keys(ids, "project"))
+    return ids
+
+def bulk_update_projects(project_ids: Iterable[int], **fields) -> int:
+    """Affecte les mêmes valeurs (colonnes de BULK_UPDATE_FIELDS) à tous ces projets ; renvoie le nombre modifié."""
+    _check_fields(fields, BULK_UPDATE_FIELDS)
+    ids = list(dict.fromkeys(project_ids))
+    if not ids or not fields:
+        return 0
+    projects = Project.__table__
+    with get_session() as s:
+        conn = s.connection()
+        # monthly_rollup : comme update_project, contribution retirée avant et remise après
+        touched = rollup.PROJECT_FIELDS & fields.keys()
+        with_lines = "status" in touched
+        deltas = rollup.projects_deltas(conn, ids, -1, include_lines=with_lines) if touched else None
+        result = conn.execute(
+            update(projects).where(projects.c.id == bindparam("pid")).values(**fields),
+            [{"pid": pid} for pid in ids],
+        )
+        if deltas is not None:
+            rollup.apply(conn, rollup.projects_deltas(conn, ids, +1, deltas, include_lines=with_lines))
+    cache.invalidate(*_project_keys(ids, "project", "detail"))
+    return result.rowcount
+
+def bulk_delete_projects(project_ids: Iterable[int]) -> int:
+    """Supprime ces projets (et, par ON DELETE CASCADE, leurs enfants) ; renvoie le nombre supprimé."""
+    ids = list(dict.fromkeys(project_ids))
+    if not ids:
+        return 0
+    projects = Project.__table__
+    with get_session() as s:
+        conn = s.connection()
+        rollup.apply(conn, rollup.projects_deltas(conn, ids, -1))
+        result = conn.execute(delete(projects).where(projects.c.id == bindparam("pid")),
+                              [{"pid": pid} for pid in ids])
+    cache.invalidate(*_project_keys(ids, "project", "budget_lines", "news", "detail"))
+    media.collect_garbage()
+    return result.rowcount
 
 # --- CRUD Budget lines ---
 def add_budget_line(project_id: int, label: str, amount_cents: int,
                     is_capex: bool = True, value_date: Optional[date] = None) -> Optional[BudgetLine]:
     with get_session() as s:
-        if not s.get(Project, project_id):
+        p = s.get(Project, project_id)
+        if not p:
             return None
         bl = BudgetLine(
             project_id=project_id,
@@ -100,32 +488,78 @@ def add_budget_line(project_id: int, label: str, amount_cents: int,
         )
         s.add(bl)
         s.flush()
-        return bl
+        deltas = rollup.new_deltas()
+        rollup.add_line(deltas, value_date, p.status, amount_cents, is_capex)
+        rollup.apply(s, deltas)
+    # Totaux de projects mis à jour par l'after_flush (cf. models._track_budget_totals)
+    cache.invalidate(("project", project_id), ("budget_lines", project_id), ("detail", project_id))
+    return bl
 
-def list_budget_lines(project_id: int) -> List[BudgetLine]:
+class BudgetLineRow(NamedTuple):
+    id: int
+    label: str
+    is_capex: bool
+    amount_cents: int
+    value_date: Optional[date]
+
+BUDGET_LINE_COLUMNS = (
+    BudgetLine.id, BudgetLine.label, BudgetLine.is_capex, BudgetLine.amount_cents, BudgetLine.value_date,
+)
+
+def _budget_lines_stmt(project_id: int):
+    return (
+        select(*BUDGET_LINE_COLUMNS)
+        .where(BudgetLine.project_id == project_id)
+        .order_by(BudgetLine.created_at.asc())
+    )
+
+@cached("budget_lines")
+def list_budget_lines(project_id: int) -> List[BudgetLineRow]:
     with get_session() as s:
-        return (
-            s.query(BudgetLine)
-            .filter(BudgetLine.project_id == project_id)
-            .order_by(BudgetLine.created_at.asc())
-            .all()
-        )
+        return [BudgetLineRow._make(r) for r in s.execute(_budget_lines_stmt(project_id))]
 
 # --- CRUD Actualités projets ---
-def list_project_news(project_id: int) -> List[dict]:
-    with get_session() as s:
-        return [
-            {
-                "id": n.id,
-                "project_id": n.project_id,
-                "text": n.text,
-                "created_at": n.created_at.isoformat()
-            }
-            for n in s.query(ProjectNews)
-                     .filter(ProjectNews.project_id == project_id)
-                     .order_by(ProjectNews.created_at.desc())
-                     .all()
-        ]
+NEWS_PAGE_SIZE = 50
+
+# (valeur brute de created_at, id) de la dernière actualité affichée
+NewsCursor = Tuple[str, int]
+
+
+class NewsRow(NamedTuple):
+    id: int
+    project_id: int
+    text: str
+    created_at: datetime
+    sort_key: str
+
+
+def _news_stmt(project_id: int):
+    # Du plus récent au plus ancien (index ix_project_news_project_created)
+    return (
+        select(ProjectNews.id, ProjectNews.project_id, ProjectNews.text, ProjectNews.created_at,
+               _sort_key(ProjectNews.created_at).label("sort_key"))
+        .where(ProjectNews.project_id == project_id)
+        .order_by(ProjectNews.created_at.desc(), ProjectNews.id.desc())
+    )
+
+@cached("news")
+def list_project_news(project_id: int, before: Optional[NewsCursor] = None,
+                      limit: Optional[int] = None) -> List[NewsRow]:
+    """Actualités du projet, les plus récentes d'abord.
+
+    Paginé par `before` (curseur de la dernière actualité reçue, cf. news_cursor)
+    et `limit` ; sans argument, tout le fil (mis en cache).
+    """
+    stmt = _news_stmt(project_id)
+    if before is not None:
+        stmt = stmt.where(tuple_(_sort_key(ProjectNews.created_at), ProjectNews.id) < tuple_(*before))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    with get_session() as s:
+        return [NewsRow._make(r) for r in s.execute(stmt)]
+
+def news_cursor(row: NewsRow) -> NewsCursor:
+    return (row.sort_key, row.id)
 
 def create_project_news(project_id: int, text: str, created_at: Optional[datetime] = None) -> dict:
     with get_session() as s:
@@ -138,28 +572,211 @@ def create_project_news(project_id: int, text: str, created_at: Optional[datetim
         )
         s.add(news)
         s.flush()
-        return {
+        item = {
             "id": news.id,
             "project_id": news.project_id,
             "text": news.text,
             "created_at": news.created_at.isoformat()
         }
-    
+    cache.invalidate(("news", project_id), ("detail", project_id))
+    return item
+
 def update_project_news(news_id: int, new_text: str) -> bool:
     with get_session() as s:
         news = s.get(ProjectNews, news_id)
         if not news:
             return False
         news.text = new_text.strip()
-        s.flush()
-        return True
+        project_id = news.project_id
+    cache.invalidate(("news", project_id), ("detail", project_id))
+    return True
+
 def delete_project_news(news_id: int) -> bool:
     with get_session() as s:
         news = s.get(ProjectNews, news_id)
         if not news:
             return False
         s.delete(news)
-        return True
+        project_id = news.project_id
+    cache.invalidate(("news", project_id), ("detail", project_id))
+    return True
+
+# --- Détail projet ---
+DETAIL_NEWS_PAGE = NEWS_PAGE_SIZE
+DETAIL_BUDGET_LINES = 500
+
+@dataclass(frozen=True)
+class ProjectDetail(ProjectRecord):
+    """Instantané en lecture seule de tout ce qu'affiche la fiche projet.
+
+    Les lignes budgétaires et les actualités sont limitées aux premières
+    (DETAIL_BUDGET_LINES, DETAIL_NEWS_PAGE) ; totaux et compteurs portent sur
+    l'ensemble du projet.
+    """
+    budget_lines: Tuple[BudgetLineRow, ...]
+    news_count: int
+    news: Tuple[NewsRow, ...]
+
+    @property
+    def has_more_news(self) -> bool:
+        return self.news_count > len(self.news)
+
+def _news_count():
+    """Sous-requête corrélée : nombre d'actualités du projet (les totaux budgétaires sont des colonnes)."""
+    return (
+        select(func.count(ProjectNews.id)).where(ProjectNews.project_id == Project.id)
+        .scalar_subquery().label("news_count")
+    )
+
+# Enfants de la fiche joints à la requête du projet : collections courtes
+# (quelques lignes chacune), le produit cartésien reste négligeable
+DETAIL_CHILDREN = (
+    joinedload(Project.investments),
+    joinedload(Project.theme_rows),
+    joinedload(Project.image_rows),
+)
+
+def _detail_pages_stmt(project_id: int):
+    """Premières lignes budgétaires (kind 0) et actualités (kind 1) en une instruction UNION ALL.
+
+    Chaque branche garde son tri et sa limite ; `pos` rend l'ordre explicite.
+    Les colonnes propres à l'autre branche valent NULL (types portés par la
+    première branche, qui fixe ceux du résultat).
+    """
+    lines = (
+        _budget_lines_stmt(project_id)
+        .add_columns(func.row_number().over(order_by=BudgetLine.created_at.asc()).label("pos"))
+        .limit(DETAIL_BUDGET_LINES)
+        .subquery()
+    )
+    news = (
+        _news_stmt(project_id)
+        .add_columns(func.row_number().over(
+            order_by=(ProjectNews.created_at.desc(), ProjectNews.id.desc())).label("pos"))
+        .limit(DETAIL_NEWS_PAGE)
+        .subquery()
+    )
+    return union_all(
+        select(literal(0).label("kind"), lines.c.pos, lines.c.id, lines.c.label.label("text"),
+               lines.c.is_capex, lines.c.amount_cents, lines.c.value_date,
+               type_coerce(null(), DateTime).label("created_at"), type_coerce(null(), String).label("sort_key")),
+        select(literal(1), news.c.pos, news.c.id, news.c.text,
+               null(), null(), null(), news.c.created_at, news.c.sort_key),
+    ).order_by(text("kind"), text("pos"))
+
+@cached("detail")
+def get_project_detail(project_id: int) -> Optional[ProjectDetail]:
+    """Fiche projet complète en deux requêtes, quel que soit le volume :
+    projet + agrégats + enfants (joinedload), puis première page de lignes et
+    d'actualités (UNION ALL)."""
+    with get_session() as s:
+        row = s.execute(
+            select(Project, _news_count())
+            .options(*DETAIL_CHILDREN)
+            .where(Project.id == project_id)
+        ).unique().one_or_none()
+        if row is None:
+            return None
+        p = row.Project
+        lines, news = [], []
+        for r in s.execute(_detail_pages_stmt(project_id)):
+            if r.kind == 0:
+                lines.append(BudgetLineRow(r.id, r.text, r.is_capex, r.amount_cents, r.value_date))
+            else:
+                news.append(NewsRow(r.id, project_id, r.text, r.created_at, r.sort_key))
+        return ProjectDetail(
+            **_record_fields(p),
+            budget_lines=tuple(lines),
+            news_count=int(row.news_count),
+            news=tuple(news),
+        )
+
+# --- Agrégats mensuels (monthly_rollup) ---
+def rebuild_monthly_rollup() -> int:
+    """Recalcule monthly_rollup depuis les lignes budgétaires ; renvoie son nombre de lignes."""
+    with get_session() as s:
+        return rollup.rebuild(s)
+
+def rebuild_project_totals() -> None:
+    """Recalcule projects.capex_cents / opex_cents / budget_line_count depuis les lignes."""
+    with get_session() as s:
+        _rebuild_project_totals(s)
+    cache.invalidate_region("project")
+    cache.invalidate_region("detail")
+
+def cache_stats() -> dict:
+    """Hits / misses / entrées du cache de lecture, par région."""
+    return cache.stats()
+
+
+# --- Recherche plein texte ---
+# Classement d'abord (bm25 via la colonne `rank`), extraits ensuite : snippet()
+# est coûteux et ne doit tourner que sur les lignes retenues. Chaque branche
+# est bornée à ses meilleures lignes avant jointure et regroupement, même pour
+# un terme très fréquent ; les actualités d'un même projet se regroupant, leur
+# borne est SEARCH_NEWS_FACTOR fois plus large.
+SEARCH_NEWS_FACTOR = 10
+
+_SEARCH_SQL = text("""
+    WITH hits AS (
+        SELECT * FROM (
+            SELECT rowid AS project_id, rank AS score, NULL AS news_id
+            FROM projects_fts WHERE projects_fts MATCH :q
+            ORDER BY rank LIMIT :limit
+        )
+        UNION ALL
+        SELECT n.project_id, f.score, n.id
+        FROM (
+            SELECT rowid AS news_id, rank AS score
+            FROM news_fts WHERE news_fts MATCH :q
+            ORDER BY rank LIMIT :news_limit
+        ) f JOIN project_news n ON n.id = f.news_id
+    )
+    SELECT h.project_id, p.code, p.name, min(h.score) AS score, h.news_id
+    FROM hits h JOIN projects p ON p.id = h.project_id
+    GROUP BY h.project_id
+    ORDER BY score
+    LIMIT :limit
+""")
+
+_PROJECT_SNIPPETS_SQL = text("""
+    SELECT rowid, snippet(projects_fts, -1, '[', ']', '…', 12)
+    FROM projects_fts WHERE projects_fts MATCH :q AND rowid IN :ids
+""").bindparams(bindparam("ids", expanding=True))
+
+_NEWS_SNIPPETS_SQL = text("""
+    SELECT rowid, snippet(news_fts, 0, '[', ']', '…', 12)
+    FROM news_fts WHERE news_fts MATCH :q AND rowid IN :ids
+""").bindparams(bindparam("ids", expanding=True))
+
+def _fts_query(query: str) -> str:
+    """Saisie libre -> requête FTS5 : tous les mots requis, en préfixe."""
+    words = re.findall(r"\w+", query)
+    return " ".join(f'"{w}"*' for w in words)
+
+def search(query: str, limit: int = 50) -> List[dict]:
+    """Projets correspondant à `query` (champs texte, thèmes et actualités), du plus pertinent au moins pertinent."""
+    q = _fts_query(query)
+    if not q:
+        return []
+    with get_session() as s:
+        rows = s.execute(
+            _SEARCH_SQL, {"q": q, "limit": limit, "news_limit": limit * SEARCH_NEWS_FACTOR}
+        ).all()
+        project_ids = [r.project_id for r in rows if r.news_id is None]
+        news_ids = [r.news_id for r in rows if r.news_id is not None]
+        project_snips = dict(s.execute(_PROJECT_SNIPPETS_SQL, {"q": q, "ids": project_ids}).all()) if project_ids else {}
+        news_snips = dict(s.execute(_NEWS_SNIPPETS_SQL, {"q": q, "ids": news_ids}).all()) if news_ids else {}
+    return [
+        {
+            "project_id": r.project_id,
+            "code": r.code,
+            "name": r.name,
+            "score": r.score,
+            "snippet": news_snips.get(r.news_id) if r.news_id is not None else project_snips.get(r.project_id),
+        }
+        for r in rows
+    ]
 
 
 # --- Seed démo ---
@@ -174,3 +791,5 @@ def seed_demo_if_empty() -> None:
             BudgetLine(project_id=p.id, label="Presta intégration", amount_cents=80_000_00, is_capex=True),
             BudgetLine(project_id=p.id, label="Formation", amount_cents=15_000_00, is_capex=False),
         ])
+        s.flush()
+        rollup.apply(s, rollup.project_deltas(s, p.id, +1))
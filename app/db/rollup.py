@@ -0,0 +1,142 @@
+"""Table monthly_rollup : agrégats du portefeuille par (mois, état), maintenus par deltas.
+
+Les écritures du repo (et l'import en masse) calculent la contribution de ce
+qu'elles modifient, avec le signe −1 avant la modification et +1 après, puis
+appliquent la somme des deltas dans la même transaction (upsert). Les
+lectures du tableau de bord ne touchent que cette table : quelques centaines
+de lignes, quel que soit le nombre de lignes budgétaires.
+
+rebuild() recalcule tout depuis budget_lines et projects (python -m app.cli
+rollup).
+"""
+from collections import defaultdict
+from datetime import date
+from typing import DefaultDict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, delete, func, case
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from .models import BudgetLine, MonthlyRollup, Project
+
+FIELDS = ("capex_cents", "opex_cents", "line_count", "subvention_cents", "projects_started", "projects_ended")
+CAPEX, OPEX, LINES, SUBVENTION, STARTED, ENDED = range(len(FIELDS))
+
+# Champs de Project dont dépend la contribution d'un projet
+PROJECT_FIELDS = frozenset({"status", "start_date", "end_date", "subvention", "subvention_montant"})
+
+Deltas = DefaultDict[Tuple[str, str], List[int]]
+
+# Projets par requête dans projects_deltas (IN (...) borné par la limite de variables SQLite)
+ID_CHUNK = 500
+
+_LINE_AGGREGATES = (
+    func.coalesce(func.sum(case((BudgetLine.is_capex, BudgetLine.amount_cents), else_=0)), 0),
+    func.coalesce(func.sum(case((BudgetLine.is_capex, 0), else_=BudgetLine.amount_cents)), 0),
+    func.count(BudgetLine.id),
+)
+
+
+def new_deltas() -> Deltas:
+    return defaultdict(lambda: [0] * len(FIELDS))
+
+def month_key(d: Optional[date]) -> str:
+    return d.strftime("%Y-%m") if d else ""
+
+def add_line(deltas: Deltas, value_date: Optional[date], status: Optional[str],
+             amount_cents: int, is_capex: bool, sign: int = 1) -> None:
+    cell = deltas[(month_key(value_date), status or "")]
+    cell[CAPEX if is_capex else OPEX] += sign * amount_cents
+    cell[LINES] += sign
+
+def subvention_cents(subvention, montant) -> int:
+    return int(round((montant or 0) * 100)) if subvention else 0
+
+def add_project(deltas: Deltas, status: Optional[str], start_date: Optional[date], end_date: Optional[date],
+                subvention: bool, subvention_montant: Optional[float], sign: int = 1) -> None:
+    """Contribution propre du projet (hors lignes budgétaires)."""
+    status = status or ""
+    deltas[(month_key(start_date), status)][SUBVENTION] += sign * subvention_cents(subvention, subvention_montant)
+    if start_date is not None:
+        deltas[(month_key(start_date), status)][STARTED] += sign
+        if end_date is not None:
+            deltas[(month_key(end_date), status)][ENDED] += sign
+
+def project_deltas(conn, project_id: int, sign: int, deltas: Optional[Deltas] = None,
+                   include_lines: bool = True) -> Deltas:
+    """Contribution complète d'un projet tel qu'il est en base (lignes comprises si include_lines)."""
+    return projects_deltas(conn, [project_id], sign, deltas, include_lines)
+
+def projects_deltas(conn, project_ids: Iterable[int], sign: int, deltas: Optional[Deltas] = None,
+                    include_lines: bool = True) -> Deltas:
+    """Idem pour plusieurs projets : deux requêtes par tranche de ID_CHUNK projets."""
+    deltas = deltas if deltas is not None else new_deltas()
+    ids = list(project_ids)
+    month = func.coalesce(func.strftime("%Y-%m", BudgetLine.value_date), "")
+    status = func.coalesce(Project.status, "")
+    for start in range(0, len(ids), ID_CHUNK):
+        chunk = ids[start:start + ID_CHUNK]
+        for p in conn.execute(
+            select(Project.status, Project.start_date, Project.end_date, Project.subvention, Project.subvention_montant)
+            .where(Project.id.in_(chunk))
+        ):
+            add_project(deltas, *p, sign=sign)
+        if not include_lines:
+            continue
+        for m, s, capex, opex, count in conn.execute(
+            select(month, status, *_LINE_AGGREGATES)
+            .join(Project, Project.id == BudgetLine.project_id)
+            .where(BudgetLine.project_id.in_(chunk))
+            .group_by(month, status)
+        ):
+            cell = deltas[(m, s)]
+            cell[CAPEX] += sign * capex
+            cell[OPEX] += sign * opex
+            cell[LINES] += sign * count
+    return deltas
+
+def _rows(deltas: Deltas) -> List[dict]:
+    return [dict(zip(("month", "status") + FIELDS, key + tuple(values)))
+            for key, values in deltas.items() if any(values)]
+
+def apply(conn, deltas: Deltas) -> None:
+    """Ajoute les deltas à monthly_rollup (une instruction par cellule modifiée)."""
+    rows = _rows(deltas)
+    if not rows:
+        return
+    stmt = sqlite_insert(MonthlyRollup)
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[MonthlyRollup.month, MonthlyRollup.status],
+            set_={f: getattr(MonthlyRollup, f) + getattr(stmt.excluded, f) for f in FIELDS},
+        ),
+        rows,
+    )
+    # Cellules revenues à zéro (projet supprimé, changement d'état…)
+    conn.execute(delete(MonthlyRollup).where(*(getattr(MonthlyRollup, f) == 0 for f in FIELDS)))
+
+
+def rebuild(conn) -> int:
+    """Recalcule toute la table ; renvoie son nombre de lignes."""
+    deltas = new_deltas()
+    month = func.coalesce(func.strftime("%Y-%m", BudgetLine.value_date), "")
+    status = func.coalesce(Project.status, "")
+    for m, s, capex, opex, count in conn.execute(
+        select(month, status, *_LINE_AGGREGATES)
+        .join(Project, Project.id == BudgetLine.project_id)
+        .group_by(month, status)
+    ):
+        cell = deltas[(m, s)]
+        cell[CAPEX] += capex
+        cell[OPEX] += opex
+        cell[LINES] += count
+
+    # Contribution propre des projets : même calcul (arrondis compris) que les deltas
+    for p in conn.execute(select(Project.status, Project.start_date, Project.end_date,
+                                 Project.subvention, Project.subvention_montant)):
+        add_project(deltas, *p)
+
+    conn.execute(delete(MonthlyRollup))
+    rows = _rows(deltas)
+    if rows:
+        conn.execute(sqlite_insert(MonthlyRollup), rows)
+    return len(rows)
@@ -1,44 +1,113 @@
 import os
+import sys
+import time
 from pathlib import Path
 
-from PySide6.QtWidgets import QApplication
-from PySide6.QtGui import QIcon
-from PySide6.QtCore import Qt
+_T0 = time.perf_counter()
+
 from dotenv import load_dotenv
 
-from app.ui.main_window import MainWindow
-from app.db.repo import init_db, seed_demo_if_empty, list_projects
+# Qt, la fenêtre et la couche base de données sont importés dans main() :
+# APP_PROFILE_STARTUP=1 peut ainsi mesurer chaque étape du démarrage.
+
+
+class StartupProfile:
+    """Chronologie du démarrage, affichée sur stderr si APP_PROFILE_STARTUP est actif."""
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.marks = [("démarrage de l'interpréteur → app.main", _T0, time.perf_counter())]
+        self._last = time.perf_counter()
+        self._printed = False
+
+    def mark(self, label: str) -> None:
+        now = time.perf_counter()
+        self.marks.append((label, self._last, now))
+        self._last = now
+
+    def add(self, label: str, start: float, end: float) -> None:
+        """Étape mesurée ailleurs (thread d'arrière-plan)."""
+        self.marks.append((label, start, end))
+
+    def report(self) -> None:
+        if not self.enabled or self._printed:
+            return
+        self._printed = True
+        print("Profil de démarrage (ms : durée / depuis app.main)", file=sys.stderr)
+        for label, start, end in self.marks:
+            print(f"  {(end - start) * 1000:8.1f}  {(end - _T0) * 1000:8.1f}  {label}", file=sys.stderr)
+
 
 def ensure_media_dir() -> None:
     media_dir = Path("media")
     media_dir.mkdir(parents=True, exist_ok=True)
 
-def create_app() -> QApplication:
-    load_dotenv()
-    ensure_media_dir()
+def prepare_database() -> list:
+    """Schéma à jour + jeu de démonstration si vide (thread d'arrière-plan).
+
+    Retourne les durées [(étape, début, fin)] pour le profil de démarrage.
+    """
+    from app.db.repo import init_db, seed_demo_if_empty
 
-    # Init DB (tables) + petit jeu de données si vide
+    t = time.perf_counter()
     init_db()
+    t_init = time.perf_counter()
     seed_demo_if_empty()
+    return [("init_db (migrations)", t, t_init), ("seed_demo_if_empty", t_init, time.perf_counter())]
 
-    app = QApplication([])
+def create_app():
+    from PySide6.QtWidgets import QApplication
+
+    load_dotenv()
+    ensure_media_dir()
+
+    app = QApplication(sys.argv[:1])
     app.setApplicationName(os.getenv("APP_NAME", "Gestion budgétaire"))
     return app
 
 def main() -> None:
+    profile = StartupProfile(bool(os.getenv("APP_PROFILE_STARTUP")))
+
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QMessageBox
+    profile.mark("import PySide6")
     app = create_app()
-    win = MainWindow()
-    # Info légère: nombre de projets pour vérifier la DB
-    try:
-        projects = list_projects()
-        win.setWindowTitle(f"Gestion budgétaire — {len(projects)} projet(s)")
-    except Exception:
-        # en cas de souci DB, on laisse le titre par défaut
-        pass
+    profile.mark("QApplication")
+
+    from app.ui.main_window import MainWindow
+    from app.ui.db_executor import db_executor
+    profile.mark("import MainWindow (+ SQLAlchemy, repo)")
 
+    # Fenêtre affichée tout de suite, vide et contrôles désactivés ; la liste
+    # arrive avec set_database_ready(), une fois la base prête. Le titre
+    # (nombre de projets) est mis à jour par ce même refresh : pas de requête
+    # supplémentaire ici.
+    win = MainWindow(load=False)
     win.resize(980, 640)
     win.setWindowState(Qt.WindowState.WindowActive)
     win.show()
+    profile.mark("construction + affichage de la fenêtre")
+
+    def on_ready(steps):
+        for label, start, end in steps:
+            profile.add(label + " [arrière-plan]", start, end)
+        win.set_database_ready()
+
+    def on_first_page():
+        profile.mark("fenêtre → première page de projets affichée")
+        profile.report()
+        win.model.loaded.disconnect(on_first_page)
+
+    def on_failed(error):
+        profile.report()
+        QMessageBox.critical(win, "Erreur", f"Initialisation de la base impossible :\n{error}")
+
+    win.model.loaded.connect(on_first_page)
+    # Passe par l'écrivain unique : aucune autre écriture ne peut la devancer
+    db_executor().write(prepare_database).then(on_ready, on_failed)
+
+    # Laisse les écritures en cours se terminer avant de quitter
+    app.aboutToQuit.connect(lambda: db_executor().wait(5000))
     app.exec()
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+"""Plans d'amortissement linéaire des investissements de projets.
+
+Chaque investissement (table investments, ou dict {montant, date, duree_mois})
+est amorti linéairement à partir de son mois d'achat. Les plans de tout le
+portefeuille sont calculés d'un bloc avec NumPy (tableaux de différences + cumsum), sans boucle Python
+par investissement ni par mois.
+"""
+import json
+from collections.abc import Mapping
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from app.db.models import Investment
+from app.db.repo import get_session
+
+
+def month_index(value: Any) -> Optional[int]:
+    """'YYYY-MM', 'YYYY-MM-DD' ou date -> nombre de mois depuis l'an 0."""
+    if isinstance(value, date):
+        return value.year * 12 + value.month - 1
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        year, month = int(value[:4]), int(value[5:7])
+    except ValueError:
+        return None
+    if not 1 <= month <= 12:
+        return None
+    return year * 12 + month - 1
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _as_list(raw: Any) -> list:
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return []
+    if isinstance(raw, Mapping):
+        return [raw]
+    return list(raw) if isinstance(raw, (list, tuple)) else []
+
+
+@dataclass(frozen=True)
+class Investments:
+    """Investissements à plat, un élément par investissement valide."""
+    project_ids: np.ndarray   # int64
+    amounts: np.ndarray       # float64, en euros
+    start_months: np.ndarray  # int64, cf. month_index()
+    durations: np.ndarray     # int64, en mois (> 0)
+
+    def __len__(self) -> int:
+        return len(self.amounts)
+
+
+def parse_investments(rows: Iterable[Tuple[int, Any]]) -> Investments:
+    """(project_id, investissement JSON) -> tableaux ; ignore les entrées incomplètes."""
+    pids, amounts, starts, durations = [], [], [], []
+    for project_id, raw in rows:
+        for inv in _as_list(raw):
+            if not isinstance(inv, Mapping):
+                continue
+            start = month_index(inv.get("date"))
+            try:
+                amount = float(inv.get("montant") or 0)
+                duration = int(inv.get("duree_mois") or 0)
+            except (TypeError, ValueError):
+                continue
+            if start is None or amount <= 0 or duration <= 0:
+                continue
+            pids.append(project_id)
+            amounts.append(amount)
+            starts.append(start)
+            durations.append(duration)
+    return Investments(
+        np.asarray(pids, dtype=np.int64),
+        np.asarray(amounts, dtype=np.float64),
+        np.asarray(starts, dtype=np.int64),
+        np.asarray(durations, dtype=np.int64),
+    )
+
+
+def load_investments(project_ids: Optional[Iterable[int]] = None) -> Investments:
+    """Lit la table investments directement en colonnes (sans objets ORM)."""
+    stmt = select(Investment.project_id, Investment.montant, Investment.date, Investment.duree_mois)
+    if project_ids is not None:
+        stmt = stmt.where(Investment.project_id.in_(list(project_ids)))
+    with get_session() as s:
+        rows = s.execute(stmt).all()
+    if not rows:
+        return parse_investments([])
+    pids, amounts, dates, durations = zip(*rows)
+    return Investments(
+        np.asarray(pids, dtype=np.int64),
+        np.asarray(amounts, dtype=np.float64),
+        np.fromiter((d.year * 12 + d.month - 1 for d in dates), dtype=np.int64, count=len(dates)),
+        np.asarray(durations, dtype=np.int64),
+    )
+
+
+@dataclass(frozen=True)
+class AmortizationSchedule:
+    """Dotations et valeur nette comptable (VNC) fin de mois, projet x mois."""
+    first_month: int
+    project_ids: np.ndarray     # (n_projects,)
+    dotations: np.ndarray       # (n_projects, n_months)
+    net_book_value: np.ndarray  # (n_projects, n_months)
+
+    @property
+    def months(self) -> List[str]:
+        return [month_label(self.first_month + i) for i in range(self.dotations.shape[1])]
+
+    def row(self, project_id: int) -> int:
+        hits = np.flatnonzero(self.project_ids == project_id)
+        if not len(hits):
+            raise KeyError(project_id)
+        return int(hits[0])
+
+    def portfolio_dotations(self) -> np.ndarray:
+        return self.dotations.sum(axis=0)
+
+    def portfolio_net_book_value(self) -> np.ndarray:
+        return self.net_book_value.sum(axis=0)
+
+    def by_year(self, project_id: Optional[int] = None) -> List[Tuple[int, float, float]]:
+        """[(année, dotations de l'année, VNC en fin d'année)] pour un projet ou le portefeuille."""
+        if project_id is None:
+            dot, nbv = self.portfolio_dotations(), self.portfolio_net_book_value()
+        else:
+            r = self.row(project_id)
+            dot, nbv = self.dotations[r], self.net_book_value[r]
+        if not len(dot):
+            return []
+        years = (self.first_month + np.arange(len(dot))) // 12
+        uniq, starts = np.unique(years, return_index=True)
+        sums = np.add.reduceat(dot, starts)
+        ends = np.append(starts[1:], len(dot)) - 1
+        return [(int(y), round(float(d), 2), round(float(v), 2)) for y, d, v in zip(uniq, sums, nbv[ends])]
+
+
+def compute_schedule(inv: Investments, first_month: Optional[int] = None,
+                     n_months: Optional[int] = None) -> AmortizationSchedule:
+    """Plans mensuels de tous les investissements sur la fenêtre [first_month, first_month + n_months).
+
+    Par défaut la fenêtre couvre du premier achat à la fin du dernier amortissement.
+    """
+    if first_month is None:
+        first_month = int(inv.start_months.min()) if len(inv) else 0
+    if n_months is None:
+        n_months = int((inv.start_months + inv.durations).max()) - first_month if len(inv) else 0
+    n_months = max(int(n_months), 0)
+
+    project_ids, rows = np.unique(inv.project_ids, return_inverse=True)
+    n_projects = len(project_ids)
+
+    rate = inv.amounts / inv.durations
+    begin = np.clip(inv.start_months - first_month, 0, n_months)
+    end = np.clip(inv.start_months + inv.durations - first_month, 0, n_months)
+
+    # Dotation mensuelle : +rate au début, -rate à la fin, puis cumsum
+    diff = np.zeros((n_projects, n_months + 1))
+    np.add.at(diff, (rows, begin), rate)
+    np.add.at(diff, (rows, end), -rate)
+    dotations = np.cumsum(diff, axis=1)[:, :n_months]
+
+    # VNC = achats cumulés - dotations cumulées (y compris avant la fenêtre)
+    acquired = np.zeros((n_projects, n_months + 1))
+    np.add.at(acquired, (rows, begin), inv.amounts)
+    before = np.zeros(n_projects)
+    np.add.at(before, rows, rate * np.clip(first_month - inv.start_months, 0, inv.durations))
+    nbv = np.cumsum(acquired, axis=1)[:, :n_months] - before[:, None] - np.cumsum(dotations, axis=1)
+    nbv = np.where(np.abs(nbv) < 1e-6, 0.0, nbv)  # bruit d'arrondi en fin de plan
+
+    return AmortizationSchedule(first_month, project_ids, dotations, nbv)
+
+
+def portfolio_schedule(first_month: Optional[int] = None,
+                       n_months: Optional[int] = None) -> AmortizationSchedule:
+    """Plan d'amortissement de tout le portefeuille (une requête, un calcul vectorisé)."""
+    return compute_schedule(load_investments(), first_month, n_months)
+
+
+def project_schedule(project_id: int, investissement: Any,
+                     first_month: Optional[int] = None,
+                     n_months: Optional[int] = None) -> AmortizationSchedule:
+    """Plan d'un seul projet à partir de sa valeur `investissement` déjà chargée."""
+    return compute_schedule(parse_investments([(project_id, investissement)]), first_month, n_months)
@@ -0,0 +1,295 @@
+"""Import en masse de lignes budgétaires depuis un export CSV ou XLSX.
+
+Le fichier est lu ligne à ligne (csv / openpyxl en lecture seule) et écrit
+par lots dans une seule transaction : la mémoire reste bornée par la taille
+d'un lot, quelle que soit la taille du fichier. Chaque lot part en
+`executemany` sur un `insert()` compilé une fois (SQLAlchemy le regroupe en
+INSERT multi-VALUES) ; un `insert().values([...])` serait recompilé à chaque
+lot. Les codes projet sont résolus via une seule table code -> id.
+
+Colonnes reconnues (en-têtes insensibles à la casse et aux accents) :
+code projet, libellé, montant (en euros), type (CAPEX/OPEX) et date.
+Les CSV sont lus en UTF-8, ou en Windows-1252 (exports comptables
+français) dès qu'une ligne n'est pas de l'UTF-8 valide.
+"""
+import csv
+import os
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+
+from app.db import rollup
+from app.db.cache import cache
+from app.db.models import engine, BudgetLine, Project, TotalsDeltas, add_line_to_totals, apply_project_totals
+
+BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+# En-tête normalisé -> champ
+HEADER_ALIASES = {
+    "code": "code", "code projet": "code", "projet": "code", "project": "code", "project code": "code",
+    "libelle": "label", "label": "label", "intitule": "label", "designation": "label",
+    "montant": "amount", "montant eur": "amount", "montant (eur)": "amount", "amount": "amount",
+    "type": "kind", "nature": "kind", "capex/opex": "kind", "is capex": "kind",
+    "date": "value_date", "date valeur": "value_date", "value date": "value_date", "date de valeur": "value_date",
+}
+REQUIRED_FIELDS = ("code", "label", "amount")
+
+# Encodage de repli des CSV qui ne sont pas en UTF-8
+FALLBACK_ENCODING = "cp1252"
+
+# progress(lignes lues, fraction du fichier ou None) ; retourner False annule l'import
+ProgressCallback = Callable[[int, Optional[float]], Optional[bool]]
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+@dataclass
+class ImportReport:
+    inserted: int = 0
+    skipped: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)  # (n° de ligne, message), tronquée
+
+    def add_error(self, line: int, message: str) -> None:
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+
+# --- Conversion des valeurs ---
+def _normalize(header) -> str:
+    txt = unicodedata.normalize("NFKD", str(header or "")).encode("ascii", "ignore").decode()
+    return " ".join(txt.lower().replace("_", " ").split())
+
+def _grouped(integer: str, sep: str) -> bool:
+    """Partie entière groupée par milliers avec `sep` (ex. '1.234.567')."""
+    return re.fullmatch(rf"[+-]?\d{{1,3}}(?:{re.escape(sep)}\d{{3}})+", integer) is not None
+
+def _decimal_text(txt: str) -> Optional[str]:
+    """Montant texte -> notation Decimal ; None si le format est ambigu ou incohérent.
+
+    Avec les deux séparateurs, le dernier est la décimale et l'autre doit
+    grouper des milliers ('1.234,56', '1,234.56'). Un séparateur répété est un
+    séparateur de milliers ('1.234.567') ; seul, c'est la décimale ('12,5').
+    """
+    last = max(txt.rfind(","), txt.rfind("."))
+    if last < 0:
+        return txt
+    decimal_sep = txt[last]
+    thousands = "." if decimal_sep == "," else ","
+    integer, fraction = txt[:last], txt[last + 1:]
+    if decimal_sep in integer:
+        # Séparateur répété : milliers seulement, sans partie décimale
+        if thousands in txt or not _grouped(txt, decimal_sep):
+            return None
+        return txt.replace(decimal_sep, "")
+    if thousands in integer:
+        if not _grouped(integer, thousands):
+            return None
+        integer = integer.replace(thousands, "")
+    return f"{integer}.{fraction}"
+
+def euros_to_cents(value) -> int:
+    """'1 234,56' / '1,234.56' / '1234.56' / 1234.56 -> 123456 (arrondi au centime)."""
+    if isinstance(value, (int, float, Decimal)):
+        amount = Decimal(str(value))
+    else:
+        txt = str(value or "").strip().replace(" ", "").replace(" ", "").replace(" ", "").replace("€", "")
+        normalized = _decimal_text(txt)
+        try:
+            if normalized is None:
+                raise InvalidOperation
+            amount = Decimal(normalized)
+        except InvalidOperation:
+            raise ValueError(f"montant invalide ou ambigu : {value!r}")
+    return int((amount * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+def parse_kind(value) -> bool:
+    """CAPEX -> True, OPEX -> False ; vide = CAPEX (défaut du modèle)."""
+    if isinstance(value, bool):
+        return value
+    txt = str(value or "").strip().lower()
+    if txt in ("", "capex", "invest", "investissement", "1", "true", "oui", "o"):
+        return True
+    if txt in ("opex", "fonctionnement", "0", "false", "non", "n"):
+        return False
+    raise ValueError(f"type invalide (CAPEX/OPEX attendu) : {value!r}")
+
+def parse_value_date(value) -> Optional[date]:
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    txt = str(value).strip()
+    # Découpage direct plutôt que strptime, coûteux sur des centaines de milliers de lignes
+    try:
+        if "/" in txt:
+            parts = [int(p) for p in txt.split("/")]
+            if len(parts) == 3:      # JJ/MM/AAAA
+                return date(parts[2], parts[1], parts[0])
+            if len(parts) == 2:      # MM/AAAA
+                return date(parts[1], parts[0], 1)
+        else:
+            parts = [int(p) for p in txt[:10].split("-")]
+            if len(parts) == 3:      # AAAA-MM-JJ
+                return date(parts[0], parts[1], parts[2])
+            if len(parts) == 2:      # AAAA-MM
+                return date(parts[0], parts[1], 1)
+    except ValueError:
+        pass
+    raise ValueError(f"date invalide : {value!r}")
+
+
+# --- Lecture en flux ---
+def _iter_csv(path: Path) -> Iterator[Tuple[int, list, Optional[float]]]:
+    size = os.path.getsize(path) or 1
+    read = [0]  # octets consommés, pour la progression
+
+    encoding = ["utf-8-sig"]  # bascule définitive en Windows-1252 à la première ligne non UTF-8
+
+    def lines(fbin):
+        for number, raw in enumerate(fbin, start=1):
+            read[0] += len(raw)
+            try:
+                yield raw.decode(encoding[0])
+            except UnicodeDecodeError:
+                encoding[0] = FALLBACK_ENCODING
+                try:
+                    yield raw.decode(FALLBACK_ENCODING)
+                except UnicodeDecodeError:
+                    raise ValueError(f"Encodage non reconnu à la ligne {number} "
+                                     f"(UTF-8 ou Windows-1252 attendu)") from None
+
+    with open(path, "rb") as fbin:
+        sample = fbin.read(4096).decode("utf-8-sig", errors="ignore")
+        fbin.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = "excel"
+        reader = csv.reader(lines(fbin), dialect)
+        for values in reader:
+            yield reader.line_num, values, read[0] / size
+
+def _iter_xlsx(path: Path, sheet: Optional[str]) -> Iterator[Tuple[int, list, Optional[float]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("L'import XLSX nécessite le paquet openpyxl")
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet else wb.active
+        total = ws.max_row or 0
+        for i, values in enumerate(ws.iter_rows(values_only=True), start=1):
+            yield i, list(values), (i / total if total else None)
+    finally:
+        wb.close()
+
+def _iter_rows(path: Path, sheet: Optional[str]):
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        return _iter_xlsx(path, sheet)
+    return _iter_csv(path)
+
+
+# --- Import ---
+def load_project_codes(conn) -> Dict[str, int]:
+    return {code: pid for code, pid in conn.execute(select(Project.code, Project.id))}
+
+def load_project_statuses(conn) -> Dict[int, Optional[str]]:
+    return {pid: status for pid, status in conn.execute(select(Project.id, Project.status))}
+
+def import_budget_lines(path, progress: Optional[ProgressCallback] = None,
+                        batch_size: int = BATCH_SIZE, sheet: Optional[str] = None,
+                        progress_every: int = BATCH_SIZE) -> ImportReport:
+    """Importe le fichier dans une transaction unique ; tout est annulé en cas d'erreur fatale ou d'annulation.
+
+    Les lignes invalides (projet inconnu, montant illisible…) sont ignorées et
+    listées dans le rapport.
+    """
+    path = Path(path)
+    report = ImportReport()
+    rows = _iter_rows(path, sheet)
+    stmt = insert(BudgetLine)
+    with engine.begin() as conn:
+        codes = load_project_codes(conn)
+        statuses = load_project_statuses(conn)
+        deltas = rollup.new_deltas()  # monthly_rollup, appliqué en fin de transaction
+        totals: TotalsDeltas = {}      # projects.capex_cents…, idem (insert Core : pas d'after_flush)
+        columns: Optional[Dict[str, int]] = None
+        batch: List[dict] = []
+        line = 0
+        for line, values, fraction in rows:
+            if columns is None:
+                columns = _map_header(values)
+                continue
+            if not any(v not in (None, "") for v in values):
+                continue
+            try:
+                record = _convert(values, columns, codes)
+            except ValueError as e:
+                report.add_error(line, str(e))
+            else:
+                batch.append(record)
+                rollup.add_line(deltas, record["value_date"], statuses[record["project_id"]],
+                                record["amount_cents"], record["is_capex"])
+                add_line_to_totals(totals, record["project_id"], record["amount_cents"], record["is_capex"])
+            if len(batch) >= batch_size:
+                conn.execute(stmt, batch)
+                report.inserted += len(batch)
+                batch.clear()
+            if progress and line % progress_every == 0 and progress(line, fraction) is False:
+                raise ImportCancelled()
+        if columns is None:
+            raise ValueError("Fichier vide")
+        if batch:
+            conn.execute(stmt, batch)
+            report.inserted += len(batch)
+        rollup.apply(conn, deltas)
+        apply_project_totals(conn, totals)
+        if progress:
+            progress(line, 1.0)
+    cache.invalidate_region("budget_lines")
+    cache.invalidate_region("detail")
+    cache.invalidate_region("project")
+    return report
+
+def _map_header(values) -> Dict[str, int]:
+    columns = {}
+    for i, header in enumerate(values):
+        key = HEADER_ALIASES.get(_normalize(header))
+        if key and key not in columns:
+            columns[key] = i
+    missing = [f for f in REQUIRED_FIELDS if f not in columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+    return columns
+
+def _convert(values, columns: Dict[str, int], codes: Dict[str, int]) -> dict:
+    def get(key):
+        i = columns.get(key)
+        return values[i] if i is not None and i < len(values) else None
+
+    code = str(get("code") or "").strip()
+    project_id = codes.get(code)
+    if project_id is None:
+        raise ValueError(f"projet inconnu : {code!r}")
+    label = str(get("label") or "").strip()
+    if not label:
+        raise ValueError("libellé vide")
+    return {
+        "project_id": project_id,
+        "label": label[:255],
+        "amount_cents": euros_to_cents(get("amount")),
+        "is_capex": parse_kind(get("kind")),
+        "value_date": parse_value_date(get("value_date")),
+    }
@@ -0,0 +1,96 @@
+"""Totaux budgétaires (CAPEX / OPEX) calculés en SQL.
+
+Chaque fonction fait une seule requête : pas de boucle Python sur les lignes
+budgétaires, pas de requête par projet. Les totaux par projet et du
+portefeuille se lisent dans les colonnes projects.capex_cents / opex_cents /
+budget_line_count, tenues à jour à chaque écriture ; les ventilations par
+période restent des GROUP BY sur budget_lines.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import select, func, case
+
+from app.db.models import BudgetLine, Investment, Project
+from app.db.repo import get_session
+
+
+@dataclass(frozen=True)
+class BudgetTotals:
+    capex_cents: int = 0
+    opex_cents: int = 0
+    count: int = 0
+
+    @property
+    def total_cents(self) -> int:
+        return self.capex_cents + self.opex_cents
+
+
+@dataclass(frozen=True)
+class PeriodTotals:
+    period: Optional[str]  # 'YYYY-MM' ou 'YYYY' ; None si value_date vide
+    totals: BudgetTotals
+
+
+_AGGREGATES = (
+    func.coalesce(func.sum(case((BudgetLine.is_capex, BudgetLine.amount_cents), else_=0)), 0).label("capex_cents"),
+    func.coalesce(func.sum(case((BudgetLine.is_capex, 0), else_=BudgetLine.amount_cents)), 0).label("opex_cents"),
+    func.count(BudgetLine.id).label("count"),
+)
+
+# Colonnes maintenues sur projects (cf. app.db.models._track_budget_totals)
+_PROJECT_COLUMNS = (
+    Project.capex_cents, Project.opex_cents, Project.budget_line_count.label("count"),
+)
+
+def _totals(row) -> BudgetTotals:
+    return BudgetTotals(int(row.capex_cents), int(row.opex_cents), int(row.count))
+
+
+def project_totals(project_ids: Optional[Iterable[int]] = None) -> Dict[int, BudgetTotals]:
+    """Totaux par projet ayant des lignes ; limité à `project_ids` si fourni (ex. la page affichée)."""
+    stmt = select(Project.id, *_PROJECT_COLUMNS).where(Project.budget_line_count > 0)
+    if project_ids is not None:
+        ids = list(project_ids)
+        if not ids:
+            return {}
+        stmt = stmt.where(Project.id.in_(ids))
+    with get_session() as s:
+        return {row.id: _totals(row) for row in s.execute(stmt)}
+
+
+def portfolio_totals() -> BudgetTotals:
+    """Totaux sur l'ensemble du portefeuille."""
+    with get_session() as s:
+        return _totals(s.execute(select(
+            func.coalesce(func.sum(Project.capex_cents), 0).label("capex_cents"),
+            func.coalesce(func.sum(Project.opex_cents), 0).label("opex_cents"),
+            func.coalesce(func.sum(Project.budget_line_count), 0).label("count"),
+        )).one())
+
+
+def _period_breakdown(fmt: str, project_id: Optional[int]) -> List[PeriodTotals]:
+    period = func.strftime(fmt, BudgetLine.value_date).label("period")
+    stmt = select(period, *_AGGREGATES).group_by(period).order_by(period)
+    if project_id is not None:
+        stmt = stmt.where(BudgetLine.project_id == project_id)
+    with get_session() as s:
+        return [PeriodTotals(row.period, _totals(row)) for row in s.execute(stmt)]
+
+
+def monthly_breakdown(project_id: Optional[int] = None) -> List[PeriodTotals]:
+    """Totaux par mois de value_date, pour un projet ou tout le portefeuille."""
+    return _period_breakdown("%Y-%m", project_id)
+
+
+def yearly_breakdown(project_id: Optional[int] = None) -> List[PeriodTotals]:
+    """Totaux par année de value_date, pour un projet ou tout le portefeuille."""
+    return _period_breakdown("%Y", project_id)
+
+
+def investment_totals_by_year() -> Dict[str, float]:
+    """Montant des investissements par année d'achat (index sur investments.date)."""
+    year = func.strftime("%Y", Investment.date).label("year")
+    stmt = select(year, func.sum(Investment.montant)).group_by(year).order_by(year)
+    with get_session() as s:
+        return {y: float(total) for y, total in s.execute(stmt)}
@@ -0,0 +1,118 @@
+"""Données du tableau de bord, lues uniquement dans monthly_rollup.
+
+Une seule requête sur une table de quelques centaines de lignes (mois × état) :
+le coût ne dépend pas du nombre de lignes budgétaires. Les projets actifs
+se déduisent des compteurs projects_started / projects_ended par sommes
+cumulées.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List
+
+from sqlalchemy import select
+
+from app.db.models import MonthlyRollup
+from app.db.repo import get_session
+
+
+@dataclass(frozen=True)
+class MonthPoint:
+    month: str            # 'YYYY-MM'
+    capex_cents: int
+    opex_cents: int
+    active_projects: int
+
+    @property
+    def total_cents(self) -> int:
+        return self.capex_cents + self.opex_cents
+
+
+@dataclass(frozen=True)
+class YearSummary:
+    year: str             # 'YYYY' ; '' pour les lignes sans date / projets sans début
+    capex_cents: int
+    opex_cents: int
+    line_count: int
+    subvention_cents: int
+    active_by_status: Dict[str, int]  # projets actifs au moins un mois de l'année
+
+    @property
+    def total_cents(self) -> int:
+        return self.capex_cents + self.opex_cents
+
+
+@dataclass(frozen=True)
+class Dashboard:
+    months: List[MonthPoint]
+    years: List[YearSummary]
+    statuses: List[str]
+
+
+def _next_month(month: str) -> str:
+    year, m = int(month[:4]), int(month[5:7])
+    return f"{year + m // 12}-{m % 12 + 1:02d}"
+
+def _month_range(first: str, last: str) -> List[str]:
+    months = [first]
+    while months[-1] < last:
+        months.append(_next_month(months[-1]))
+    return months
+
+
+def load_dashboard() -> Dashboard:
+    with get_session() as s:
+        rows = s.execute(select(
+            MonthlyRollup.month, MonthlyRollup.status, MonthlyRollup.capex_cents, MonthlyRollup.opex_cents,
+            MonthlyRollup.line_count, MonthlyRollup.subvention_cents,
+            MonthlyRollup.projects_started, MonthlyRollup.projects_ended,
+        )).all()
+
+    statuses = sorted({r.status for r in rows})
+    dated = sorted({r.month for r in rows if r.month})
+    by_month: Dict[str, List] = defaultdict(list)
+    for r in rows:
+        by_month[r.month].append(r)
+
+    # Projets actifs au mois m, par état : actifs de m−1, moins ceux finis en m−1, plus ceux débutés en m
+    months: List[MonthPoint] = []
+    active_months: Dict[str, Dict[str, int]] = {}
+    active: Dict[str, int] = defaultdict(int)
+    ended_last_month: Dict[str, int] = {}
+    for month in (_month_range(dated[0], dated[-1]) if dated else []):
+        for status, n in ended_last_month.items():
+            active[status] -= n
+        ended_last_month = defaultdict(int)
+        cells = by_month.get(month, [])
+        for c in cells:
+            active[c.status] += c.projects_started
+            ended_last_month[c.status] += c.projects_ended
+        active_months[month] = dict(active)
+        months.append(MonthPoint(
+            month,
+            sum(c.capex_cents for c in cells),
+            sum(c.opex_cents for c in cells),
+            sum(active.values()),
+        ))
+
+    years: List[YearSummary] = []
+    year_keys = sorted({m[:4] for m in active_months} | ({""} if "" in by_month else set()))
+    for year in year_keys:
+        cells = [c for m, cs in by_month.items() if m[:4] == year for c in cs]
+        in_year: Dict[str, int] = {}
+        if year:
+            # Actif dans l'année = actif au 1er mois + débuts dans l'année
+            year_months = [m for m in active_months if m[:4] == year]
+            first = active_months[year_months[0]]
+            for status in statuses:
+                started_later = sum(c.projects_started for m in year_months[1:]
+                                    for c in by_month.get(m, []) if c.status == status)
+                in_year[status] = first.get(status, 0) + started_later
+        years.append(YearSummary(
+            year,
+            sum(c.capex_cents for c in cells),
+            sum(c.opex_cents for c in cells),
+            sum(c.line_count for c in cells),
+            sum(c.subvention_cents for c in cells),
+            in_year,
+        ))
+    return Dashboard(months, years, statuses)
@@ -0,0 +1,331 @@
+"""Export du portefeuille (projets, lignes budgétaires, investissements, news).
+
+Chaque jeu de données est une seule requête (jointure sur le code projet, pas
+de requête par projet) lue par paquets (`yield_per`) et écrite au fil de
+l'eau : la mémoire reste bornée par la taille d'un paquet, quel que soit le
+volume exporté. Tous les jeux sont lus dans une même transaction de lecture :
+projets, lignes, investissements et news viennent du même instantané.
+
+Formats :
+- csv     : un fichier <jeu>.csv par jeu de données dans le dossier cible ;
+- xlsx    : un classeur, une feuille par jeu (openpyxl en écriture seule) ;
+- parquet : un fichier <jeu>.parquet par jeu (pyarrow, un row group par paquet).
+"""
+import csv
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func, select
+
+from app.db.models import engine, Project, BudgetLine, Investment, ProjectNews, ProjectTheme
+
+CHUNK_SIZE = 5000
+FORMATS = ("csv", "xlsx", "parquet")
+XLSX_MAX_ROWS = 1_048_576  # limite d'une feuille Excel, en-tête compris
+
+# progress(lignes écrites, fraction du total) ; retourner False annule l'export
+ProgressCallback = Callable[[int, Optional[float]], Optional[bool]]
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+@dataclass
+class ExportReport:
+    rows: Dict[str, int] = field(default_factory=dict)   # jeu -> lignes écrites
+    files: List[Path] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return sum(self.rows.values())
+
+
+# --- Jeux de données ---
+# Colonnes (nom, type) ; le type sert au schéma Parquet : int, float, bool, str, date, datetime
+Columns = Sequence[Tuple[str, str]]
+
+def _themes_of_project():
+    return (
+        select(func.group_concat(ProjectTheme.theme, ", "))
+        .where(ProjectTheme.project_id == Project.id)
+        .scalar_subquery()
+    )
+
+def _projects():
+    stmt = select(
+        Project.id, Project.code, Project.name, Project.owner, Project.status,
+        Project.start_date, Project.end_date,
+        Project.cir, Project.cir_montant, Project.subvention, Project.subvention_montant,
+        Project.amortissement, _themes_of_project().label("themes"),
+        Project.description, Project.deliverables, Project.created_at, Project.updated_at,
+    ).order_by(Project.id)
+    columns = [
+        ("id", "int"), ("code", "str"), ("name", "str"), ("owner", "str"), ("status", "str"),
+        ("start_date", "date"), ("end_date", "date"),
+        ("cir", "bool"), ("cir_montant", "float"), ("subvention", "bool"), ("subvention_montant", "float"),
+        ("amortissement", "bool"), ("themes", "str"),
+        ("description", "str"), ("deliverables", "str"), ("created_at", "datetime"), ("updated_at", "datetime"),
+    ]
+    return stmt, columns
+
+def _budget_lines():
+    stmt = select(
+        BudgetLine.id, BudgetLine.project_id, Project.code, BudgetLine.label,
+        case((BudgetLine.is_capex, "CAPEX"), else_="OPEX"),
+        BudgetLine.amount_cents, BudgetLine.value_date, BudgetLine.created_at,
+    ).join(Project, Project.id == BudgetLine.project_id).order_by(BudgetLine.id)
+    columns = [
+        ("id", "int"), ("project_id", "int"), ("project_code", "str"), ("label", "str"),
+        ("type", "str"), ("amount_cents", "int"), ("value_date", "date"), ("created_at", "datetime"),
+    ]
+    return stmt, columns
+
+def _investments():
+    stmt = select(
+        Investment.id, Investment.project_id, Project.code,
+        Investment.montant, Investment.date, Investment.duree_mois,
+    ).join(Project, Project.id == Investment.project_id).order_by(Investment.id)
+    columns = [
+        ("id", "int"), ("project_id", "int"), ("project_code", "str"),
+        ("montant", "float"), ("date", "date"), ("duree_mois", "int"),
+    ]
+    return stmt, columns
+
+def _news():
+    stmt = select(
+        ProjectNews.id, ProjectNews.project_id, Project.code, ProjectNews.created_at, ProjectNews.text,
+    ).join(Project, Project.id == ProjectNews.project_id).order_by(ProjectNews.id)
+    columns = [
+        ("id", "int"), ("project_id", "int"), ("project_code", "str"), ("created_at", "datetime"), ("text", "str"),
+    ]
+    return stmt, columns
+
+DATASETS = {
+    "projects": (Project, _projects),
+    "budget_lines": (BudgetLine, _budget_lines),
+    "investments": (Investment, _investments),
+    "news": (ProjectNews, _news),
+}
+
+
+# --- Writers ---
+# open(nom du jeu, colonnes) / write(paquet de lignes) / end() par jeu, puis
+# close() ; abort() à la place de close() abandonne l'écriture sans rien finaliser
+class _CsvWriter:
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.files: List[Path] = []
+        self._fh = None
+        self._writer = None
+
+    def open(self, name: str, columns: Columns) -> None:
+        path = self.folder / f"{name}.csv"
+        # ';' + BOM : ouverture directe dans Excel en locale française. BOM écrit
+        # à la main : le codec utf-8-sig est nettement plus lent ligne à ligne
+        self._fh = open(path, "w", newline="", encoding="utf-8", buffering=1 << 20)
+        self._fh.write("\ufeff")
+        self._writer = csv.writer(self._fh, delimiter=";")
+        self._writer.writerow([c for c, _ in columns])
+        self.files.append(path)
+
+    def write(self, rows) -> None:
+        self._writer.writerows(rows)
+
+    def end(self) -> None:
+        self._fh.close()
+        self._fh = self._writer = None
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+
+    def abort(self) -> None:
+        self.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path: Path):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("L'export XLSX nécessite le paquet openpyxl")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.files = [path]
+        # write_only : les lignes partent dans des fichiers temporaires, pas en mémoire
+        self._wb = Workbook(write_only=True)
+        self._ws = None
+        self._name = ""
+        self._header: List[str] = []
+        self._sheets = 0
+        self._count = 0
+
+    def _new_sheet(self) -> None:
+        self._sheets += 1
+        title = self._name if self._sheets == 1 else f"{self._name} ({self._sheets})"
+        self._ws = self._wb.create_sheet(title=title[:31])
+        self._ws.append(self._header)
+        self._count = 1
+
+    def open(self, name: str, columns: Columns) -> None:
+        self._name, self._header, self._sheets = name, [c for c, _ in columns], 0
+        self._new_sheet()
+
+    def write(self, rows) -> None:
+        for row in rows:
+            if self._count >= XLSX_MAX_ROWS:
+                # Au-delà d'un million de lignes, suite sur une nouvelle feuille
+                self._new_sheet()
+            self._ws.append(tuple(row))
+            self._count += 1
+
+    def end(self) -> None:
+        self._ws = None
+
+    def close(self) -> None:
+        self._wb.save(self.path)
+
+    def abort(self) -> None:
+        """Abandonne le classeur sans l'enregistrer : seuls les temporaires des feuilles sont supprimés."""
+        for ws in self._wb.worksheets:
+            writer = getattr(ws, "_writer", None)  # openpyxl write-only : flux XML vers un temporaire
+            if writer is None:
+                continue
+            try:
+                ws.close()  # ferme le flux (balises de fin seulement, pas de classeur zippé)
+                writer.cleanup()
+            except (AttributeError, OSError, ValueError):
+                pass
+        self._wb = self._ws = None
+
+
+class _ParquetWriter:
+    def __init__(self, folder: Path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("L'export Parquet nécessite le paquet pyarrow")
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.folder = folder
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.files: List[Path] = []
+        self._writer = None
+        self._schema = None
+
+    def _type(self, kind: str):
+        pa = self.pa
+        return {
+            "int": pa.int64(), "float": pa.float64(), "bool": pa.bool_(), "str": pa.string(),
+            "date": pa.date32(), "datetime": pa.timestamp("us"),
+        }[kind]
+
+    def open(self, name: str, columns: Columns) -> None:
+        path = self.folder / f"{name}.parquet"
+        # Schéma explicite : un paquet entièrement NULL ne doit pas changer le type d'une colonne
+        self._schema = self.pa.schema([(c, self._type(kind)) for c, kind in columns])
+        self._writer = self.pq.ParquetWriter(path, self._schema)
+        self.files.append(path)
+
+    def write(self, rows) -> None:
+        arrays = [self.pa.array(values, type=f.type) for values, f in zip(zip(*rows), self._schema)]
+        self._writer.write_table(self.pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def end(self) -> None:
+        self._writer.close()
+        self._writer = None
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+    def abort(self) -> None:
+        # pyarrow ne sait pas abandonner un fichier : fermé ici, supprimé par l'appelant
+        self.close()
+
+
+def _writer_for(fmt: str, path: Path):
+    if fmt == "csv":
+        return _CsvWriter(path)
+    if fmt == "xlsx":
+        return _XlsxWriter(path)
+    if fmt == "parquet":
+        return _ParquetWriter(path)
+    raise ValueError(f"Format inconnu : {fmt!r} ({', '.join(FORMATS)})")
+
+
+def guess_format(path) -> str:
+    """Format d'après l'extension : .xlsx -> xlsx, .parquet -> parquet, sinon csv."""
+    suffix = Path(path).suffix.lower()
+    if suffix in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if suffix in (".parquet", ".pq"):
+        return "parquet"
+    return "csv"
+
+
+# --- Export ---
+def _begin_snapshot(conn) -> None:
+    """Ouvre la transaction de lecture : sans BEGIN, pysqlite lit chaque SELECT dans son propre instantané."""
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN")
+
+def count_rows(datasets: Sequence[str], conn=None) -> int:
+    if conn is None:
+        with engine.connect() as conn:
+            return count_rows(datasets, conn)
+    return sum(conn.execute(select(func.count()).select_from(DATASETS[d][0])).scalar() or 0
+               for d in datasets)
+
+def export_portfolio(path, fmt: Optional[str] = None, datasets: Optional[Sequence[str]] = None,
+                     progress: Optional[ProgressCallback] = None,
+                     chunk_size: int = CHUNK_SIZE) -> ExportReport:
+    """Exporte les jeux de données demandés (tous par défaut).
+
+    `path` est un fichier pour xlsx, un dossier pour csv et parquet (un fichier
+    par jeu ; pour parquet, un chemin en .parquet désigne ce dossier).
+    """
+    path = Path(path)
+    fmt = fmt or guess_format(path)
+    if fmt == "parquet" and path.suffix.lower() == ".parquet":
+        path = path.with_suffix("")
+    datasets = list(datasets or DATASETS)
+    unknown = [d for d in datasets if d not in DATASETS]
+    if unknown:
+        raise ValueError(f"Jeu(x) de données inconnu(s) : {', '.join(unknown)}")
+
+    report = ExportReport()
+    written = 0
+    writer = _writer_for(fmt, path)
+    try:
+        with engine.connect() as conn:
+            _begin_snapshot(conn)
+            total = count_rows(datasets, conn) if progress else 0
+            for name in datasets:
+                stmt, columns = DATASETS[name][1]()
+                writer.open(name, columns)
+                report.rows[name] = 0
+                result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+                for chunk in result.partitions():
+                    writer.write(chunk)
+                    report.rows[name] += len(chunk)
+                    written += len(chunk)
+                    if progress and progress(written, written / total if total else None) is False:
+                        result.close()
+                        raise ExportCancelled()
+                writer.end()
+    except BaseException:
+        # Pas de fichier tronqué en cas d'erreur ou d'annulation (ni de classeur enregistré pour rien)
+        writer.abort()
+        for f in writer.files:
+            f.unlink(missing_ok=True)
+        raise
+    writer.close()
+    report.files = list(writer.files)
+    if progress:
+        progress(written, 1.0)
+    return report
@@ -0,0 +1,51 @@
+"""Modification groupée des projets sélectionnés (repo.bulk_update_projects)."""
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QFormLayout, QComboBox, QLineEdit, QCheckBox, QDialogButtonBox, QLabel
+)
+
+
+class BulkEditDialog(QDialog):
+    """Seuls les champs cochés sont modifiés ; les autres gardent la valeur de chaque projet."""
+
+    def __init__(self, count: int, statuses, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Modifier la sélection")
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(f"{count} projet(s) sélectionné(s)"))
+        form = QFormLayout()
+
+        self.status_check = QCheckBox("État")
+        self.status_combo = QComboBox()
+        self.status_combo.addItems(statuses)
+        form.addRow(self.status_check, self.status_combo)
+
+        self.owner_check = QCheckBox("Responsable")
+        self.owner_edit = QLineEdit()
+        form.addRow(self.owner_check, self.owner_edit)
+
+        self.end_check = QCheckBox("Fin (AAAA-MM)")
+        self.end_edit = QLineEdit()
+        self.end_edit.setPlaceholderText("vide = sans date de fin")
+        form.addRow(self.end_check, self.end_edit)
+        layout.addLayout(form)
+
+        for check, widget in ((self.status_check, self.status_combo), (self.owner_check, self.owner_edit),
+                              (self.end_check, self.end_edit)):
+            widget.setEnabled(False)
+            check.toggled.connect(widget.setEnabled)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def get_data(self) -> dict:
+        """Champs à affecter ; end_date reste au format 'YYYY-MM' (converti par l'appelant)."""
+        data = {}
+        if self.status_check.isChecked():
+            data["status"] = self.status_combo.currentText()
+        if self.owner_check.isChecked():
+            data["owner"] = self.owner_edit.text().strip() or None
+        if self.end_check.isChecked():
+            data["end_date"] = self.end_edit.text().strip()
+        return data
@@ -0,0 +1,132 @@
+"""Tableau de bord du portefeuille (lu dans monthly_rollup, cf. app.services.dashboard)."""
+from typing import List, Optional
+
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QColor, QPainter, QPen
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QWidget, QSizePolicy
+)
+
+from app.services.dashboard import Dashboard, MonthPoint, load_dashboard
+from .db_executor import db_executor
+from .formatting import fmt_euros, cents_to_euros
+
+CAPEX_COLOR = QColor("#2f6fb0")
+OPEX_COLOR = QColor("#e0912f")
+
+
+class MonthlySpendChart(QWidget):
+    """Barres empilées CAPEX / OPEX par mois, repères au mois de janvier."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._months: List[MonthPoint] = []
+        self.setMinimumHeight(220)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMouseTracking(True)
+
+    def set_months(self, months: List[MonthPoint]):
+        self._months = months
+        self.update()
+
+    def _bar_at(self, x: float) -> Optional[int]:
+        if not self._months:
+            return None
+        i = int((x - 8) / max((self.width() - 16) / len(self._months), 1))
+        return i if 0 <= i < len(self._months) else None
+
+    def mouseMoveEvent(self, event):
+        i = self._bar_at(event.position().x())
+        if i is None:
+            self.setToolTip("")
+            return
+        m = self._months[i]
+        self.setToolTip(f"{m.month}\nCAPEX {fmt_euros(cents_to_euros(m.capex_cents))}\n"
+                        f"OPEX {fmt_euros(cents_to_euros(m.opex_cents))}\n{m.active_projects} projet(s) actif(s)")
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        if not self._months:
+            painter.drawText(self.rect(), Qt.AlignCenter, "Aucune dépense datée")
+            return
+        left, top, bottom = 8.0, 8.0, 22.0
+        width = self.width() - 2 * left
+        height = self.height() - top - bottom
+        peak = max(m.total_cents for m in self._months) or 1
+        step = width / len(self._months)
+        bar = max(step * 0.8, 1.0)
+        painter.setPen(Qt.NoPen)
+        for i, m in enumerate(self._months):
+            x = left + i * step
+            capex_h = height * max(m.capex_cents, 0) / peak
+            opex_h = height * max(m.opex_cents, 0) / peak
+            base = top + height
+            painter.setBrush(CAPEX_COLOR)
+            painter.drawRect(QRectF(x, base - capex_h, bar, capex_h))
+            painter.setBrush(OPEX_COLOR)
+            painter.drawRect(QRectF(x, base - capex_h - opex_h, bar, opex_h))
+        painter.setPen(QPen(self.palette().text().color()))
+        for i, m in enumerate(self._months):
+            if m.month.endswith("-01") or i == 0:
+                painter.drawText(QRectF(left + i * step, top + height + 2, 60, bottom), Qt.AlignLeft, m.month[:4])
+
+
+class DashboardDialog(QDialog):
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Tableau de bord du portefeuille")
+        self.resize(1100, 700)
+        self.db = db_executor()
+        layout = QVBoxLayout(self)
+
+        bar = QHBoxLayout()
+        legend = QLabel(f"<span style='color:{CAPEX_COLOR.name()}'>■</span> CAPEX &nbsp; "
+                        f"<span style='color:{OPEX_COLOR.name()}'>■</span> OPEX — dépenses par mois de valeur")
+        legend.setTextFormat(Qt.RichText)
+        bar.addWidget(legend)
+        bar.addStretch(1)
+        self.status_label = QLabel()
+        bar.addWidget(self.status_label)
+        btn_refresh = QPushButton("Actualiser")
+        btn_refresh.clicked.connect(self.refresh)
+        bar.addWidget(btn_refresh)
+        layout.addLayout(bar)
+
+        self.chart = MonthlySpendChart()
+        layout.addWidget(self.chart, 2)
+
+        self.table = QTableWidget(0, 0)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        layout.addWidget(self.table, 1)
+        self.refresh()
+
+    def refresh(self):
+        self.status_label.setText("Chargement…")
+        self.db.read(load_dashboard).then(self._show, self._failed)
+
+    def _failed(self, error):
+        self.status_label.setText(f"Tableau de bord indisponible : {error}")
+
+    def _show(self, dashboard: Dashboard):
+        self.status_label.setText("")
+        self.chart.set_months(dashboard.months)
+        headers = ["Année", "CAPEX", "OPEX", "Total", "Lignes", "Subventions"]
+        headers += [f"Actifs — {s or 'sans état'}" for s in dashboard.statuses]
+        self.table.clear()
+        self.table.setColumnCount(len(headers))
+        self.table.setHorizontalHeaderLabels(headers)
+        self.table.setRowCount(len(dashboard.years))
+        for row, y in enumerate(dashboard.years):
+            values = [y.year or "Sans date", fmt_euros(cents_to_euros(y.capex_cents)),
+                      fmt_euros(cents_to_euros(y.opex_cents)), fmt_euros(cents_to_euros(y.total_cents)),
+                      str(y.line_count), fmt_euros(cents_to_euros(y.subvention_cents))]
+            values += [str(y.active_by_status.get(s, 0)) if y.year else "—" for s in dashboard.statuses]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col > 0:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
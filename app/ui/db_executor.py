@@ -0,0 +1,161 @@
+"""Exécution des appels repo hors du thread GUI.
+
+Les lectures passent par un petit pool de threads, les écritures par un
+unique thread (SQLite n'a qu'un écrivain à la fois, et l'ordre des écritures
+est ainsi conservé). Chaque appel renvoie un `DbFuture` dont les callbacks
+sont toujours exécutés dans le thread GUI.
+"""
+from typing import Any, Callable, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal, Slot
+
+
+class DbFuture(QObject):
+    """Résultat à venir d'un appel repo ; callbacks appelés dans le thread GUI."""
+
+    succeeded = Signal(object)
+    failed = Signal(object)
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._cancelled = False
+        self._done = False
+        self._ok = True
+        self._value: Any = None
+
+    def then(self, on_success: Callable[[Any], None],
+             on_error: Optional[Callable[[Exception], None]] = None) -> "DbFuture":
+        if self._done:
+            # Déjà terminé (mode inline) : appel immédiat
+            if self._cancelled:
+                return self
+            if self._ok:
+                on_success(self._value)
+            elif on_error is not None:
+                on_error(self._value)
+            return self
+        self.succeeded.connect(on_success)
+        if on_error is not None:
+            self.failed.connect(on_error)
+        return self
+
+    def cancel(self) -> None:
+        """Ignore le résultat (la requête, elle, va à son terme)."""
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled
+
+    def is_done(self) -> bool:
+        return self._done
+
+
+class _Relay(QObject):
+    """Vit dans le thread GUI : reçoit les résultats des workers en file (queued)."""
+
+    deliver = Signal(object, bool, object)  # (future, succès, résultat ou exception)
+
+    def __init__(self, executor: "DbExecutor"):
+        super().__init__(executor)
+        self._executor = executor
+        self.deliver.connect(self._on_deliver)
+
+    @Slot(object, bool, object)
+    def _on_deliver(self, future: DbFuture, ok: bool, value: Any) -> None:
+        self._executor._finish(future, ok, value)
+
+
+class _Task(QRunnable):
+    def __init__(self, relay: _Relay, future: DbFuture, fn: Callable, args, kwargs):
+        super().__init__()
+        self.relay = relay
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+
+    def run(self) -> None:
+        if self.future.is_cancelled():
+            self.relay.deliver.emit(self.future, True, None)
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.relay.deliver.emit(self.future, False, e)
+        else:
+            self.relay.deliver.emit(self.future, True, result)
+
+
+class DbExecutor(QObject):
+    """Pool de lecture + écrivain unique pour les fonctions de app.db.repo.
+
+    `inline=True` exécute chaque appel aussitôt dans le thread appelant (tests,
+    benchmarks) : le futur est déjà résolu quand `then()` est appelé.
+    """
+
+    busy_changed = Signal(bool)
+
+    def __init__(self, readers: int = 2, inline: bool = False, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.inline = inline
+        self._readers = QThreadPool(self)
+        self._readers.setMaxThreadCount(max(readers, 1))
+        self._writer = QThreadPool(self)
+        self._writer.setMaxThreadCount(1)
+        self._relay = _Relay(self)
+        self._pending = 0
+
+    def read(self, fn: Callable, *args, **kwargs) -> DbFuture:
+        return self._submit(self._readers, fn, args, kwargs)
+
+    def write(self, fn: Callable, *args, **kwargs) -> DbFuture:
+        return self._submit(self._writer, fn, args, kwargs)
+
+    def is_busy(self) -> bool:
+        return self._pending > 0
+
+    def wait(self, msecs: int = -1) -> None:
+        """Attend la fin des tâches en cours (fermeture de l'application, tests)."""
+        self._writer.waitForDone(msecs)
+        self._readers.waitForDone(msecs)
+
+    def _submit(self, pool: QThreadPool, fn: Callable, args, kwargs) -> DbFuture:
+        future = DbFuture(None if self.inline else self)
+        self._pending += 1
+        if self._pending == 1:
+            self.busy_changed.emit(True)
+        if self.inline:
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._finish(future, False, e)
+            else:
+                self._finish(future, True, result)
+            return future
+        pool.start(_Task(self._relay, future, fn, args, kwargs))
+        return future
+
+    def _finish(self, future: DbFuture, ok: bool, value: Any) -> None:
+        self._pending -= 1
+        future._done = True
+        future._ok = ok
+        future._value = value
+        if not future.is_cancelled():
+            if ok:
+                future.succeeded.emit(value)
+            else:
+                future.failed.emit(value)
+        if not self.inline:
+            future.deleteLater()
+        if self._pending == 0:
+            self.busy_changed.emit(False)
+
+
+_executor: Optional[DbExecutor] = None
+
+def db_executor() -> DbExecutor:
+    """Exécuteur partagé de l'application (créé au premier appel, dans le thread GUI)."""
+    global _executor
+    if _executor is None:
+        _executor = DbExecutor()
+    return _executor
@@ -0,0 +1,139 @@
+"""Panneau de diagnostic : requêtes SQL les plus coûteuses depuis le lancement."""
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QCheckBox, QSpinBox,
+    QTableWidget, QTableWidgetItem, QHeaderView, QSplitter, QPlainTextEdit
+)
+
+from app.db import instrumentation
+from app.db.cache import cache
+from app.db.models import engine
+
+TOP_N = 30
+REFRESH_MS = 2000
+
+
+class DiagnosticsDialog(QDialog):
+    HEADERS = ["Total (ms)", "Appels", "Moyenne (ms)", "Max (ms)", "Lignes", "Appelant", "Requête"]
+
+    def __init__(self, parent=None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Diagnostics — requêtes SQL")
+        self.resize(1100, 650)
+        layout = QVBoxLayout(self)
+
+        bar = QHBoxLayout()
+        self.enabled_check = QCheckBox("Instrumentation active")
+        self.enabled_check.setChecked(instrumentation.is_enabled())
+        self.enabled_check.toggled.connect(self._on_toggled)
+        bar.addWidget(self.enabled_check)
+
+        bar.addWidget(QLabel("Seuil requête lente :"))
+        self.threshold_spin = QSpinBox()
+        self.threshold_spin.setRange(1, 60_000)
+        self.threshold_spin.setSuffix(" ms")
+        self.threshold_spin.setValue(int(instrumentation.slow_threshold_ms()))
+        self.threshold_spin.valueChanged.connect(self._on_threshold_changed)
+        bar.addWidget(self.threshold_spin)
+        bar.addStretch(1)
+
+        btn_reset = QPushButton("Remettre à zéro")
+        btn_reset.clicked.connect(self._on_reset)
+        bar.addWidget(btn_reset)
+        btn_refresh = QPushButton("Actualiser")
+        btn_refresh.clicked.connect(self.refresh)
+        bar.addWidget(btn_refresh)
+        layout.addLayout(bar)
+
+        self.hint = QLabel()
+        self.hint.setWordWrap(True)
+        layout.addWidget(self.hint)
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+
+        splitter = QSplitter(Qt.Vertical)
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(len(self.HEADERS) - 1, QHeaderView.Stretch)
+        self.table.itemSelectionChanged.connect(self._show_selected)
+        splitter.addWidget(self.table)
+
+        self.details = QPlainTextEdit()
+        self.details.setReadOnly(True)
+        self.details.setPlaceholderText("Requêtes lentes (avec plan d'exécution) et détail de la requête sélectionnée")
+        splitter.addWidget(self.details)
+        splitter.setSizes([420, 200])
+        layout.addWidget(splitter, 1)
+
+        self._stats = []
+        self._timer = QTimer(self)
+        self._timer.setInterval(REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+        self.refresh()
+
+    def _on_toggled(self, checked: bool):
+        if checked:
+            instrumentation.enable(engine, self.threshold_spin.value())
+        else:
+            instrumentation.disable(engine)
+        self.refresh()
+
+    def _on_threshold_changed(self, value: int):
+        if instrumentation.is_enabled():
+            instrumentation.enable(engine, value)
+
+    def _on_reset(self):
+        instrumentation.reset_stats()
+        cache.reset_stats()
+        self.refresh()
+
+    def refresh(self):
+        if not instrumentation.is_enabled():
+            self.hint.setText("Instrumentation inactive : cochez la case, ou lancez l'application avec "
+                              "DB_INSTRUMENT=1 pour compter aussi les lignes lues par les SELECT.")
+        else:
+            self.hint.setText(f"Top {TOP_N} par temps cumulé depuis le lancement ; requêtes lentes "
+                              f"≥ {instrumentation.slow_threshold_ms():.0f} ms journalisées avec leur plan.")
+        regions = cache.stats()
+        self.cache_label.setText("Cache de lecture — " + (" ; ".join(
+            f"{r} : {s['hits']} hit(s) / {s['misses']} miss, {s['entries']} entrée(s)"
+            for r, s in regions.items()) or "aucune lecture"))
+        selected = self.table.currentRow()
+        self._stats = instrumentation.top_queries(TOP_N)
+        self.table.setRowCount(len(self._stats))
+        for row, s in enumerate(self._stats):
+            values = [f"{s.total_ms:.1f}", str(s.calls), f"{s.mean_ms:.2f}", f"{s.max_ms:.1f}",
+                      str(s.rows), s.caller, s.statement]
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if col < 5:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.table.setItem(row, col, item)
+        if 0 <= selected < len(self._stats):
+            self.table.selectRow(selected)
+        else:
+            self._show_selected()
+
+    def _show_selected(self):
+        parts = []
+        row = self.table.currentRow()
+        if 0 <= row < len(self._stats):
+            s = self._stats[row]
+            parts.append(f"{s.caller} — {s.calls} appel(s), {s.total_ms:.1f} ms\n{s.statement}\n")
+        slow = instrumentation.slow_queries()
+        if slow:
+            parts.append(f"Requêtes lentes récentes ({len(slow)}) :")
+        for q in slow:
+            rows = "?" if q.rows is None else q.rows
+            parts.append(f"[{q.at:%H:%M:%S}] {q.elapsed_ms:.1f} ms — {q.caller} — {rows} ligne(s)\n"
+                         f"  {q.statement}")
+            parts.extend(f"    {step}" for step in q.plan)
+        self.details.setPlainText("\n".join(parts))
+
+    def closeEvent(self, event):
+        self._timer.stop()
+        super().closeEvent(event)
@@ -0,0 +1,32 @@
+"""Formats d'affichage partagés (montants, dates), sans dépendance aux dialogues."""
+from __future__ import annotations
+from datetime import date, datetime
+from typing import Optional
+
+from PySide6.QtCore import QLocale
+
+EURO = QLocale(QLocale.Language.French, QLocale.Country.France)
+
+def fmt_month_yyyy(d: Optional[date]) -> str:
+    if not d:
+        return "—"
+    return EURO.toString(d, "MMMM yyyy")
+
+def fmt_euros(v: Optional[float]) -> str:
+    if v is None:
+        return "—"
+    return EURO.toCurrencyString(float(v), symbol="€")
+
+def cents_to_euros(cents: Optional[int]) -> Optional[float]:
+    if cents is None: return None
+    return round(cents / 100.0, 2)
+
+def fmt_dt_hm(dt: datetime | str | None) -> str:
+    if not dt:
+        return "—"
+    if isinstance(dt, str):
+        try:
+            dt = datetime.fromisoformat(dt)
+        except Exception:
+            return dt
+    return dt.strftime("%d/%m/%Y %H:%M")
@@ -1,11 +1,21 @@
-from PySide6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QLabel, QHBoxLayout, QPushButton, QTableView, QMessageBox
-from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PySide6.QtWidgets import (
+    QMainWindow, QWidget, QVBoxLayout, QLabel, QHBoxLayout, QPushButton, QTableView, QMessageBox,
+    QLineEdit, QComboBox, QListWidget, QListWidgetItem, QFileDialog, QProgressDialog, QDialog
+)
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, QObject, Signal
 from datetime import datetime
+import threading
 
-from app.db.repo import list_projects, create_project, update_project, delete_project
-from .project_form import ProjectFormDialog
-from .project_detail import ProjectDetailDialog
-from PySide6.QtWidgets import QDialog
+from app.db.repo import (
+    query_projects, project_rows, page_cursor, count_projects, list_project_owners, get_project, get_project_detail,
+    search,
+    create_project, update_project, delete_project, bulk_update_projects, bulk_delete_projects,
+    ProjectFilter, ProjectOrder, Page, PROJECT_PAGE_SIZE
+)
+from .db_executor import db_executor, DbExecutor
+from .formatting import fmt_euros, cents_to_euros
+# Dialogues (formulaire, détail + NumPy) et import / export : importés au
+# premier usage pour ne pas ralentir l'ouverture de la fenêtre
 
 
 def parse_ym_to_date(s: str):
@@ -15,17 +25,190 @@ def parse_ym_to_date(s: str):
         return None
 
 
+STATUSES = ["Futur", "En cours", "Terminé"]
+
+
+def fetch_project_page(flt: ProjectFilter, order: ProjectOrder, after, limit: int):
+    """Page de la liste, totaux budgétaires compris (exécuté hors thread GUI)."""
+    return query_projects(flt, order, Page(after=after, limit=limit))
+
+
+def fetch_project_rows(project_ids, flt: ProjectFilter, order: ProjectOrder):
+    """Lignes de projets créés / modifiés, s'ils passent le filtre (hors thread GUI)."""
+    return project_rows(project_ids, flt, order)
+
+
+# Lignes échantillonnées pour dimensionner les colonnes (au lieu de toutes les mesurer)
+COLUMN_SIZE_SAMPLE = 50
+
+
 class ProjectTableModel(QAbstractTableModel):
-    HEADERS = ["Code", "Nom", "Responsable", "Début", "Fin"]
+    HEADERS = ["Code", "Nom", "Responsable", "Début", "Fin", "CAPEX", "OPEX"]
+    SORT_KEYS = ["code", "name", "owner", "start_date", "end_date", None, None]
+
+    loading_changed = Signal(bool)
+    loaded = Signal()           # première page (re)chargée
+    load_failed = Signal(object)
 
-    def __init__(self):
+    def __init__(self, page_size: int = PROJECT_PAGE_SIZE, executor: DbExecutor = None):
         super().__init__()
-        self._rows = []
+        self._rows = []  # ProjectListRow (tuples) : pas d’objets ORM dans le modèle
+        self._page_size = page_size
+        self._has_more = False
+        self._filter = ProjectFilter()
+        self._order = ProjectOrder()
+        self._executor = executor or db_executor()
+        self._generation = 0  # invalide les pages demandées avant un rechargement
+        self._fetching = False
 
     def load(self):
+        """Recharge la première page en arrière-plan ; la suite arrive via fetchMore()."""
+        self._generation += 1
+        generation = self._generation
+        self._fetching = True
+        self.loading_changed.emit(True)
+        self._executor.read(
+            fetch_project_page, self._filter, self._order, None, self._page_size
+        ).then(lambda result: self._on_first_page(generation, result), self._on_failed)
+
+    def _on_first_page(self, generation: int, rows):
+        if generation != self._generation:
+            return
         self.beginResetModel()
-        self._rows = list_projects()  # objets Project
+        self._rows = rows
+        self._has_more = len(rows) == self._page_size
+        self._fetching = False
         self.endResetModel()
+        self.loading_changed.emit(False)
+        self.loaded.emit()
+
+    def _on_failed(self, error):
+        self._fetching = False
+        self.loading_changed.emit(False)
+        self.load_failed.emit(error)
+
+    def set_filter(self, flt: ProjectFilter):
+        self._filter = flt
+        self.load()
+
+    def current_filter(self) -> ProjectFilter:
+        return self._filter
+
+    def is_sortable(self, column: int) -> bool:
+        return column < 0 or (column < len(self.SORT_KEYS) and self.SORT_KEYS[column] is not None)
+
+    # Tri délégué à SQL (colonne -1 : ordre par défaut, plus récents d'abord)
+    def sort(self, column, order=Qt.AscendingOrder):
+        if not self.is_sortable(column):
+            return
+        if column >= 0:
+            self._order = ProjectOrder(self.SORT_KEYS[column], order == Qt.DescendingOrder)
+        else:
+            self._order = ProjectOrder()
+        self.load()
+
+    def is_loading(self) -> bool:
+        return self._fetching
+
+    # Chargement paresseux au défilement (une page en vol à la fois)
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        after = page_cursor(self._rows[-1]) if self._rows else None
+        generation = self._generation
+        self._fetching = True
+        self.loading_changed.emit(True)
+        self._executor.read(
+            fetch_project_page, self._filter, self._order, after, self._page_size
+        ).then(lambda result: self._on_more(generation, result), self._on_failed)
+
+    def _on_more(self, generation: int, page):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        self._has_more = len(page) == self._page_size
+        if page:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+            self._rows.extend(page)
+            self.endInsertRows()
+        self.loading_changed.emit(False)
+
+    # --- Mises à jour ciblées (création / modification / suppression) ---
+    def refresh_projects(self, project_ids):
+        """Relit ces projets et met leurs lignes à jour sans recharger la liste."""
+        ids = list(project_ids)
+        generation = self._generation
+        self._executor.read(fetch_project_rows, ids, self._filter, self._order).then(
+            lambda result: self._apply_rows(generation, ids, result), self._on_failed
+        )
+
+    def _apply_rows(self, generation: int, ids, rows):
+        if generation != self._generation:
+            return  # liste rechargée entre-temps : elle est déjà à jour
+        found = {r.id: r for r in rows}
+        for project_id in ids:
+            row = found.get(project_id)
+            if row is None:
+                self.remove_project(project_id)  # supprimé, ou ne passe plus le filtre
+            else:
+                self._upsert(row)
+
+    def remove_project(self, project_id: int):
+        i = self.row_of(project_id)
+        if i is None:
+            return
+        self.beginRemoveRows(QModelIndex(), i, i)
+        del self._rows[i]
+        self.endRemoveRows()
+
+    def row_of(self, project_id: int):
+        return next((i for i, r in enumerate(self._rows) if r.id == project_id), None)
+
+    def _key(self, row):
+        # Ordre SQL (clé de tri, id) ; SQLite place les NULL en tête en ASC
+        return (row.sort_key is not None, row.sort_key or "", row.id)
+
+    def _position(self, row, skip=None) -> int:
+        """Place de `row` dans les lignes chargées (sans la ligne d'indice `skip`), par dichotomie."""
+        key = self._key(row)
+        descending = self._order.descending
+        lo, hi = 0, len(self._rows) - (skip is not None)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            other = self._key(self._rows[mid if skip is None or mid < skip else mid + 1])
+            if (other > key) if descending else (other < key):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _upsert(self, row):
+        old = self.row_of(row.id)
+        pos = self._position(row, skip=old)
+        loaded = len(self._rows) - (old is not None)
+        if pos == loaded and self._has_more:
+            # Au-delà des pages chargées : la ligne arrivera avec fetchMore()
+            if old is not None:
+                self.remove_project(row.id)
+            return
+        if old is None:
+            self.beginInsertRows(QModelIndex(), pos, pos)
+            self._rows.insert(pos, row)
+            self.endInsertRows()
+            return
+        if pos != old:
+            # beginMoveRows attend la destination en indices d'avant le déplacement
+            self.beginMoveRows(QModelIndex(), old, old, QModelIndex(), pos + 1 if pos > old else pos)
+            del self._rows[old]
+            self._rows.insert(pos, row)
+            self.endMoveRows()
+        else:
+            self._rows[pos] = row
+        self.dataChanged.emit(self.index(pos, 0), self.index(pos, self.columnCount() - 1))
 
     # Qt model API
     def rowCount(self, parent=QModelIndex()):
@@ -35,10 +218,14 @@ class ProjectTableModel(QAbstractTableModel):
         return 0 if parent.isValid() else len(self.HEADERS)
 
     def data(self, index: QModelIndex, role=Qt.DisplayRole):
-        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+        if not index.isValid():
             return None
-        p = self._rows[index.row()]
         col = index.column()
+        if role == Qt.TextAlignmentRole and col >= 5:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        p = self._rows[index.row()]
         if col == 0:
             return p.code
         if col == 1:
@@ -49,6 +236,8 @@ class ProjectTableModel(QAbstractTableModel):
             return p.start_date.isoformat() if p.start_date else ""
         if col == 4:
             return p.end_date.isoformat() if p.end_date else ""
+        if col in (5, 6):
+            return fmt_euros(cents_to_euros(p.capex_cents if col == 5 else p.opex_cents))
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
@@ -62,16 +251,72 @@ class ProjectTableModel(QAbstractTableModel):
     def count(self) -> int:
         return len(self._rows)
 
+    def row_at(self, row: int):
+        return self._rows[row]
+
+
+class _ProgressRelay(QObject):
+    """Callback de progression d'un import / export : relaie du worker vers le thread GUI."""
+
+    progress = Signal(int, object)  # (lignes traitées, fraction ou None)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cancelled = threading.Event()
+
+    def __call__(self, rows: int, fraction):
+        self.progress.emit(rows, fraction)
+        return not self.cancelled.is_set()
+
 
 class MainWindow(QMainWindow):
-    def __init__(self) -> None:
+    def __init__(self, load: bool = True) -> None:
+        """`load=False` : base pas encore prête ; contrôles désactivés jusqu'à set_database_ready()."""
         super().__init__()
         self.setWindowTitle("Gestion budgétaire — Projets")
-        self.model = ProjectTableModel()
+        self.db = db_executor()
+        self.model = ProjectTableModel(executor=self.db)
         self._setup_ui()
-        self.refresh()
+        self.model.loaded.connect(self._on_model_loaded)
+        self.model.load_failed.connect(self._on_db_error)
+        self.db.busy_changed.connect(self._on_busy_changed)
+        if load:
+            self.refresh()
+        else:
+            # Filtres, recherche, tri et actions lanceraient des lectures sur des tables absentes
+            self._set_controls_enabled(False)
         self.table.doubleClicked.connect(self.on_row_double_clicked)
 
+    # --- Etat de chargement / erreurs ---
+    def _set_controls_enabled(self, enabled: bool) -> None:
+        self.menuBar().setEnabled(enabled)
+        for widget in self._controls:
+            widget.setEnabled(enabled)
+
+    def set_database_ready(self) -> None:
+        """Base migrée : active les contrôles et charge la liste."""
+        self._set_controls_enabled(True)
+        self.refresh()
+
+    def _on_busy_changed(self, busy: bool):
+        self.loading_label.setVisible(busy)
+
+    def _on_db_error(self, error):
+        QMessageBox.critical(self, "Erreur", f"Erreur d'accès à la base :\n{error}")
+
+    def _with_project(self, project_id: int, callback, loader=get_project):
+        """Charge le projet complet en arrière-plan puis appelle callback(project)."""
+        def done(project):
+            if project:
+                callback(project)
+        self.db.read(loader, project_id).then(done, self._on_db_error)
+
+    def _open_detail(self, project_id: int):
+        def show(detail):
+            from .project_detail import ProjectDetailDialog
+            dlg = ProjectDetailDialog(detail, self)
+            dlg.exec()
+        self._with_project(project_id, show, loader=get_project_detail)
 
     def on_row_double_clicked(self, index: QModelIndex):
         if not index.isValid():
@@ -79,14 +324,20 @@ class MainWindow(QMainWindow):
         row = index.row()
         if row < 0 or row >= self.model.count():
             return
-        project = self.model._rows[row]
-        dlg = ProjectDetailDialog(project, self)
-        dlg.exec()
+        self._open_detail(self.model.row_at(row).id)
 
     def _setup_ui(self) -> None:
         root = QWidget(self)
         layout = QVBoxLayout(root)
 
+        # Menu Fichier > Exporter
+        export_menu = self.menuBar().addMenu("Fichier").addMenu("Exporter le portefeuille")
+        for label, fmt in (("CSV (dossier)…", "csv"), ("Excel (.xlsx)…", "xlsx"), ("Parquet (dossier)…", "parquet")):
+            export_menu.addAction(label).triggered.connect(lambda _checked=False, f=fmt: self.on_export(f))
+        tools_menu = self.menuBar().addMenu("Outils")
+        tools_menu.addAction("Tableau de bord du portefeuille…").triggered.connect(self.on_show_dashboard)
+        tools_menu.addAction("Diagnostics base de données…").triggered.connect(self.on_show_diagnostics)
+
         # Barre d'actions
         actions = QHBoxLayout()
         btn_new = QPushButton("Nouveau projet")
@@ -101,17 +352,99 @@ class MainWindow(QMainWindow):
         btn_delete.clicked.connect(self.on_delete_project)
         actions.addWidget(btn_delete)
 
+        btn_import = QPushButton("Importer lignes budgétaires…")
+        btn_import.clicked.connect(self.on_import_budget_lines)
+        actions.addWidget(btn_import)
+
         actions.addStretch(1)
+        self._controls = [btn_new, btn_edit, btn_delete, btn_import]
+
+        self.loading_label = QLabel("Chargement…")
+        self.loading_label.hide()
+        actions.addWidget(self.loading_label)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Rechercher (description, livrables, thèmes, actus)…")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setMinimumWidth(320)
+        actions.addWidget(self.search_edit)
+        self._controls.append(self.search_edit)
         layout.addLayout(actions)
 
+        # Résultats de recherche (masqués tant que la recherche est vide)
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(180)
+        self.search_results.itemActivated.connect(self.on_search_result_activated)
+        self.search_results.hide()
+        layout.addWidget(self.search_results)
+
+        self._search_seq = 0
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(200)
+        self._search_timer.timeout.connect(self.run_search)
+        self.search_edit.textChanged.connect(lambda _text: self._search_timer.start())
+
+        # Barre de filtres (appliqués en SQL)
+        filters = QHBoxLayout()
+        self.filter_text = QLineEdit()
+        self.filter_text.setPlaceholderText("Code ou nom…")
+        self.filter_text.setClearButtonEnabled(True)
+        filters.addWidget(self.filter_text, 2)
+
+        self.filter_status = QComboBox()
+        self.filter_status.addItem("Tous états", None)
+        for st in STATUSES:
+            self.filter_status.addItem(st, st)
+        filters.addWidget(self.filter_status)
+
+        self.filter_owner = QComboBox()
+        self.filter_owner.setMinimumWidth(160)
+        filters.addWidget(self.filter_owner)
+
+        self.filter_from = QLineEdit()
+        self.filter_from.setPlaceholderText("Du (AAAA-MM)")
+        self.filter_from.setMaximumWidth(110)
+        filters.addWidget(self.filter_from)
+        self.filter_to = QLineEdit()
+        self.filter_to.setPlaceholderText("Au (AAAA-MM)")
+        self.filter_to.setMaximumWidth(110)
+        filters.addWidget(self.filter_to)
+
+        btn_reset = QPushButton("Réinitialiser")
+        btn_reset.clicked.connect(self.on_reset_filters)
+        filters.addWidget(btn_reset)
+        self._controls += [self.filter_text, self.filter_status, self.filter_owner,
+                           self.filter_from, self.filter_to, btn_reset]
+        layout.addLayout(filters)
+
+        # Saisie texte : on attend une pause de frappe avant de requêter
+        self._filter_timer = QTimer(self)
+        self._filter_timer.setSingleShot(True)
+        self._filter_timer.setInterval(250)
+        self._filter_timer.timeout.connect(self.apply_filters)
+        for edit in (self.filter_text, self.filter_from, self.filter_to):
+            edit.textChanged.connect(lambda _text: self._filter_timer.start())
+        self.filter_status.currentIndexChanged.connect(self.apply_filters)
+        self.filter_owner.currentIndexChanged.connect(self.apply_filters)
+
         # Table
         self.table = QTableView()
         self.table.setModel(self.model)
         self.table.setSelectionBehavior(QTableView.SelectRows)
-        self.table.setSelectionMode(QTableView.SingleSelection)
+        self.table.setSelectionMode(QTableView.ExtendedSelection)  # Ctrl / Maj : actions groupées
         self.table.setAlternatingRowColors(True)
-        self.table.setSortingEnabled(False)  # activable plus tard
+        # Tri délégué au modèle (SQL) ; aucun indicateur = plus récents d'abord.
+        # Pas de setSortingEnabled(True), qui déclencherait un rechargement immédiat.
+        header = self.table.horizontalHeader()
+        header.setResizeContentsPrecision(COLUMN_SIZE_SAMPLE)
+        header.setSortIndicator(-1, Qt.AscendingOrder)
+        header.setSortIndicatorShown(True)
+        header.setSectionsClickable(True)
+        header.sortIndicatorChanged.connect(self._on_sort_changed)
+        self._sort_state = (-1, Qt.AscendingOrder)
         layout.addWidget(self.table)
+        self._controls.append(self.table)
 
         # Placeholder si vide
         self.empty_label = QLabel("Aucun projet pour le moment.")
@@ -121,38 +454,178 @@ class MainWindow(QMainWindow):
 
         self.setCentralWidget(root)
 
-    def refresh(self):
-        self.model.load()
-        count = self.model.count()
+    def _on_sort_changed(self, column: int, order):
+        header = self.table.horizontalHeader()
+        if not self.model.is_sortable(column):
+            # Colonne calculée : on remet l'indicateur précédent sans recharger
+            header.blockSignals(True)
+            header.setSortIndicator(*self._sort_state)
+            header.blockSignals(False)
+            return
+        self._sort_state = (column, order)
+        self.model.sort(column, order)
+
+    def _reload_owners(self):
+        current = self.filter_owner.currentData()
+        self.filter_owner.blockSignals(True)
+        self.filter_owner.clear()
+        self.filter_owner.addItem("Tous responsables", None)
+        self.filter_owner.blockSignals(False)
+        self.db.read(list_project_owners).then(lambda owners: self._set_owners(owners, current))
+
+    def _set_owners(self, owners, current):
+        self.filter_owner.blockSignals(True)
+        for owner in owners:
+            self.filter_owner.addItem(owner, owner)
+        idx = self.filter_owner.findData(current)
+        self.filter_owner.setCurrentIndex(max(idx, 0))
+        self.filter_owner.blockSignals(False)
+
+    def _build_filter(self) -> ProjectFilter:
+        return ProjectFilter(
+            text=self.filter_text.text().strip() or None,
+            status=self.filter_status.currentData(),
+            owner=self.filter_owner.currentData(),
+            date_from=parse_ym_to_date(self.filter_from.text().strip()),
+            date_to=parse_ym_to_date(self.filter_to.text().strip()),
+        )
+
+    def apply_filters(self):
+        self.model.set_filter(self._build_filter())
+        self._update_counts()
+
+    def on_reset_filters(self):
+        for w in (self.filter_text, self.filter_from, self.filter_to, self.filter_status, self.filter_owner):
+            w.blockSignals(True)
+        self.filter_text.clear()
+        self.filter_from.clear()
+        self.filter_to.clear()
+        self.filter_status.setCurrentIndex(0)
+        self.filter_owner.setCurrentIndex(0)
+        for w in (self.filter_text, self.filter_from, self.filter_to, self.filter_status, self.filter_owner):
+            w.blockSignals(False)
+        self.apply_filters()
+
+    def _update_counts(self):
+        flt = self.model.current_filter()
+        self.db.read(count_projects, flt).then(lambda count: self._on_count(flt, count))
+
+    def _on_count(self, flt: ProjectFilter, count: int):
+        if flt != self.model.current_filter():
+            return  # filtre modifié entre-temps
         self.setWindowTitle(f"Gestion budgétaire — {count} projet(s)")
-        self.table.setVisible(count > 0)
-        self.empty_label.setVisible(count == 0)
-        if count > 0:
+        has_rows = count > 0 or flt != ProjectFilter()
+        self.table.setVisible(has_rows)
+        self.empty_label.setVisible(not has_rows)
+
+    def _on_model_loaded(self):
+        # Rechargement complet uniquement (filtre, tri) : les mises à jour ciblées
+        # ne redimensionnent pas les colonnes
+        if self.model.count() > 0:
             self.table.resizeColumnsToContents()
             self.table.horizontalHeader().setStretchLastSection(True)
 
+    def refresh(self):
+        self._reload_owners()
+        self.model.load()
+        self._update_counts()
+
+    def _on_project_saved(self, project):
+        self.model.refresh_projects([project.id])
+        self._reload_owners()
+        self._update_counts()
+
+    def _on_project_deleted(self, project_id: int):
+        self.model.remove_project(project_id)
+        self._update_counts()
+
+    def _on_projects_updated(self, project_ids):
+        self.model.refresh_projects(project_ids)
+        self._reload_owners()
+        self._update_counts()
+
+    def _on_projects_deleted(self, project_ids):
+        for project_id in project_ids:
+            self.model.remove_project(project_id)
+        self._update_counts()
+
+    def _selected_rows(self):
+        return [self.model.row_at(index.row()) for index in self.table.selectionModel().selectedRows()]
+
+    # --- Recherche plein texte ---
+    def run_search(self):
+        query = self.search_edit.text().strip()
+        self._search_seq += 1
+        if not query:
+            self.search_results.clear()
+            self.search_results.hide()
+            return
+        seq = self._search_seq
+        self.db.read(search, query, 50).then(
+            lambda hits: self._on_search_done(seq, hits),
+            lambda _error: self._on_search_done(seq, []),
+        )
+
+    def _on_search_done(self, seq: int, hits: list):
+        if seq != self._search_seq:
+            return  # réponse à une saisie déjà dépassée
+        self.search_results.clear()
+        if not hits:
+            self.search_results.addItem("Aucun résultat.")
+        for hit in hits:
+            item = QListWidgetItem(f"{hit['code']} — {hit['name']} : {hit['snippet'] or ''}")
+            item.setData(Qt.UserRole, hit["project_id"])
+            self.search_results.addItem(item)
+        self.search_results.show()
+
+    def on_search_result_activated(self, item: QListWidgetItem):
+        project_id = item.data(Qt.UserRole)
+        if project_id is None:
+            return
+        self._open_detail(project_id)
+
     def on_new_project(self):
+        from .project_form import ProjectFormDialog
         dlg = ProjectFormDialog(self)
         if dlg.exec() == QDialog.Accepted:
             data = dlg.get_data()
             data["start_date"] = parse_ym_to_date(data.get("start_date"))
             data["end_date"] = parse_ym_to_date(data.get("end_date"))
-            try:
-                create_project(**data)
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur lors de la création du projet :\n{e}")
-                return
-            self.refresh()
+            self.db.write(create_project, **data).then(
+                self._on_project_saved,
+                lambda e: QMessageBox.critical(self, "Erreur", f"Erreur lors de la création du projet :\n{e}"),
+            )
 
     def on_edit_project(self):
-        indexes = self.table.selectionModel().selectedRows()
-        if not indexes:
+        rows = self._selected_rows()
+        if not rows:
             QMessageBox.information(self, "Modifier projet", "Veuillez sélectionner un projet à modifier.")
             return
+        if len(rows) > 1:
+            self._bulk_edit([r.id for r in rows])
+            return
+        self._with_project(rows[0].id, self._edit_project)
 
-        row = indexes[0].row()
-        project = self.model._rows[row]
+    def _bulk_edit(self, project_ids):
+        from .bulk_edit import BulkEditDialog
+        dlg = BulkEditDialog(len(project_ids), STATUSES, self)
+        if dlg.exec() != QDialog.Accepted:
+            return
+        fields = dlg.get_data()
+        if not fields:
+            return
+        if "end_date" in fields:
+            text = fields["end_date"]
+            fields["end_date"] = parse_ym_to_date(text)
+            if text and fields["end_date"] is None:
+                QMessageBox.warning(self, "Modifier la sélection", f"Date de fin invalide : {text}")
+                return
+        self.db.write(bulk_update_projects, project_ids, **fields).then(
+            lambda _count: self._on_projects_updated(project_ids),
+            lambda e: QMessageBox.critical(self, "Erreur", f"Erreur lors de la mise à jour des projets :\n{e}"),
+        )
 
+    def _edit_project(self, project):
         data = {
             "code": project.code,
             "name": project.name,
@@ -167,35 +640,34 @@ class MainWindow(QMainWindow):
             "subvention": project.subvention,
             "subvention_montant": project.subvention_montant,
             "amortissement": project.amortissement,
-            "investissement": project.investissement,
-            "themes": project.themes,
-            "images": project.images,
+            # ProjectRecord figé (partagé par le cache) : copies modifiables pour le formulaire
+            "investissement": [dict(inv) for inv in project.investissement],
+            "themes": list(project.themes),
+            "images": list(project.images),
+            "team": dict(project.team),
         }
 
+        from .project_form import ProjectFormDialog
         dlg = ProjectFormDialog(self, project_data=data)
         if dlg.exec() == QDialog.Accepted:
             updated = dlg.get_data()
             updated["start_date"] = parse_ym_to_date(updated.get("start_date"))
             updated["end_date"] = parse_ym_to_date(updated.get("end_date"))
-            if "investissement" in updated and updated["investissement"]:
-                date_obj = parse_ym_to_date(updated["investissement"].get("date"))
-                updated["investissement"]["date"] = date_obj.strftime("%Y-%m") if date_obj else None
-
-            try:
-                update_project(project.id, **updated)
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Erreur lors de la mise à jour du projet :\n{e}")
-                return
-            self.refresh()
+            self.db.write(update_project, project.id, **updated).then(
+                lambda saved: self._on_project_saved(saved) if saved else self._on_project_deleted(project.id),
+                lambda e: QMessageBox.critical(self, "Erreur", f"Erreur lors de la mise à jour du projet :\n{e}"),
+            )
 
     def on_delete_project(self):
-        indexes = self.table.selectionModel().selectedRows()
-        if not indexes:
+        rows = self._selected_rows()
+        if not rows:
             QMessageBox.information(self, "Suppression projet", "Veuillez sélectionner un projet à supprimer.")
             return
+        if len(rows) > 1:
+            self._bulk_delete([r.id for r in rows])
+            return
 
-        row = indexes[0].row()
-        project = self.model._rows[row]
+        project = rows[0]
 
         reply = QMessageBox.question(
             self,
@@ -206,10 +678,104 @@ class MainWindow(QMainWindow):
         if reply != QMessageBox.Yes:
             return
 
-        try:
-            delete_project(project.id)
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur lors de la suppression du projet :\n{e}")
+        self.db.write(delete_project, project.id).then(
+            lambda _deleted: self._on_project_deleted(project.id),
+            lambda e: QMessageBox.critical(self, "Erreur", f"Erreur lors de la suppression du projet :\n{e}"),
+        )
+
+    def _bulk_delete(self, project_ids):
+        reply = QMessageBox.question(
+            self,
+            "Confirmer la suppression",
+            f"Supprimer les {len(project_ids)} projets sélectionnés ?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+
+        self.db.write(bulk_delete_projects, project_ids).then(
+            lambda _count: self._on_projects_deleted(project_ids),
+            lambda e: QMessageBox.critical(self, "Erreur", f"Erreur lors de la suppression des projets :\n{e}"),
+        )
+
+    def on_show_dashboard(self):
+        from .dashboard import DashboardDialog
+        DashboardDialog(self).exec()
+
+    def on_show_diagnostics(self):
+        from .diagnostics import DiagnosticsDialog
+        if getattr(self, "_diagnostics", None) is None:
+            self._diagnostics = DiagnosticsDialog(self)
+        self._diagnostics.show()
+        self._diagnostics.raise_()
+
+    # --- Import / export ---
+    def _progress_dialog(self, label: str, unit: str):
+        """Boîte de progression annulable + callback à passer au service."""
+        dlg = QProgressDialog(label, "Annuler", 0, 1000, self)
+        dlg.setWindowModality(Qt.WindowModal)
+        dlg.setMinimumDuration(300)
+        relay = _ProgressRelay(dlg)
+        dlg.canceled.connect(relay.cancelled.set)
+
+        def on_progress(rows: int, fraction):
+            dlg.setLabelText(f"{label} {rows} ligne(s) {unit}")
+            if fraction is not None:
+                dlg.setValue(int(fraction * 1000))
+
+        relay.progress.connect(on_progress)
+        return dlg, relay
+
+    def on_import_budget_lines(self):
+        from app.services.budget_import import import_budget_lines, ImportCancelled
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Importer des lignes budgétaires", "", "Exports comptables (*.csv *.xlsx);;Tous les fichiers (*)"
+        )
+        if not path:
             return
 
-        self.refresh()
+        dlg, relay = self._progress_dialog("Import des lignes budgétaires…", "lue(s)")
+
+        def on_done(report):
+            dlg.reset()
+            msg = f"{report.inserted} ligne(s) importée(s), {report.skipped} ignorée(s)."
+            if report.errors:
+                details = "\n".join(f"Ligne {line} : {err}" for line, err in report.errors[:15])
+                msg += f"\n\n{details}"
+            QMessageBox.information(self, "Import terminé", msg)
+            self.refresh()
+
+        def on_error(error):
+            dlg.reset()
+            if isinstance(error, ImportCancelled):
+                QMessageBox.information(self, "Import annulé", "Aucune ligne n'a été importée.")
+                return
+            QMessageBox.critical(self, "Erreur", f"Import impossible :\n{error}")
+
+        self.db.write(import_budget_lines, path, progress=relay).then(on_done, on_error)
+
+    def on_export(self, fmt: str):
+        from app.services.export import export_portfolio, ExportCancelled
+        if fmt == "xlsx":
+            path, _ = QFileDialog.getSaveFileName(self, "Exporter le portefeuille", "portefeuille.xlsx",
+                                                  "Classeur Excel (*.xlsx)")
+        else:
+            # CSV / Parquet : un fichier par jeu de données dans le dossier choisi
+            path = QFileDialog.getExistingDirectory(self, "Dossier d'export")
+        if not path:
+            return
+
+        dlg, relay = self._progress_dialog("Export du portefeuille…", "écrite(s)")
+
+        def on_done(report):
+            dlg.reset()
+            details = "\n".join(f"{name} : {rows} ligne(s)" for name, rows in report.rows.items())
+            QMessageBox.information(self, "Export terminé", f"{details}\n\n{path}")
+
+        def on_error(error):
+            dlg.reset()
+            if isinstance(error, ExportCancelled):
+                return
+            QMessageBox.critical(self, "Erreur", f"Export impossible :\n{error}")
+
+        self.db.read(export_portfolio, path, fmt, progress=relay).then(on_done, on_error)
@@ -0,0 +1,168 @@
+"""Fil d'actualités d'un projet : modèle paginé + délégué peint.
+
+Aucun widget par actualité : le délégué dessine le texte et les boutons
+modifier / supprimer des seules lignes visibles, et repère les clics sur ces
+boutons. Les pages suivantes sont chargées au défilement (fetchMore).
+"""
+from typing import List, Optional
+
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QEvent, QRect, QSize, Signal
+from PySide6.QtWidgets import QStyle, QStyledItemDelegate, QStyleOptionButton, QApplication
+
+from app.db.repo import list_project_news, news_cursor, NewsRow, NEWS_PAGE_SIZE
+from .db_executor import DbExecutor, db_executor
+from .formatting import fmt_dt_hm
+
+NewsRole = Qt.UserRole + 1
+
+
+class NewsListModel(QAbstractListModel):
+    loading_changed = Signal(bool)
+    load_failed = Signal(object)
+
+    def __init__(self, project_id: int, page_size: int = NEWS_PAGE_SIZE,
+                 executor: Optional[DbExecutor] = None, parent=None):
+        super().__init__(parent)
+        self._project_id = project_id
+        self._rows: List[NewsRow] = []
+        self._page_size = page_size
+        self._has_more = False
+        self._executor = executor or db_executor()
+        self._generation = 0
+        self._fetching = False
+
+    def set_rows(self, rows, has_more: bool):
+        """Première page déjà chargée (ex. avec la fiche projet)."""
+        self._generation += 1
+        self.beginResetModel()
+        self._rows = list(rows)
+        self._has_more = has_more
+        self._fetching = False
+        self.endResetModel()
+
+    def load(self):
+        """Recharge la première page en arrière-plan."""
+        self._generation += 1
+        generation = self._generation
+        self._fetching = True
+        self.loading_changed.emit(True)
+        self._executor.read(list_project_news, self._project_id, None, self._page_size).then(
+            lambda rows: self._on_first_page(generation, rows), self._on_failed
+        )
+
+    def _on_first_page(self, generation: int, rows):
+        if generation != self._generation:
+            return
+        self.set_rows(rows, len(rows) == self._page_size)
+        self.loading_changed.emit(False)
+
+    def _on_failed(self, error):
+        self._fetching = False
+        self.loading_changed.emit(False)
+        self.load_failed.emit(error)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more and not self._fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent) or not self._rows:
+            return
+        generation = self._generation
+        self._fetching = True
+        self.loading_changed.emit(True)
+        self._executor.read(
+            list_project_news, self._project_id, news_cursor(self._rows[-1]), self._page_size
+        ).then(lambda rows: self._on_more(generation, rows), self._on_failed)
+
+    def _on_more(self, generation: int, rows):
+        if generation != self._generation:
+            return
+        self._fetching = False
+        self._has_more = len(rows) == self._page_size
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+        self.loading_changed.emit(False)
+
+    def is_loading(self) -> bool:
+        return self._fetching
+
+    # Qt model API
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        news = self._rows[index.row()]
+        if role == Qt.DisplayRole:
+            return f"{fmt_dt_hm(news.created_at)} — {news.text}"
+        if role == Qt.ToolTipRole:
+            return news.text
+        if role == NewsRole:
+            return news
+        return None
+
+
+class NewsDelegate(QStyledItemDelegate):
+    """Texte sur MAX_LINES lignes au plus (le reste en infobulle) + boutons ✏️ / 🗑️."""
+    edit_requested = Signal(int, str)   # id, texte actuel
+    delete_requested = Signal(int)
+
+    MARGIN = 4
+    BUTTON = 28
+    MAX_LINES = 4
+
+    def _button_rects(self, rect: QRect):
+        m, b = self.MARGIN, self.BUTTON
+        top = rect.top() + m
+        delete = QRect(rect.right() - m - b + 1, top, b, b)
+        edit = QRect(delete.left() - m - b, top, b, b)
+        return edit, delete
+
+    def _text_rect(self, rect: QRect) -> QRect:
+        m = self.MARGIN
+        return rect.adjusted(m, m, -(2 * self.BUTTON + 3 * m), -m)
+
+    def sizeHint(self, option, index):
+        view = self.parent()
+        width = view.viewport().width() if view is not None else option.rect.width()
+        text_width = max(50, width - 2 * self.BUTTON - 4 * self.MARGIN)
+        fm = option.fontMetrics
+        bounds = fm.boundingRect(QRect(0, 0, text_width, 10_000), int(Qt.TextWordWrap), index.data() or "")
+        height = min(bounds.height(), self.MAX_LINES * fm.lineSpacing())
+        return QSize(width, max(height, self.BUTTON) + 2 * self.MARGIN)
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PE_PanelItemViewItem, option, painter, option.widget)
+
+        painter.save()
+        text_rect = self._text_rect(option.rect)
+        painter.setClipRect(text_rect)
+        if option.state & QStyle.State_Selected:
+            painter.setPen(option.palette.highlightedText().color())
+        painter.drawText(text_rect, int(Qt.AlignLeft | Qt.AlignTop | Qt.TextWordWrap), index.data() or "")
+        painter.restore()
+
+        for rect, label in zip(self._button_rects(option.rect), ("✏️", "🗑️")):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.state = QStyle.State_Enabled | QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            news = index.data(NewsRole)
+            edit, delete = self._button_rects(option.rect)
+            pos = event.position().toPoint()
+            if edit.contains(pos):
+                self.edit_requested.emit(news.id, news.text)
+                return True
+            if delete.contains(pos):
+                self.delete_requested.emit(news.id)
+                return True
+        return super().editorEvent(event, model, option, index)
@@ -2,15 +2,14 @@ from __future__ import annotations
 from pathlib import Path
 from datetime import date, datetime
 from typing import Optional, List, Dict, Any
-import json
 from PySide6.QtWidgets import QSplitter 
 
-from PySide6.QtCore import QLocale, Qt, QSize
-from PySide6.QtGui import QDesktopServices
+from PySide6.QtCore import Qt, QSize, QUrl
+from PySide6.QtGui import QDesktopServices, QIcon
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QFormLayout, QLabel, QScrollArea, QWidget, QHBoxLayout,
     QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox,
-    QGroupBox, QInputDialog, QListWidget, QListWidgetItem, QFrame
+    QGroupBox, QInputDialog, QListView, QFrame, QToolButton
 )
 
 # --- Hooks repo (à implémenter côté app.db.repo)
@@ -29,49 +28,41 @@ except Exception:
         setattr(ProjectDetailDialog, "_mem_news", store)
         return item
 
-EURO = QLocale(QLocale.Language.French, QLocale.Country.France)
+from .formatting import EURO, fmt_month_yyyy, fmt_euros, cents_to_euros
 
-def fmt_month_yyyy(d: Optional[date]) -> str:
-    if not d:
-        return "—"
-    return EURO.toString(d, "MMMM yyyy")
-
-def fmt_euros(v: Optional[float]) -> str:
-    if v is None:
-        return "—"
-    return EURO.toCurrencyString(float(v), symbol="€")
-
-def cents_to_euros(cents: Optional[int]) -> Optional[float]:
-    if cents is None: return None
-    return round(cents / 100.0, 2)
-
-def fmt_dt_hm(dt: datetime | str | None) -> str:
-    if not dt:
-        return "—"
-    if isinstance(dt, str):
-        try:
-            dt = datetime.fromisoformat(dt)
-        except Exception:
-            return dt
-    return dt.strftime("%d/%m/%Y %H:%M")
 # [...] Garde tous tes imports actuels + le fallback list_project_news / create_project_news si besoin
 
+from app.services.amortization import project_schedule, month_index
+from .db_executor import db_executor
+from .news_feed import NewsListModel, NewsDelegate
+from .thumbnails import thumbnail_cache, THUMB_SIZE
 from app.db.repo import (
-    list_project_news,
     create_project_news,
     update_project_news,
     delete_project_news
 )
 
 class ProjectDetailDialog(QDialog):
+    """Fiche projet ; `project` est un ProjectDetail (repo.get_project_detail) déjà chargé."""
     def __init__(self, project, parent=None) -> None:
         super().__init__(parent)
         self.project = project
+        self.db = db_executor()
         self.setWindowTitle(f"Détail — {project.name} ({project.code})")
         self.setMinimumSize(QSize(1200, 800))
         self.setWindowState(Qt.WindowMaximized)
+        # Détruit à la fermeture : enfant de MainWindow, il resterait sinon en mémoire
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self._thumbs_connected = False
         self._build()
 
+    def done(self, result: int) -> None:
+        # Le cache de vignettes est global : il ne doit pas garder de lien vers ce dialogue
+        if self._thumbs_connected:
+            thumbnail_cache().ready.disconnect(self._on_thumbnail)
+            self._thumbs_connected = False
+        super().done(result)
+
     def _build(self):
         outer = QVBoxLayout(self)
         outer.setContentsMargins(12, 12, 12, 12)
@@ -115,6 +106,7 @@ class ProjectDetailDialog(QDialog):
         v2.setContentsMargins(0, 0, 0, 0)
         v2.setSpacing(6)
         v2.addWidget(self._section_contenu())
+        v2.addWidget(self._section_budget())
         v2.addStretch(1)
 
         # --- Colonne 3 : Financements + Investissement + Images + Métadonnées
@@ -163,11 +155,7 @@ class ProjectDetailDialog(QDialog):
 
     def _section_themes(self) -> QWidget:
         gb = self._mk_section("Thèmes")
-        themes_raw = getattr(self.project, "themes", None)
-        try:
-            themes_list = json.loads(themes_raw) if isinstance(themes_raw, str) else themes_raw or []
-        except Exception:
-            themes_list = []
+        themes_list = self.project.themes
         gb.layout().addRow("Thèmes", QLabel(", ".join(themes_list) if themes_list else "—"))
         return gb
 
@@ -187,9 +175,7 @@ class ProjectDetailDialog(QDialog):
 
     def _section_investissement(self) -> QWidget:
         gb = self._mk_section("Investissement")
-        inv_list = self.project.investissement or []
-        if isinstance(inv_list, dict):
-            inv_list = [inv_list]
+        inv_list = self.project.investissement
 
         table = QTableWidget(len(inv_list), 3)
         table.setHorizontalHeaderLabels(["Montant", "Date", "Durée"])
@@ -199,33 +185,76 @@ class ProjectDetailDialog(QDialog):
             table.setItem(i, 2, QTableWidgetItem(str(inv.get("duree_mois") or "")))
         gb.layout().addRow(table)
 
-        gb.layout().addRow("Montant", QLabel(fmt_euros(inv.get("montant"))))
-        gb.layout().addRow("Date d’achat", QLabel(self._fmt_inv_date(inv.get("date"))))
-        gb.layout().addRow("Durée (mois)", QLabel(str(inv.get("duree_mois") or "—")))
+        schedule = project_schedule(self.project.id, list(inv_list))
+        if not schedule.dotations.size:
+            gb.layout().addRow("Plan d’amortissement", QLabel("—"))
+            return gb
+
+        # VNC au mois courant (avant le premier achat : rien au bilan)
+        today = month_index(date.today())
+        offset = today - schedule.first_month
+        if offset < 0:
+            current_nbv = 0.0
+        elif offset >= schedule.dotations.shape[1]:
+            current_nbv = float(schedule.net_book_value[0, -1])
+        else:
+            current_nbv = float(schedule.net_book_value[0, offset])
+        gb.layout().addRow("VNC à date", QLabel(fmt_euros(current_nbv)))
+        gb.layout().addRow("Fin d’amortissement", QLabel(schedule.months[-1]))
+
+        yearly = schedule.by_year(self.project.id)
+        plan = QTableWidget(len(yearly), 3)
+        plan.setHorizontalHeaderLabels(["Année", "Dotations", "VNC fin d’année"])
+        plan.verticalHeader().setVisible(False)
+        plan.setEditTriggers(QTableWidget.NoEditTriggers)
+        for i, (year, dot, nbv) in enumerate(yearly):
+            plan.setItem(i, 0, QTableWidgetItem(str(year)))
+            plan.setItem(i, 1, QTableWidgetItem(fmt_euros(dot)))
+            plan.setItem(i, 2, QTableWidgetItem(fmt_euros(nbv)))
+        plan.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        gb.layout().addRow("Plan d’amortissement", plan)
+        return gb
+
+    def _section_budget(self) -> QWidget:
+        gb = self._mk_section("Budget")
+        p = self.project
+        gb.layout().addRow("CAPEX", QLabel(fmt_euros(cents_to_euros(p.capex_cents))))
+        gb.layout().addRow("OPEX", QLabel(fmt_euros(cents_to_euros(p.opex_cents))))
+        gb.layout().addRow("Total", QLabel(fmt_euros(cents_to_euros(p.total_cents))))
+        shown = len(p.budget_lines)
+        count = f"{p.budget_line_count}" if shown == p.budget_line_count else f"{shown} premières sur {p.budget_line_count}"
+        gb.layout().addRow("Lignes", QLabel(count))
+        if not shown:
+            return gb
+        table = QTableWidget(shown, 4)
+        table.setHorizontalHeaderLabels(["Libellé", "Nature", "Montant", "Date de valeur"])
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setMaximumHeight(220)
+        for i, line in enumerate(p.budget_lines):
+            table.setItem(i, 0, QTableWidgetItem(line.label))
+            table.setItem(i, 1, QTableWidgetItem("CAPEX" if line.is_capex else "OPEX"))
+            amount = QTableWidgetItem(fmt_euros(cents_to_euros(line.amount_cents)))
+            amount.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            table.setItem(i, 2, amount)
+            table.setItem(i, 3, QTableWidgetItem(line.value_date.strftime("%d/%m/%Y") if line.value_date else "—"))
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        gb.layout().addRow(table)
         return gb
 
     def _section_equipe(self) -> QWidget:
         gb = self._mk_section("Équipe")
-        team = self.project.team or {}
-        if isinstance(team, str):
-            import json
-            team = json.loads(team)
+        team = self.project.team
         if not team:
             gb.layout().addRow("Aucun membre")
             return gb
-        for role, nb in team.items():
+        for role, nb in team:
             gb.layout().addRow(role, QLabel(str(nb)))
         return gb
 
     def _section_images(self) -> QWidget:
         gb = self._mk_section("Images")
-        images_raw = self.project.images or []
-        if isinstance(images_raw, str):
-            try:
-                images_raw = json.loads(images_raw)
-            except Exception:
-                images_raw = []
-        gb.layout().addRow("Fichiers", self._images_widget(images_raw))
+        gb.layout().addRow("Fichiers", self._images_widget(self.project.images))
         return gb
 
     def _section_metadonnees(self) -> QWidget:
@@ -246,78 +275,71 @@ class ProjectDetailDialog(QDialog):
         btn_add.clicked.connect(self._add_news_dialog)
         layout.addWidget(btn_add)
 
-        self.news_list = QListWidget()
-        self.news_list.setWordWrap(True)
+        # Modèle paginé + délégué peint : seules les lignes visibles sont dessinées
+        self.news_model = NewsListModel(self.project.id, executor=self.db, parent=self)
+        self.news_model.loading_changed.connect(self._on_news_loading)
+        self.news_model.load_failed.connect(self._news_failed)
+        self.news_list = QListView()
         self.news_list.setFrameShape(QFrame.NoFrame)
         self.news_list.setMaximumHeight(200)
         self.news_list.setMinimumHeight(40)
         self.news_list.setSpacing(2)
+        self.news_list.setResizeMode(QListView.Adjust)
+        self.news_list.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.news_list.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.news_list.setModel(self.news_model)
+        delegate = NewsDelegate(self.news_list)
+        delegate.edit_requested.connect(self._edit_news)
+        delegate.delete_requested.connect(self._delete_news)
+        self.news_list.setItemDelegate(delegate)
         layout.addWidget(self.news_list)
 
-        self._reload_news()
+        self.news_status = QLabel("Chargement des actualités…")
+        self.news_status.hide()
+        layout.addWidget(self.news_status)
+
+        # Première page déjà chargée avec la fiche : pas de requête à l'ouverture
+        self.news_model.set_rows(self.project.news, self.project.has_more_news)
         return panel
 
+    def _reload_news(self):
+        self.news_model.load()
 
+    def _on_news_loading(self, loading: bool):
+        self.news_status.setText("Chargement des actualités…")
+        self.news_status.setVisible(loading)
 
-    def _reload_news(self):
-        self.news_list.clear()
-        try:
-            items = list_project_news(self.project.id)
-        except Exception:
-            items = []
-
-        for news in items:
-            txt = news["text"]
-            dt = fmt_dt_hm(news["created_at"])
-            item_widget = QWidget()
-            row = QHBoxLayout(item_widget)
-            row.setContentsMargins(0, 0, 0, 0)
-
-            label = QLabel(f"{dt} — {txt}")
-            label.setWordWrap(True)
-            row.addWidget(label, 1)
-
-            btn_edit = QPushButton("✏️")
-            btn_edit.setFixedSize(28, 28)
-            btn_edit.clicked.connect(lambda _, nid=news["id"], txt=txt: self._edit_news(nid, txt))
-            row.addWidget(btn_edit)
-
-            btn_del = QPushButton("🗑️")
-            btn_del.setFixedSize(28, 28)
-            btn_del.clicked.connect(lambda _, nid=news["id"]: self._delete_news(nid))
-            row.addWidget(btn_del)
-
-            item = QListWidgetItem()
-            item.setSizeHint(item_widget.sizeHint())
-            self.news_list.addItem(item)
-            self.news_list.setItemWidget(item, item_widget)
+    def _news_failed(self, error):
+        self.news_status.setText(f"Actualités indisponibles : {error}")
+        self.news_status.show()
 
     def _add_news_dialog(self):
         txt, ok = QInputDialog.getMultiLineText(self, "Nouvelle actualité", "Message :", "")
         if ok and txt.strip():
-            try:
-                create_project_news(self.project.id, txt.strip(), datetime.now())
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Ajout impossible : {e}")
-            self._reload_news()
+            self.db.write(create_project_news, self.project.id, txt.strip(), datetime.now()).then(
+                lambda _news: self._reload_news(),
+                lambda e: self._news_write_failed(f"Ajout impossible : {e}"),
+            )
 
     def _edit_news(self, news_id: int, current_text: str):
         txt, ok = QInputDialog.getMultiLineText(self, "Modifier l’actualité", "Message :", current_text)
         if ok and txt.strip():
-            try:
-                update_project_news(news_id, txt.strip())
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Modification impossible : {e}")
-            self._reload_news()
+            self.db.write(update_project_news, news_id, txt.strip()).then(
+                lambda _ok: self._reload_news(),
+                lambda e: self._news_write_failed(f"Modification impossible : {e}"),
+            )
 
     def _delete_news(self, news_id: int):
         confirm = QMessageBox.question(self, "Supprimer", "Supprimer cette actualité ?", QMessageBox.Yes | QMessageBox.No)
         if confirm == QMessageBox.Yes:
-            try:
-                delete_project_news(news_id)
-            except Exception as e:
-                QMessageBox.critical(self, "Erreur", f"Suppression impossible : {e}")
-            self._reload_news()
+            self.db.write(delete_project_news, news_id).then(
+                lambda _ok: self._reload_news(),
+                lambda e: self._news_write_failed(f"Suppression impossible : {e}"),
+            )
+
+    def _news_write_failed(self, message: str):
+        QMessageBox.critical(self, "Erreur", message)
+        self._reload_news()
 
     # --- Helpers
     def _title(self, txt: str) -> QLabel:
@@ -331,21 +353,37 @@ class ProjectDetailDialog(QDialog):
         lab.setTextInteractionFlags(Qt.TextSelectableByMouse)
         return lab
 
-    def _images_widget(self, images: List[Dict[str, Any]]) -> QWidget:
+    def _images_widget(self, images: List[Any]) -> QWidget:
         w = QWidget()
         row = QHBoxLayout(w)
         if not images:
             row.addWidget(QLabel("—"))
             return w
+        # Vignettes décodées en arrière-plan ; affichage immédiat si déjà en cache mémoire
+        cache = thumbnail_cache()
+        cache.ready.connect(self._on_thumbnail)
+        self._thumbs_connected = True
+        self._thumb_buttons: Dict[str, List[QToolButton]] = {}
         for img in images:
-            path = img.get("url") or img if isinstance(img, str) else "inconnu"
-            btn = QPushButton(Path(path).name)
+            path = img if isinstance(img, str) else (img.get("url") or "inconnu")
+            btn = QToolButton()
+            btn.setText(Path(path).name)
             btn.setToolTip(path)
-            btn.clicked.connect(lambda _, p=path: QDesktopServices.openUrl(f"file:///{Path(p).resolve()}"))
+            btn.setToolButtonStyle(Qt.ToolButtonTextUnderIcon)
+            btn.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+            btn.clicked.connect(lambda _=False, p=path: QDesktopServices.openUrl(QUrl.fromLocalFile(str(Path(p).resolve()))))
+            self._thumb_buttons.setdefault(path, []).append(btn)
+            pixmap = cache.request(path)
+            if pixmap is not None:
+                btn.setIcon(QIcon(pixmap))
             row.addWidget(btn)
         row.addStretch(1)
         return w
 
+    def _on_thumbnail(self, path: str, pixmap):
+        for btn in self._thumb_buttons.get(path, ()):
+            btn.setIcon(QIcon(pixmap))
+
     def _fmt_dt(self, dt: Any) -> str:
         if not dt: return "—"
         try:
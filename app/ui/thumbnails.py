@@ -0,0 +1,216 @@
+"""Vignettes des images de projet, décodées hors du thread GUI.
+
+Deux niveaux de cache :
+- mémoire : LRU de QPixmap (THUMB_MEMORY_ENTRIES) ;
+- disque : media/thumbs/, un fichier par clé sha256(chemin absolu, mtime,
+  taille, côté de la vignette), borné à THUMB_CACHE_MB ; les fichiers les
+  moins récemment lus sont supprimés au-delà.
+
+Une image modifiée change de clé : son ancienne vignette n'est plus lue et
+finit évincée. Le décodage utilise QImageReader.setScaledSize (les JPEG sont
+réduits dès le décodage, sans charger l'image pleine taille).
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Qt, Signal, Slot
+from PySide6.QtGui import QImage, QImageReader, QPixmap
+
+THUMB_DIR = Path("media") / "thumbs"
+THUMB_SIZE = 160
+MEMORY_ENTRIES = int(os.getenv("THUMB_MEMORY_ENTRIES", "256"))
+DISK_LIMIT_BYTES = int(float(os.getenv("THUMB_CACHE_MB", "64")) * 1024 * 1024)
+WORKERS = 2
+
+
+def thumbnail_key(path: str, size: int = THUMB_SIZE) -> Optional[str]:
+    """Clé de la vignette, ou None si le fichier est illisible."""
+    try:
+        resolved = str(Path(path).resolve())
+        st = os.stat(resolved)
+    except OSError:
+        return None
+    raw = f"{resolved}\0{st.st_mtime_ns}\0{st.st_size}\0{size}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """Vignettes sur disque, bornées en octets (éviction des moins récemment lues)."""
+
+    def __init__(self, directory: Path = THUMB_DIR, limit_bytes: int = DISK_LIMIT_BYTES):
+        self.directory = Path(directory)
+        self.limit_bytes = limit_bytes
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None  # calculé au premier ajout
+
+    def _path(self, key: str, ext: str) -> Path:
+        return self.directory / key[:2] / f"{key}.{ext}"
+
+    def load(self, key: str) -> Optional[QImage]:
+        for ext in ("jpg", "png"):
+            path = self._path(key, ext)
+            if path.exists():
+                image = QImage(str(path))
+                if image.isNull():
+                    return None
+                try:
+                    os.utime(path)  # ordre d'éviction : dernière lecture
+                except OSError:
+                    pass
+                return image
+        return None
+
+    def store(self, key: str, image: QImage) -> None:
+        # JPEG sauf transparence ; écriture dans un temporaire puis rename atomique
+        ext = "png" if image.hasAlphaChannel() else "jpg"
+        path = self._path(key, ext)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        if not image.save(str(tmp), "PNG" if ext == "png" else "JPEG", 85):
+            tmp.unlink(missing_ok=True)
+            return
+        os.replace(tmp, path)
+        with self._lock:
+            if self._total is None:
+                self._total = self._scan_size()
+            else:
+                self._total += path.stat().st_size
+            if self._total > self.limit_bytes:
+                self._evict()
+
+    def _files(self):
+        return [p for p in self.directory.glob("*/*") if p.suffix in (".jpg", ".png")]
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self._files())
+
+    def _evict(self) -> None:
+        """Supprime les plus anciennes jusqu'à 90 % de la limite (évite d'évincer à chaque ajout)."""
+        entries = []
+        for p in self._files():
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.limit_bytes * 0.9
+        for _, size, p in entries:
+            if total <= target:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+        self._total = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for p in self._files():
+                p.unlink(missing_ok=True)
+            self._total = 0
+
+
+def decode_thumbnail(path: str, size: int = THUMB_SIZE) -> Optional[QImage]:
+    """Image réduite à `size` px de côté maximal (thread quelconque)."""
+    reader = QImageReader(path)
+    reader.setAutoTransform(True)  # orientation EXIF
+    source = reader.size()
+    if source.isValid() and (source.width() > size or source.height() > size):
+        reader.setScaledSize(source.scaled(QSize(size, size), Qt.KeepAspectRatio))
+    image = reader.read()
+    if image.isNull():
+        return None
+    if image.width() > size or image.height() > size:  # format sans taille connue à l'avance
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+class _Relay(QObject):
+    deliver = Signal(str, str, object)  # (chemin, clé, QImage ou None)
+
+
+class _Job(QRunnable):
+    def __init__(self, relay: _Relay, disk: DiskTier, path: str, key: str, size: int):
+        super().__init__()
+        self.relay = relay
+        self.disk = disk
+        self.path = path
+        self.key = key
+        self.size = size
+
+    def run(self) -> None:
+        image = self.disk.load(self.key)
+        if image is None:
+            image = decode_thumbnail(self.path, self.size)
+            if image is not None:
+                try:
+                    self.disk.store(self.key, image)
+                except OSError:
+                    pass  # cache disque indisponible : la vignette reste en mémoire
+        self.relay.deliver.emit(self.path, self.key, image)
+
+
+class ThumbnailCache(QObject):
+    """request(path) : QPixmap si déjà en mémoire, sinon None puis signal `ready(path, pixmap)`."""
+
+    ready = Signal(str, QPixmap)
+    failed = Signal(str)
+
+    def __init__(self, size: int = THUMB_SIZE, memory_entries: int = MEMORY_ENTRIES,
+                 disk: Optional[DiskTier] = None, workers: int = WORKERS, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self.size = size
+        self.memory_entries = memory_entries
+        self.disk = disk or DiskTier()
+        self._memory: "OrderedDict[str, QPixmap]" = OrderedDict()
+        self._pending = set()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max(workers, 1))
+        self._relay = _Relay(self)
+        self._relay.deliver.connect(self._on_deliver)
+
+    def request(self, path: str) -> Optional[QPixmap]:
+        key = thumbnail_key(path, self.size)
+        if key is None:
+            self.failed.emit(path)
+            return None
+        pixmap = self._memory.get(key)
+        if pixmap is not None:
+            self._memory.move_to_end(key)
+            return pixmap
+        if key not in self._pending:
+            self._pending.add(key)
+            self._pool.start(_Job(self._relay, self.disk, path, key, self.size))
+        return None
+
+    @Slot(str, str, object)
+    def _on_deliver(self, path: str, key: str, image) -> None:
+        self._pending.discard(key)
+        if image is None:
+            self.failed.emit(path)
+            return
+        pixmap = QPixmap.fromImage(image)  # QPixmap : thread GUI uniquement
+        self._memory[key] = pixmap
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+        self.ready.emit(path, pixmap)
+
+    def wait(self, msecs: int = -1) -> None:
+        self._pool.waitForDone(msecs)
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+
+_cache: Optional[ThumbnailCache] = None
+
+def thumbnail_cache() -> ThumbnailCache:
+    """Cache partagé de l'application (créé au premier appel, dans le thread GUI)."""
+    global _cache
+    if _cache is None:
+        _cache = ThumbnailCache()
+    return _cache
@@ -0,0 +1,10 @@
+"""Benchmarks de démarrage et d'interaction.
+
+    python -m benchmarks.run --sizes 1k,100k            # -> benchmarks/results/<date>-<commit>.json
+    python -m benchmarks.compare avant.json apres.json  # code de retour 1 si régression
+
+Chaque taille (1k, 100k, 1m lignes budgétaires) a sa base synthétique, générée
+une fois dans benchmarks/.data puis réutilisée. Les mesures tournent dans des
+sous-processus : DB_URL est lu à l'import de app.db.models, et le démarrage à
+froid doit partir d'un interpréteur neuf.
+"""
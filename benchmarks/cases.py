@@ -0,0 +1,91 @@
+"""Mesures repo + UI sur une base générée : python -m benchmarks.cases 100k [repeat].
+
+Le DbExecutor est en mode inline : chaque appel est mesuré de bout en bout,
+sans attente de thread. Qt tourne sur la plateforme offscreen.
+"""
+import os
+import sys
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.common import HOT_CODE, SIZES, emit, measure
+
+
+def run(size: str, repeat: int = 5) -> dict:
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QApplication
+
+    from app.db.repo import (
+        list_projects, list_budget_lines, list_project_news, query_projects, count_projects,
+        get_project_detail, find_project_id,
+    )
+    from app.db.cache import cache
+    from app.services.budget_summary import project_totals
+    from app.services.dashboard import load_dashboard
+    import app.ui.db_executor as executor_mod
+    from app.ui.db_executor import DbExecutor
+
+    app = QApplication.instance() or QApplication([])
+    executor_mod._executor = DbExecutor(inline=True)
+
+    from app.ui.main_window import ProjectTableModel
+    from app.ui.project_detail import ProjectDetailDialog
+
+    hot_id = find_project_id(HOT_CODE)
+    typical_id = find_project_id(f"BENCH-{SIZES[size]['projects'] // 2:05d}")
+    # Les listes complètes sur 1M lignes sont longues : moins de répétitions
+    slow = max(1, repeat // 2) if size == "1m" else repeat
+
+    cases = {}
+    cases["list_projects"] = measure(list_projects, slow)
+    cases["query_projects_first_page"] = measure(query_projects, repeat)
+    cases["count_projects"] = measure(count_projects, repeat)
+    first_page = [r.id for r in query_projects()]
+    cases["project_totals_page"] = measure(lambda: project_totals(first_page), repeat)
+    cases["dashboard_load"] = measure(load_dashboard, repeat)
+    # Lectures SQLite (cache contourné) puis relectures servies par le cache
+    cases["list_budget_lines_hot"] = measure(lambda: list_budget_lines.uncached(hot_id), slow)
+    cases["list_budget_lines_typical"] = measure(lambda: list_budget_lines.uncached(typical_id), repeat)
+    cases["list_project_news_hot"] = measure(lambda: list_project_news.uncached(hot_id), slow)
+    cases["list_project_news_typical"] = measure(lambda: list_project_news.uncached(typical_id), repeat)
+    list_budget_lines(hot_id)
+    cases["list_budget_lines_hot_cached"] = measure(lambda: list_budget_lines(hot_id), repeat)
+
+    def model_load():
+        model = ProjectTableModel(executor=executor_mod._executor)
+        model.load()
+        return model
+
+    cases["model_load"] = measure(model_load, repeat)
+
+    model = model_load()
+    cells = [model.index(r, c) for r in range(model.rowCount()) for c in range(model.columnCount())]
+
+    def model_data():
+        for index in cells:
+            model.data(index, Qt.DisplayRole)
+            model.data(index, Qt.TextAlignmentRole)
+
+    cases["model_data_first_page"] = measure(model_data, repeat)
+
+    def open_detail():
+        dlg = ProjectDetailDialog(get_project_detail(hot_id))
+        dlg.show()
+        app.processEvents()
+        dlg.close()
+        dlg.deleteLater()
+        app.processEvents()
+
+    def open_detail_cold():
+        cache.clear()
+        open_detail()
+
+    cases["detail_dialog_open_hot"] = measure(open_detail_cold, slow)
+    cases["detail_dialog_reopen_hot"] = measure(open_detail, slow)
+    return cases
+
+
+if __name__ == "__main__":
+    size = sys.argv[1]
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    emit({"size": size, "cases": run(size, repeat)})
@@ -0,0 +1,48 @@
+"""Un démarrage à froid, étape par étape : python -m benchmarks.cold_start.
+
+Lancé dans un interpréteur neuf par benchmarks.run (une fois par mesure).
+Reprend le chemin de app.main.main() jusqu'à la première page affichée, la
+base étant préparée dans le thread courant (DbExecutor inline).
+"""
+import os
+import time
+
+_T0 = time.perf_counter()
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.common import emit
+
+
+def run() -> dict:
+    phases = {}
+    last = _T0
+
+    def mark(name: str) -> None:
+        nonlocal last
+        now = time.perf_counter()
+        phases[name] = round((now - last) * 1000, 3)
+        last = now
+
+    from app.main import create_app, prepare_database
+    mark("import_app_main")
+    app = create_app()
+    mark("create_app")
+
+    import app.ui.db_executor as executor_mod
+    from app.ui.db_executor import DbExecutor
+    from app.ui.main_window import MainWindow
+    mark("import_main_window")
+    executor_mod._executor = DbExecutor(inline=True)
+
+    prepare_database()
+    mark("prepare_database")
+    win = MainWindow()
+    win.show()
+    app.processEvents()
+    mark("window_first_page")
+    phases["total"] = round((time.perf_counter() - _T0) * 1000, 3)
+    return phases
+
+
+if __name__ == "__main__":
+    emit(run())
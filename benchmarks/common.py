@@ -0,0 +1,44 @@
+"""Tailles des jeux de données et mesure des temps."""
+import json
+import statistics
+import sys
+import time
+from typing import Callable, Dict
+
+# lignes budgétaires, projets, news ; le projet « chaud » (BENCH-00000)
+# concentre HOT_SHARE des lignes et des news
+SIZES: Dict[str, Dict[str, int]] = {
+    "1k": {"lines": 1_000, "projects": 50, "news": 200},
+    "100k": {"lines": 100_000, "projects": 2_000, "news": 20_000},
+    "1m": {"lines": 1_000_000, "projects": 10_000, "news": 100_000},
+}
+HOT_SHARE = 0.05
+HOT_CODE = "BENCH-00000"
+
+
+def measure(fn: Callable[[], object], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """Temps d'appel de fn() en ms (min / médiane / moyenne / max sur `repeat` appels)."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t) * 1000)
+    return summarize(times)
+
+
+def summarize(times) -> Dict[str, float]:
+    return {
+        "runs": len(times),
+        "min_ms": round(min(times), 3),
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "max_ms": round(max(times), 3),
+    }
+
+
+def emit(payload: dict) -> None:
+    """Résultat d'un sous-processus : une ligne JSON sur stdout."""
+    sys.stdout.write(json.dumps(payload) + "\n")
+    sys.stdout.flush()
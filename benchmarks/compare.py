@@ -0,0 +1,62 @@
+"""Compare deux résultats : python -m benchmarks.compare reference.json courant.json.
+
+Une mesure régresse si sa médiane dépasse celle de la référence de plus de
+--threshold (20 % par défaut) et d'au moins --min-delta-ms (le bruit sur
+les mesures de l'ordre de la milliseconde n'est pas une régression).
+Code de retour 1 s'il y a au moins une régression.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+
+def compare(reference: dict, current: dict, threshold: float, min_delta_ms: float) -> List[dict]:
+    rows = []
+    for size, cases in current["results"].items():
+        ref_cases = reference["results"].get(size, {})
+        for name, stats in cases.items():
+            ref = ref_cases.get(name)
+            row = {"size": size, "case": name, "current": stats["median_ms"],
+                   "reference": None, "ratio": None, "status": "nouveau"}
+            if ref is not None:
+                before, after = ref["median_ms"], stats["median_ms"]
+                row["reference"] = before
+                row["ratio"] = after / before if before else None
+                if after > before * (1 + threshold) and after - before >= min_delta_ms:
+                    row["status"] = "RÉGRESSION"
+                elif after < before * (1 - threshold) and before - after >= min_delta_ms:
+                    row["status"] = "amélioration"
+                else:
+                    row["status"] = "ok"
+            rows.append(row)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.compare")
+    parser.add_argument("reference", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.20, help="écart relatif toléré (0.20 = 20 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="écart absolu minimal pour signaler")
+    args = parser.parse_args(argv)
+
+    reference = json.loads(args.reference.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    rows = compare(reference, current, args.threshold, args.min_delta_ms)
+
+    print(f"{'taille':>6}  {'mesure':<34} {'réf. ms':>10} {'actuel ms':>10} {'ratio':>7}  statut")
+    for r in rows:
+        ref = f"{r['reference']:.2f}" if r["reference"] is not None else "—"
+        ratio = f"{r['ratio']:.2f}x" if r["ratio"] is not None else "—"
+        print(f"{r['size']:>6}  {r['case']:<34} {ref:>10} {r['current']:>10.2f} {ratio:>7}  {r['status']}")
+    regressions = [r for r in rows if r["status"] == "RÉGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} régression(s) au-delà de {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
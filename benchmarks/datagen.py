@@ -0,0 +1,95 @@
+"""Génère une base synthétique : python -m benchmarks.datagen 100k (DB_URL cible).
+
+Les projets passent par repo.bulk_create_projects (thèmes, investissements,
+FTS compris, une seule transaction). Les lignes budgétaires et les news sont insérées par lots avec
+executemany, comme l'import : un appel repo par ligne prendrait des heures
+à 1M lignes sans rien mesurer d'utile.
+"""
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from benchmarks.common import SIZES, HOT_SHARE, HOT_CODE
+
+BATCH = 10_000
+THEMES = ["ERP", "Cloud", "Sécurité", "Data", "Réseau", "Poste de travail", "Mobilité", "IA"]
+OWNERS = ["Direction Financière", "DSI", "Achats", "RH", "Production", "Commercial"]
+STATUSES = ["Futur", "En cours", "Terminé"]
+LABELS = ["Licences", "Serveurs", "Prestations", "Formation", "Maintenance", "Hébergement", "Matériel"]
+
+
+def _spread(total: int, n_projects: int, rng: random.Random) -> list:
+    """project index par élément : HOT_SHARE sur le projet 0, le reste au hasard."""
+    hot = int(total * HOT_SHARE)
+    return [0] * hot + [rng.randrange(n_projects) for _ in range(total - hot)]
+
+
+def generate(size: str, seed: int = 42) -> dict:
+    from app.db.repo import init_db, bulk_create_projects
+    from app.db.models import engine, BudgetLine, ProjectNews, Project, rebuild_project_totals
+    from app.db import rollup
+
+    spec = SIZES[size]
+    rng = random.Random(seed)
+    init_db()
+    with engine.connect() as conn:
+        if conn.execute(select(Project.id).limit(1)).first():
+            raise SystemExit("La base cible n'est pas vide")
+
+    projects = []
+    for i in range(spec["projects"]):
+        start = date(2020 + rng.randrange(6), 1 + rng.randrange(12), 1)
+        projects.append(dict(
+            code=HOT_CODE if i == 0 else f"BENCH-{i:05d}",
+            name=f"Projet {i} {rng.choice(THEMES)}",
+            owner=rng.choice(OWNERS),
+            status=rng.choice(STATUSES),
+            start_date=start,
+            end_date=start + timedelta(days=365 * (1 + rng.randrange(3))),
+            description=f"Description du projet {i} : modernisation {rng.choice(THEMES).lower()}.",
+            themes=rng.sample(THEMES, 2),
+            investissement=[{"montant": 1000 * (1 + rng.randrange(500)),
+                             "date": f"{start.year}-{start.month:02d}", "duree_mois": 36}],
+            team={"Chef de projet": 1, "Développeur": rng.randrange(1, 6)},
+        ))
+    bulk_create_projects(projects)
+
+    with engine.connect() as conn:
+        ids = conn.execute(select(Project.id).order_by(Project.id)).scalars().all()
+
+    with engine.begin() as conn:
+        batch = []
+        for n, idx in enumerate(_spread(spec["lines"], len(ids), rng), start=1):
+            batch.append({
+                "project_id": ids[idx],
+                "label": rng.choice(LABELS),
+                "is_capex": rng.random() < 0.6,
+                "amount_cents": rng.randrange(1_00, 50_000_00),
+                "value_date": date(2020 + rng.randrange(6), 1 + rng.randrange(12), 1 + rng.randrange(28)),
+            })
+            if len(batch) >= BATCH or n == spec["lines"]:
+                conn.execute(insert(BudgetLine), batch)
+                batch = []
+
+        batch = []
+        base = datetime(2024, 1, 1)
+        for n, idx in enumerate(_spread(spec["news"], len(ids), rng), start=1):
+            batch.append({
+                "project_id": ids[idx],
+                "text": f"Point d'avancement {n} : livraison {rng.choice(LABELS).lower()} validée.",
+                "created_at": base + timedelta(minutes=n),
+            })
+            if len(batch) >= BATCH or n == spec["news"]:
+                conn.execute(insert(ProjectNews), batch)
+                batch = []
+        # Lignes insérées hors repo : agrégats recalculés d'un coup
+        rollup.rebuild(conn)
+        rebuild_project_totals(conn)
+    return spec
+
+
+if __name__ == "__main__":
+    spec = generate(sys.argv[1])
+    print(f"{sys.argv[1]} : {spec}", file=sys.stderr)
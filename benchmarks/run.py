@@ -0,0 +1,128 @@
+"""Lance la suite : python -m benchmarks.run [--sizes 1k,100k,1m] [--output fichier.json].
+
+Les bases sont générées au premier lancement dans --data-dir (puis
+réutilisées ; --regen pour les refaire). Chaque taille est mesurée dans son
+propre sous-processus, et chaque démarrage à froid dans un interpréteur neuf.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.common import SIZES, summarize
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = ROOT / "benchmarks"
+
+
+def _env(db_path: Path) -> dict:
+    env = dict(os.environ)
+    env["DB_URL"] = f"sqlite:///{db_path}"
+    env["QT_QPA_PLATFORM"] = "offscreen"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), env.get("PYTHONPATH")]))
+    env.pop("APP_PROFILE_STARTUP", None)
+    return env
+
+
+def _run_module(module: str, args: List[str], db_path: Path) -> dict:
+    """Exécute `python -m module` (cwd = dossier des données : media/ n'atterrit pas dans le dépôt)."""
+    proc = subprocess.run(
+        [sys.executable, "-m", module, *args],
+        cwd=db_path.parent, env=_env(db_path), capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} {' '.join(args)} a échoué :\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def ensure_database(size: str, data_dir: Path, regen: bool = False) -> Path:
+    db_path = data_dir / f"bench_{size}.db"
+    if regen or not db_path.exists():
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+        print(f"[{size}] génération de {db_path.name}…", file=sys.stderr)
+        t = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-m", "benchmarks.datagen", size],
+                              cwd=data_dir, env=_env(db_path))
+        if proc.returncode != 0:
+            db_path.unlink(missing_ok=True)
+            raise RuntimeError(f"génération {size} échouée")
+        print(f"[{size}] générée en {time.perf_counter() - t:.1f} s", file=sys.stderr)
+    return db_path
+
+
+def cold_start(db_path: Path, runs: int) -> dict:
+    samples = [_run_module("benchmarks.cold_start", [], db_path) for _ in range(runs)]
+    return {phase: summarize([s[phase] for s in samples]) for phase in samples[0]}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _versions() -> dict:
+    versions = {"python": platform.python_version()}
+    for name in ("sqlalchemy", "PySide6", "numpy"):
+        try:
+            module = __import__(name)
+            versions[name] = getattr(module, "__version__", "?")
+        except ImportError:
+            pass
+    return versions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run")
+    parser.add_argument("--sizes", default="1k,100k", help=f"parmi {', '.join(SIZES)} (1m : génération longue)")
+    parser.add_argument("--repeat", type=int, default=5, help="répétitions par mesure")
+    parser.add_argument("--cold-runs", type=int, default=5, help="démarrages à froid par taille")
+    parser.add_argument("--data-dir", type=Path, default=BENCH_DIR / ".data")
+    parser.add_argument("--regen", action="store_true", help="régénère les bases")
+    parser.add_argument("--output", type=Path, help="fichier JSON (benchmarks/results/<date>-<commit>.json par défaut)")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"taille(s) inconnue(s) : {', '.join(unknown)}")
+    args.data_dir.mkdir(parents=True, exist_ok=True)
+
+    commit = _git_commit()
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit,
+            "platform": platform.platform(),
+            "versions": _versions(),
+            "repeat": args.repeat,
+        },
+        "results": {},
+    }
+    for size in sizes:
+        db_path = ensure_database(size, args.data_dir.resolve(), args.regen)
+        print(f"[{size}] mesures…", file=sys.stderr)
+        cases = _run_module("benchmarks.cases", [size, str(args.repeat)], db_path)["cases"]
+        cases.update({f"cold_start.{phase}": stats for phase, stats in cold_start(db_path, args.cold_runs).items()})
+        results["results"][size] = cases
+        for name, stats in cases.items():
+            print(f"  {size:>5} {name:<34} {stats['median_ms']:>10.2f} ms", file=sys.stderr)
+
+    output = args.output or BENCH_DIR / "results" / f"{datetime.now():%Y%m%d-%H%M%S}-{commit or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,9 @@
 # reset_db.py
+# Raccourci interactif de `python -m app.cli reset` (utiliser --yes hors terminal)
 
-from app.db.models import Base, engine
+import sys
+
+from app.cli import main
 
 if __name__ == "__main__":
-    print("⚠️  ATTENTION : Suppression et recréation de toutes les tables !")
-    confirm = input("Es-tu sûr ? (o/n) : ")
-    if confirm.lower() == "o":
-        Base.metadata.drop_all(bind=engine)
-        Base.metadata.create_all(bind=engine)
-        print("✅ Base de données réinitialisée.")
-    else:
-        print("❌ Opération annulée.")
+    sys.exit(main(["reset", *sys.argv[1:]]))